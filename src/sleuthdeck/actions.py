@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import os
 import signal
-import subprocess
 from time import sleep
 from typing import Optional, Union, Tuple
 
@@ -14,7 +13,10 @@ from sleuthdeck.deck import Key
 from sleuthdeck.deck import KeyScene
 from sleuthdeck.deck import Scene
 from sleuthdeck.keys import IconKey
+from sleuthdeck import windows
+from sleuthdeck.processes import get_supervisor
 from sleuthdeck.windows import get_window, By, get_windows, get_focused_window
+from sleuthdeck.x11 import get_registry
 
 
 class Sequential(Action):
@@ -28,13 +30,49 @@ class Sequential(Action):
 
 
 class Command(Action):
-    def __init__(self, command: str, *args: str):
+    """Runs a command in the background, logging its output, unless told to wait for it to finish.
+
+    The command is stopped after ``timeout`` seconds. Pass None for one that may run for as
+    long as it likes, such as an interactive tool.
+    """
+
+    def __init__(self, command: str, *args: str, timeout: Optional[float] = 60, wait: bool = False):
         self.command = command
         self.args = args
+        self.timeout = timeout
+        self.wait = wait
 
     def __call__(self, scene: KeyScene, key: Key, click: ClickType):
         print(f"Running {self.command} {' '.join(self.args)}")
-        subprocess.run([self.command] + list(self.args))
+        future = get_supervisor().run(self.command, *self.args, timeout=self.timeout)
+        if self.wait:
+            future.result()
+
+
+class Launch(Action):
+    """Starts an app unless it's already running, tracking it by pid.
+
+    For commands that hand off to the app, like ``gtk-launch``, ``match`` is a pattern for the
+    app's command line. With ``wait``, the press waits up to ``timeout`` seconds for the app to
+    be ready, so later actions in a sequence can rely on it.
+    """
+
+    def __init__(self, name: str, command: str, *args: str, match: Optional[str] = None,
+                 ready: Optional[str] = None, wait: bool = False, timeout: float = 30):
+        self.name = name
+        self.command = command
+        self.args = args
+        self.match = match
+        self.ready = ready
+        self.wait = wait
+        self.timeout = timeout
+
+    def __call__(self, scene: KeyScene, key: Key, click: ClickType):
+        print(f"Launching {self.name}")
+        app = get_supervisor().launch(self.name, self.command, *self.args, match=self.match,
+                                      ready=self.ready, start_timeout=self.timeout)
+        if self.wait and not app.ready.wait(self.timeout):
+            print(f"{self.name} wasn't ready after {self.timeout}s")
 
 
 class Wait(Action):
@@ -144,14 +182,54 @@ class MoveWindow(Action):
             print("No window found")
 
 
+class PlaceWindow(Action):
+    """Moves a window and (un)maximizes it, sending all the operations in one batch"""
+
+    def __init__(self, title: Union[str, By], x: int, y: int, width: int, height: int,
+                 unmaximize: bool = True, maximize: bool = True):
+        self.title = title
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.unmaximize = unmaximize
+        self.maximize = maximize
+
+    def __call__(self, scene: KeyScene, key: Key, click: ClickType):
+        window = get_window(self.title, attempts=5 * 10)
+        if not window:
+            print("No window found")
+            return
+        with windows.batch():
+            if self.unmaximize:
+                window.unmaximize()
+            window.move(self.x, self.y, self.width, self.height)
+            if self.maximize:
+                window.maximize()
+
+
 class SendHotkey(Action):
-    def __init__(self, title: Union[str, By] | None, *hotkey: str):
+    def __init__(self, title: Union[str, By] | None, *hotkey: str, steal_focus: bool = True):
         self.title = title
         self.hotkey = hotkey
+        self.steal_focus = steal_focus
 
     def __call__(self, scene: KeyScene, key: Key, click: ClickType):
         print("sending key")
 
+        registry = get_registry()
+        if registry:
+            window = None
+            if self.title:
+                window = get_window(self.title, attempts=5 * 10)
+                if not window:
+                    print(f"No window found for {self.title}")
+                    return
+            registry.send_hotkey(self.hotkey, window.window_id if window else None,
+                                 steal_focus=self.steal_focus)
+            print("sent")
+            return
+
         focused_window = get_focused_window()
         if self.title:
 
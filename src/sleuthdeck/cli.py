@@ -9,19 +9,21 @@ from datetime import datetime
 from datetime import timedelta
 from multiprocessing import Queue
 from types import ModuleType
+from typing import Optional
 
-from StreamDeck.Transport.Transport import TransportError
-
-from sleuthdeck.deck import Deck
+from sleuthdeck.profiling import ImportProfiler
 from watchdog.events import FileSystemEventHandler
 
 
 class ReloadingHandler(FileSystemEventHandler):
-    def __init__(self, script: str):
+    def __init__(self, script: str, hot: bool = False, profiler: Optional[ImportProfiler] = None):
         if not os.path.exists(script):
             raise ValueError(f"Missing script file {script}")
         self.deck = None
         self.script = script
+        # Rebuild the scenes on the open deck on save, rather than reopening it
+        self.hot = hot
+        self.profiler = profiler
         self._run_thread = threading.Thread(target=self.run)
         self._reloading_queue = Queue()
         self._run_thread.start()
@@ -36,12 +38,18 @@ class ReloadingHandler(FileSystemEventHandler):
         self._reloading_queue.put(object())
 
     def run(self):
+        # Imported here so --profile-imports sees the deck's imports too
+        from StreamDeck.Transport.Transport import TransportError
+
+        from sleuthdeck.deck import Deck
+
         mod_name = self.script.replace("/", ".")
         if mod_name.endswith(".py"):
             mod_name = mod_name[:-3]
 
         try:
             while not self.deck or self._reloading_queue.get():
+                started = time.perf_counter()
                 print(f"Running {mod_name}")
                 try:
                     mod = runpy.run_module(mod_name)
@@ -54,6 +62,18 @@ class ReloadingHandler(FileSystemEventHandler):
                 if "run" not in mod:
                     raise ValueError(f"Script {self.script} missing 'run' function")
 
+                if self.hot and self.deck and self.deck.stream_deck.is_open():
+                    start = time.perf_counter()
+                    try:
+                        self.deck.reload(mod["run"])
+                        print(f"Reloaded {self.script} in {(time.perf_counter() - start) * 1000:.0f}ms")
+                    except Exception as e:
+                        print(f"Error: {e}, keeping the old scenes")
+                        traceback.print_exc()
+                    self._report_imports(started)
+                    self._wait()
+                    continue
+
                 if self.deck:
                     print("Closing old deck")
                     self.deck.close()
@@ -74,12 +94,8 @@ class ReloadingHandler(FileSystemEventHandler):
                     traceback.print_exc()
                     self.deck = None
                     continue
-                while self.deck.stream_deck.is_open() and self._reloading_queue.empty():
-                    time.sleep(1)
-
-                if not self.deck.stream_deck.is_open():
-                    print("Closing deck")
-                    self.deck = None
+                self._report_imports(started)
+                self._wait()
 
         except EOFError:
             if self.deck and self.deck.stream_deck.is_open():
@@ -87,6 +103,20 @@ class ReloadingHandler(FileSystemEventHandler):
 
         print("Exiting")
 
+    def _report_imports(self, started: float):
+        if self.profiler:
+            print(f"Deck ready {(time.perf_counter() - started) * 1000:.0f}ms after running the script")
+            print(self.profiler.report())
+            self.profiler.clear()
+
+    def _wait(self):
+        while self.deck.stream_deck.is_open() and self._reloading_queue.empty():
+            time.sleep(1)
+
+        if not self.deck.stream_deck.is_open():
+            print("Closing deck")
+            self.deck = None
+
     def stop(self):
         self._reloading_queue.close()
 
@@ -100,11 +130,20 @@ class ReloadingHandler(FileSystemEventHandler):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run a Python script")
     parser.add_argument("script", metavar="SCRIPT", help="Path to the script to run")
+    parser.add_argument("--hot", action="store_true",
+                        help="Reload into the open deck, only updating the keys that changed")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="Report the time spent importing each module once the deck is ready")
     opts = parser.parse_args()
 
+    profiler = None
+    if opts.profile_imports:
+        profiler = ImportProfiler()
+        profiler.install()
+
     from watchdog.observers import Observer
 
-    event_handler = ReloadingHandler(opts.script)
+    event_handler = ReloadingHandler(opts.script, hot=opts.hot, profiler=profiler)
     observer = Observer()
     observer.schedule(event_handler, path=opts.script)
     observer.start()
@@ -6,17 +6,22 @@ import time
 import traceback
 from asyncio import Future
 from asyncio import Task
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from enum import auto
 from enum import Enum
+from functools import partial
+from typing import Any
 from typing import Awaitable
 from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
+from typing import TYPE_CHECKING
 from typing import Union
 
 from PIL import Image
@@ -28,7 +33,10 @@ from StreamDeck.DeviceManager import DeviceManager
 from StreamDeck.Devices import StreamDeck
 from StreamDeck.ImageHelpers import PILHelper
 
-from sleuthdeck.hotkeys import Hotkeys
+from sleuthdeck.keymap import Keymap
+
+if TYPE_CHECKING:
+    from sleuthdeck.hotkeys import Hotkeys
 
 
 class ClickType(Enum):
@@ -58,23 +66,40 @@ class Key:
 
 
 class Deck:
-    def __init__(self):
-        print("Scanning for stream decks")
-        streamdecks = DeviceManager().enumerate()
-        if not streamdecks:
-            raise RuntimeError("No stream decks found")
-        self.stream_deck: StreamDeck = streamdecks[0]
+    def __init__(self, stream_deck: Optional[StreamDeck] = None, hotkeys: Optional[Hotkeys] = None):
+        if stream_deck is None:
+            print("Scanning for stream decks")
+            streamdecks = DeviceManager().enumerate()
+            if not streamdecks:
+                raise RuntimeError("No stream decks found")
+            stream_deck = streamdecks[0]
+        self.stream_deck: StreamDeck = stream_deck
         print(f"Found stream deck: {self.stream_deck.id()}")
 
         self._animation = Animations(self.stream_deck)
         self._scene = Scene()
         self._last_scene: Scene = self._scene
+        # The scenes made by the current script, in creation order, to match up on hot reload
+        self._scenes: List[Scene] = []
+        self._on_close: List[Callable[[], None]] = []
+        self._building = False
+        self._requested_scene: Optional[Scene] = None
+        # What each key is showing, so unchanged images aren't sent to the device again
+        self._shown: Dict[int, Any] = {}
+        self._shown_lock = threading.Lock()
         self._updating_loop = asyncio.new_event_loop()
         self._updating_thread = threading.Thread(
             target=self._start_background_loop, args=(self._updating_loop,)
         )
         self._updating_thread.start()
-        self.hotkeys = Hotkeys()
+        # Runs actions triggered off the deck, like hotkeys, so their listeners are never held up
+        self.action_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="actions")
+        if hotkeys is None:
+            # The input listeners need a display, so are only imported for a real deck
+            from sleuthdeck.hotkeys import Hotkeys
+
+            hotkeys = Hotkeys(self.action_executor)
+        self.hotkeys = hotkeys
         self.hotkeys.start()
         self._animation.start()
         self._reset_streamdeck()
@@ -99,42 +124,129 @@ class Deck:
             self.close()
         self.stream_deck.open()
         self.stream_deck.reset()
+        self.forget_shown()
 
     @property
     def scene(self):
         return self._scene
 
     def close(self):
+        self._run_on_close(self._on_close)
         with self.stream_deck:
             self._scene.deactivate()
-            self._updating_loop.stop()
+            self._updating_loop.call_soon_threadsafe(self._updating_loop.stop)
             self.stream_deck.reset()
             self.stream_deck.close()
         self.hotkeys.stop()
+        self.action_executor.shutdown(wait=False)
 
     def new_key_scene(self):
-        return KeyScene(self)
+        scene = KeyScene(self)
+        self._scenes.append(scene)
+        return scene
 
     def new_video_scene(self, video_file: str, on_finish: Callable[[], None]):
-        return VideoScene(self.stream_deck, video_file, on_finish)
+        scene = VideoScene(self.stream_deck, video_file, on_finish, deck=self)
+        self._scenes.append(scene)
+        return scene
+
+    def on_close(self, callback: Callable[[], None]):
+        """Calls back when the scenes built alongside it are thrown away, on close or hot reload"""
+        self._on_close.append(callback)
 
     def change_scene(self, scene: Scene):
+        if self.defer_activation(scene):
+            return
         self._scene.deactivate()
         self._last_scene = self._scene
         self._scene = scene
         self._scene.activate()
 
-    def update_key_image(self, pos: int, image: Optional[Image]):
-        if image:
-            if getattr(image, "is_animated", False):
-                self._animation.add(pos, image)
-            else:
-                native_image = PILHelper.to_native_key_format(self.stream_deck, image)
-                self.stream_deck.set_key_image(pos, native_image)
-                self._animation.clear(pos)
+    def defer_activation(self, scene: Scene) -> bool:
+        """While a hot reload builds its scenes, notes the scene to show instead of showing it"""
+        if self._building:
+            self._requested_scene = scene
+        return self._building
+
+    def reload(self, run: Callable[[Deck], None]):
+        """Rebuilds the scenes with ``run`` on the open device and shows what changed.
+
+        The device, its threads and the hotkey listeners are kept. The new scene in the same
+        position as the active one takes its place without the keys being cleared, and only
+        keys whose image differs are sent to the device. If ``run`` fails, the old scenes stay.
+        """
+        old_scenes, self._scenes = self._scenes, []
+        old_on_close, self._on_close = self._on_close, []
+        self._requested_scene = None
+        self._building = True
+        try:
+            run(self)
+        except BaseException:
+            self._run_on_close(self._on_close)
+            self._scenes, self._on_close = old_scenes, old_on_close
+            raise
+        finally:
+            self._building = False
+        self._run_on_close(old_on_close)
+
+        fallback = self._requested_scene or next(iter(self._scenes), None)
+        scene = self._matching_scene(self._scene, old_scenes) or fallback
+        last_scene = self._matching_scene(self._last_scene, old_scenes) or scene
+        if scene is None:
+            return
+        if isinstance(self._scene, KeyScene) and isinstance(scene, KeyScene):
+            self._scene.stop()
+            self._scene = scene
+            scene.activate()
         else:
-            self.stream_deck.set_key_image(pos, None)
+            self.change_scene(scene)
+        self._last_scene = last_scene
+
+    def _matching_scene(self, scene: Scene, old_scenes: Sequence[Scene]) -> Optional[Scene]:
+        idx = next((i for i, s in enumerate(old_scenes) if s is scene), None)
+        if idx is None or idx >= len(self._scenes):
+            return None
+        match = self._scenes[idx]
+        return match if type(match) is type(scene) else None
+
+    @staticmethod
+    def _run_on_close(callbacks: List[Callable[[], None]]):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error closing: {e}")
+                traceback.print_exc()
+
+    def update_key_image(self, pos: int, image: Optional[Image]):
+        if image and getattr(image, "is_animated", False):
+            with self._shown_lock:
+                self._shown.pop(pos, None)
+            self._animation.add(pos, image)
+            return
+
+        shown = (image.mode, image.size, image.tobytes()) if image else None
+        with self._shown_lock:
+            if pos in self._shown and self._shown[pos] == shown:
+                return
             self._animation.clear(pos)
+            native_image = PILHelper.to_native_key_format(self.stream_deck, image) if image else None
+            self.stream_deck.set_key_image(pos, native_image)
+            self._shown[pos] = shown
+
+    def forget_shown(self):
+        """Sends every key's next image, for after something drew to the device directly"""
+        with self._shown_lock:
+            self._shown.clear()
+
+    def update_key_native(self, pos: int, native_image: bytes):
+        """Shows an image already converted to the deck's native key format"""
+        with self._shown_lock:
+            if self._shown.get(pos) == native_image:
+                return
+            self._animation.clear(pos)
+            self.stream_deck.set_key_image(pos, native_image)
+            self._shown[pos] = native_image
 
     def previous_scene(self):
         self.change_scene(self._last_scene)
@@ -150,14 +262,21 @@ class Scene:
 
 class VideoScene:
     def __init__(
-        self, stream_deck: StreamDeck, video_file: str, on_finish: Callable[[], None]
+        self, stream_deck: StreamDeck, video_file: str, on_finish: Callable[[], None],
+        deck: Optional[Deck] = None,
     ):
         self._stream_deck = stream_deck
         self._video_file = video_file
         self._on_finish = on_finish
+        self._deck = deck
 
     def activate(self):
+        if self._deck and self._deck.defer_activation(self):
+            return
         video.show_video(self._stream_deck, self._video_file)
+        if self._deck:
+            # The video drew straight to the device
+            self._deck.forget_shown()
         self._on_finish()
 
     def deactivate(self):
@@ -235,7 +354,14 @@ class KeyScene(Scene):
             pos = next(pos for pos, reg in enumerate(self._keys) if reg.key == key)
             self._deck.update_key_image(pos, key.image)
 
+    def update_native_image(self, key: Key, native_image: bytes):
+        if self._active:
+            pos = next(pos for pos, reg in enumerate(self._keys) if reg.key == key)
+            self._deck.update_key_native(pos, native_image)
+
     def activate(self):
+        if self._deck.defer_activation(self):
+            return
         self._active = True
 
         def key_change_callback(_, key_id, state):
@@ -258,9 +384,14 @@ class KeyScene(Scene):
         self._click_thread = threading.Thread(target=self._check_long_click)
         self._click_thread.start()
 
-        for key in self._keys:
-            for hotkey in key.key.hotkeys:
-                self._deck.hotkeys.register_mouse_button(hotkey, lambda: self._run_actions(ClickType.CLICK, key.key))
+        self._deck.hotkeys.use(self._keymap())
+
+    def _keymap(self) -> Keymap:
+        keymap = Keymap()
+        for reg in self._keys:
+            for hotkey in reg.key.hotkeys:
+                keymap.bind(hotkey, partial(self._run_actions, ClickType.CLICK, reg.key))
+        return keymap
 
     @staticmethod
     async def _run_updating_task(awaitable: Awaitable):
@@ -276,11 +407,14 @@ class KeyScene(Scene):
         for pos, key in enumerate(self._keys):
             self._deck.update_key_image(pos, None)
 
+        self.stop()
+        self._deck.stream_deck.set_key_callback(None)
+        self._deck.hotkeys.reset()
+
+    def stop(self):
+        """Stops updating and handling the keys, leaving their images showing"""
         for reg in self._keys:
             if reg.updator:
                 reg.updator.cancel()
-
-        self._deck.stream_deck.set_key_callback(None)
         self._active = False
         self._click_thread = None
-        self._deck.hotkeys.reset()
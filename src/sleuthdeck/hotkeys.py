@@ -1,29 +1,134 @@
-from collections import defaultdict
+import threading
+import time
+import traceback
+from concurrent.futures import Executor
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Set
 
-from pynput.mouse import Listener
+from pynput import keyboard
+from pynput import mouse
+
+from sleuthdeck.keymap import Keymap
+from sleuthdeck.keymap import Matcher
+from sleuthdeck.keymap import MODIFIERS
+from sleuthdeck.keymap import normalize_key
+
+
+# Some backends report named keys as a KeyCode with only a vk
+_NAMED_KEYS = {key.value.vk: key for key in keyboard.Key if key.value.vk is not None}
+
+
+def key_name(key: keyboard.Key) -> str:
+    name = key.name
+    # ctrl_l -> ctrl, alt_gr -> alt
+    for side in ("_l", "_r", "_gr"):
+        if name.endswith(side):
+            name = name[: -len(side)]
+    return normalize_key(name)
 
 
 class Hotkeys:
+    """Listens for global keyboard and mouse input and runs the bound callbacks.
 
-    def __init__(self):
-        self.listener = None
-        self.mouse_button_registry = defaultdict(list)
-        self.listener = Listener(on_click=self.on_click)
+    Callbacks are queued to ``executor`` so a slow action never holds up the input
+    listeners. Bindings made with :meth:`register` always apply; the active scene's keymap
+    is swapped in on top of them with :meth:`use`.
+    """
+
+    def __init__(self, executor: Executor, sequence_timeout: float = 1.0):
+        self.executor = executor
+        self._global = Keymap()
+        self._scene: Optional[Keymap] = None
+        self._matcher = Matcher(timeout=sequence_timeout)
+        self._lock = threading.Lock()
+        self._modifiers: Set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+        self.listener = mouse.Listener(on_click=self.on_click)
+        self.keyboard_listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
 
     def start(self):
         self.listener.start()
+        self.keyboard_listener.start()
         self.listener.wait()
+        self.keyboard_listener.wait()
 
-    def on_click(self, x, y, button, pressed):
-        if pressed:
-            for callback in self.mouse_button_registry[button]:
-                callback(x, y, button)
+    def register(self, spec: str, callback: Callable[[], None]):
+        """Binds the hotkey for every scene"""
+        with self._lock:
+            self._global.bind(spec, callback)
+            self._matcher.keymap = self._global.merged(self._scene)
 
-    def register_mouse_button(self, button, callback):
-        self.mouse_button_registry[button].append(callback)
+    def use(self, keymap: Optional[Keymap]):
+        """Replaces the scene bindings with the keymap, or clears them with None"""
+        with self._lock:
+            self._scene = keymap
+            self._matcher.keymap = self._global.merged(keymap)
 
     def reset(self):
-        self.mouse_button_registry.clear()
+        self.use(None)
+
+    def on_click(self, x, y, button, pressed):
+        if pressed and isinstance(button.value, int):
+            self._feed(frozenset(self._modifiers | {f"mouse{button.value}"}))
+
+    def on_press(self, key):
+        name = self._key_name(key)
+        if name is None:
+            return
+        if name in MODIFIERS:
+            self._modifiers.add(name)
+        else:
+            self._feed(frozenset(self._modifiers | {name}))
+
+    def on_release(self, key):
+        name = self._key_name(key)
+        if name in MODIFIERS:
+            self._modifiers.discard(name)
 
     def stop(self):
-        self.listener.stop()
\ No newline at end of file
+        self.listener.stop()
+        self.keyboard_listener.stop()
+
+    def _key_name(self, key) -> Optional[str]:
+        # Name keys before canonical(), which turns every named key but the modifiers
+        # into a bare KeyCode
+        if isinstance(key, keyboard.Key):
+            return key_name(key)
+        if getattr(key, "char", None):
+            return self.keyboard_listener.canonical(key).char
+        named = _NAMED_KEYS.get(getattr(key, "vk", None))
+        return key_name(named) if named else None
+
+    def _feed(self, chord):
+        with self._lock:
+            callbacks = self._matcher.feed(chord, time.monotonic())
+            self._schedule_expiry()
+        self._dispatch(callbacks)
+
+    def _schedule_expiry(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._matcher.pending:
+            self._timer = threading.Timer(self._matcher.timeout, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expire(self):
+        with self._lock:
+            callbacks = self._matcher.expire(time.monotonic())
+        self._dispatch(callbacks)
+
+    def _dispatch(self, callbacks: List[Callable[[], None]]):
+        for callback in callbacks:
+            self.executor.submit(self._run, callback)
+
+    @staticmethod
+    def _run(callback: Callable[[], None]):
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error running hotkey: {e}")
+            traceback.print_exc()
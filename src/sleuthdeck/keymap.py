@@ -0,0 +1,151 @@
+"""Matches keyboard and mouse input against hotkey bindings.
+
+A binding is a sequence of chords separated by spaces, where a chord is keys joined by
+``+``, e.g. ``"ctrl+shift+f5"``, ``"ctrl+k ctrl+c"`` or ``"mouse8"``. A bare number is
+a mouse button, so ``"8"`` is the same as ``"mouse8"``. Buttons 4 to 7 are the scroll
+wheel on X11 and never arrive as clicks, so they can't be bound.
+
+Bindings are kept in a trie keyed by chord, so matching an input event is one dict lookup
+however many bindings there are.
+"""
+from __future__ import annotations
+
+from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+Chord = FrozenSet[str]
+
+MODIFIER_ALIASES = {
+    "control": "ctrl",
+    "ctrl": "ctrl",
+    "alt": "alt",
+    "option": "alt",
+    "shift": "shift",
+    "super": "super",
+    "cmd": "super",
+    "win": "super",
+    "meta": "super",
+}
+MODIFIERS = frozenset(MODIFIER_ALIASES.values())
+SCROLL_BUTTONS = frozenset(f"mouse{button}" for button in range(4, 8))
+
+
+def normalize_key(name: str) -> str:
+    name = name.strip().lower()
+    if name.isdigit():
+        name = f"mouse{name}"
+    if name in SCROLL_BUTTONS:
+        raise ValueError(f"Mouse button {name[5:]} is the scroll wheel, bind a side button like mouse8")
+    return MODIFIER_ALIASES.get(name, name)
+
+
+def parse_chord(spec: str) -> Chord:
+    keys = frozenset(normalize_key(k) for k in spec.split("+") if k.strip())
+    if not keys or keys <= MODIFIERS:
+        raise ValueError(f"Hotkey {spec!r} needs a key besides modifiers")
+    return keys
+
+
+def parse_binding(spec: str) -> Tuple[Chord, ...]:
+    chords = tuple(parse_chord(chord) for chord in spec.split())
+    if not chords:
+        raise ValueError("Empty hotkey")
+    return chords
+
+
+class _Node:
+    __slots__ = ("children", "callbacks")
+
+    def __init__(self):
+        self.children: Dict[Chord, _Node] = {}
+        self.callbacks: List[Callable[[], None]] = []
+
+
+class Keymap:
+    """A set of hotkey bindings, built up front and then swapped in as a whole"""
+
+    def __init__(self):
+        self._root = _Node()
+
+    def bind(self, spec: str, callback: Callable[[], None]) -> Keymap:
+        node = self._root
+        for chord in parse_binding(spec):
+            node = node.children.setdefault(chord, _Node())
+        node.callbacks.append(callback)
+        return self
+
+    def merged(self, other: Optional[Keymap]) -> Keymap:
+        """A new keymap with the bindings of both"""
+        result = Keymap()
+        for source in (self, other):
+            if source is not None:
+                _merge(result._root, source._root)
+        return result
+
+    def __bool__(self):
+        return bool(self._root.children)
+
+
+def _merge(into: _Node, node: _Node):
+    into.callbacks.extend(node.callbacks)
+    for chord, child in node.children.items():
+        _merge(into.children.setdefault(chord, _Node()), child)
+
+
+class Matcher:
+    """Walks a keymap one chord at a time.
+
+    A chord that ends a binding with no longer bindings after it fires straight away. If
+    longer bindings share the prefix, it fires once the next chord doesn't continue them or
+    ``timeout`` seconds pass without one (see :meth:`expire`).
+    """
+
+    def __init__(self, keymap: Optional[Keymap] = None, timeout: float = 1.0):
+        self.timeout = timeout
+        self._keymap = keymap or Keymap()
+        self._node = self._keymap._root
+        self._deadline = 0.0
+
+    @property
+    def keymap(self) -> Keymap:
+        return self._keymap
+
+    @keymap.setter
+    def keymap(self, keymap: Optional[Keymap]):
+        self._keymap = keymap or Keymap()
+        self._node = self._keymap._root
+
+    @property
+    def pending(self) -> bool:
+        return self._node is not self._keymap._root
+
+    def feed(self, chord: Chord, now: float) -> List[Callable[[], None]]:
+        """Advances with the chord, returning the callbacks of any binding it completes"""
+        fired = self.expire(now)
+        root = self._keymap._root
+        child = self._node.children.get(chord)
+        if child is None and self._node is not root:
+            # Not a continuation, so whatever was pending is done and the chord starts afresh
+            fired.extend(self._node.callbacks)
+            child = root.children.get(chord)
+        if child is None:
+            self._node = root
+            return fired
+        if child.children:
+            self._node = child
+            self._deadline = now + self.timeout
+        else:
+            self._node = root
+            fired.extend(child.callbacks)
+        return fired
+
+    def expire(self, now: float) -> List[Callable[[], None]]:
+        """Ends a pending sequence whose time is up, returning its callbacks if it was a binding"""
+        if self._node is self._keymap._root or now < self._deadline:
+            return []
+        node, self._node = self._node, self._keymap._root
+        return list(node.callbacks)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+from functools import lru_cache
 from functools import partial
 from io import BytesIO
 from os import path
@@ -14,13 +15,16 @@ from PIL import ImageDraw
 from PIL import ImageFont
 from PIL.ImageColor import getrgb, getcolor
 from PIL.ImageOps import grayscale
-from cairosvg import svg2png
 
 from sleuthdeck.colors import Color
 from sleuthdeck.deck import Action
 from sleuthdeck.deck import Key, Deck
 from sleuthdeck.deck import KeyScene
-from sleuthdeck.windows import get_windows
+from sleuthdeck.processes import App
+from sleuthdeck.processes import get_supervisor
+from sleuthdeck.windows import By
+from sleuthdeck.windows import get_window_events
+from sleuthdeck.windows import Window
 from StreamDeck.ImageHelpers import PILHelper
 
 
@@ -66,54 +70,10 @@ class IconKey(Key):
         deck, image_file: str, text: Optional[str] = None, background_color: str = "black", tint: str = None,
             enabled: bool = False, inverse: bool = False
     ):
-        text_margin = 0 if not text else 14
-        margin = [text_margin, 0, 0, 0]
-        if enabled:
-            margin = [x+ENABLED_MARGIN for x in margin]
-
-        if image_file.endswith(".svg"):
-            with open(image_file, "rb") as f:
-                key_x, key_y = deck.stream_deck.key_image_format()["size"]
-                key_y -= text_margin
-                png = svg2png(file_obj=f, output_width=key_x, output_height=key_y)
-                icon = Image.open(BytesIO(png))
-                if tint:
-                    icon = image_tint(icon, tint=tint)
-        else:
-            icon = Image.open(image_file)
-
-        if inverse:
-            icon = image_inverse(icon)
-            bg = getrgb(background_color)
-            background_color = (
-                255 - bg[0],
-                255 - bg[1],
-                255 - bg[2]
-            )
-
-        image = PILHelper.create_scaled_image(
-            deck.stream_deck,
-            icon,
-            margins=margin,
-            background=background_color,
-        )
-        if text:
-            # Load a custom TrueType font and use it to overlay the key index, draw key
-            # label onto the image a few pixels from the bottom of the key.
-            draw = ImageDraw.Draw(image)
-            font = ImageFont.truetype(path.join(dirname(__file__), "assets", "Roboto-Regular.ttf"), 14)
-            draw.text(
-                (image.width / 2, margin[0] - 2),
-                text=text,
-                font=font,
-                anchor="ms",
-                fill="white",
-            )
-
-        if enabled:
-            image = ImageOps.expand(image, border=ENABLED_MARGIN, fill=getrgb(ENABLED_COLOR))
-
-        return image
+        # Keyed on the file's modification time, so an edited icon is rendered again
+        image = _render_icon(deck.stream_deck, image_file, path.getmtime(image_file), text,
+                             background_color, tint, enabled, inverse)
+        return image.copy()
 
 
 class FontAwesomeKey(IconKey):
@@ -127,19 +87,66 @@ class FontAwesomeKey(IconKey):
 async def detect_windows_toggle(
     window_title: str, on_opened: Callable[[], None], on_closed: Callable[[], None]
 ):
-    _window_open = False
-    while True:
-        windows = get_windows()
-        window_open = bool([w for w in windows if w.title == window_title])
-        if window_open and not _window_open:
+    """Calls on_opened/on_closed on this loop as the first window with the title opens and the last one closes"""
+    loop = asyncio.get_running_loop()
+    open_windows = set()
+
+    def opened(window: Window):
+        if not open_windows:
             print(f"Detected window '{window_title}' open")
-            on_opened()
-            _window_open = True
-        elif not window_open and _window_open:
+            loop.call_soon_threadsafe(on_opened)
+        open_windows.add(window.window_id)
+
+    def closed(window: Window):
+        open_windows.discard(window.window_id)
+        if not open_windows:
             print(f"Detected window '{window_title}' closed")
-            on_closed()
-            _window_open = False
-        await asyncio.sleep(1)
+            loop.call_soon_threadsafe(on_closed)
+
+    subscription = get_window_events().subscribe(
+        By.title(window_title), on_opened=opened, on_closed=closed
+    )
+    try:
+        await loop.create_future()
+    finally:
+        subscription.close()
+
+
+async def detect_app_toggle(
+    name: str, on_started: Callable[[], None], on_exited: Callable[[], None], match: Optional[str] = None
+):
+    """Calls on_started/on_exited on this loop as the app launched under the name becomes ready and exits.
+
+    With ``match``, an instance that was already running is picked up too.
+    """
+    loop = asyncio.get_running_loop()
+    supervisor = get_supervisor()
+    running = False
+
+    def changed(app: App):
+        nonlocal running
+        now_running = app.running and app.ready.is_set()
+        if now_running != running:
+            running = now_running
+            loop.call_soon_threadsafe(on_started if running else on_exited)
+
+    supervisor.on_change(name, changed)
+    try:
+        app = supervisor.app(name) or (supervisor.adopt(name, match) if match else None)
+        if app is not None:
+            changed(app)
+        await loop.create_future()
+    finally:
+        supervisor.remove_listener(name, changed)
+
+
+def draw_label(image: Image.Image, text: str, baseline: float, backdrop: Optional[str] = None):
+    """Draws the text in white across the middle of the key, optionally on a strip of ``backdrop``"""
+    draw = ImageDraw.Draw(image)
+    if backdrop:
+        draw.rectangle((0, baseline - 12, image.width, baseline + 4), fill=backdrop)
+    font = ImageFont.truetype(path.join(dirname(__file__), "assets", "Roboto-Regular.ttf"), 14)
+    draw.text((image.width / 2, baseline), text=text, font=font, anchor="ms", fill="white")
 
 
 def image_tint(src, tint='#ffffff'):
@@ -169,4 +176,51 @@ def image_inverse(src):
 
     # update image data
     src.putdata(new_image)
-    return src
\ No newline at end of file
+    return src
+
+
+@lru_cache(maxsize=512)
+def _render_icon(
+    stream_deck, image_file: str, mtime: float, text: Optional[str], background_color: str, tint: Optional[str],
+    enabled: bool, inverse: bool
+):
+    text_margin = 0 if not text else 14
+    margin = [text_margin, 0, 0, 0]
+    if enabled:
+        margin = [x+ENABLED_MARGIN for x in margin]
+
+    if image_file.endswith(".svg"):
+        from cairosvg import svg2png
+
+        with open(image_file, "rb") as f:
+            key_x, key_y = stream_deck.key_image_format()["size"]
+            key_y -= text_margin
+            png = svg2png(file_obj=f, output_width=key_x, output_height=key_y)
+            icon = Image.open(BytesIO(png))
+            if tint:
+                icon = image_tint(icon, tint=tint)
+    else:
+        icon = Image.open(image_file)
+
+    if inverse:
+        icon = image_inverse(icon)
+        bg = getrgb(background_color)
+        background_color = (
+            255 - bg[0],
+            255 - bg[1],
+            255 - bg[2]
+        )
+
+    image = PILHelper.create_scaled_image(
+        stream_deck,
+        icon,
+        margins=margin,
+        background=background_color,
+    )
+    if text:
+        draw_label(image, text, margin[0] - 2)
+
+    if enabled:
+        image = ImageOps.expand(image, border=ENABLED_MARGIN, fill=getrgb(ENABLED_COLOR))
+
+    return image
@@ -0,0 +1,23 @@
+from importlib import import_module
+from typing import Any
+from typing import Callable
+
+
+def lazy_exports(package: str, default: str = "actions", **modules: str) -> Callable[[str], Any]:
+    """A module ``__getattr__`` for a plugin package that imports its keys and actions on first use.
+
+    Names are looked up in the ``default`` submodule unless given one by keyword, e.g.
+    ``lazy_exports(__name__, AudioMeterKey="meters")``. A script can then list many plugins
+    without paying for their dependencies until it makes one of their keys or actions.
+    """
+
+    def __getattr__(name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        module = import_module(f"{package}.{modules.get(name, default)}")
+        try:
+            return getattr(module, name)
+        except AttributeError:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+
+    return __getattr__
@@ -2,40 +2,47 @@ from os import path
 from os.path import dirname
 from typing import List
 from typing import Optional
+from typing import TYPE_CHECKING
 
-from selenium import webdriver
-from selenium.webdriver.chrome.webdriver import WebDriver
 from sleuthdeck.deck import Action
 from sleuthdeck.deck import ClickType
 from sleuthdeck.deck import Key
 from sleuthdeck.deck import KeyScene
+from sleuthdeck.deck import Updatable
 from sleuthdeck.keys import IconKey
+from sleuthdeck.plugins.chrome.pool import DriverSpec
+from sleuthdeck.plugins.chrome.pool import get_pool
 
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.webdriver import WebDriver
 
-class ChromeKey(IconKey):
+
+class ChromeKey(IconKey, Updatable):
     def __init__(self, actions: List[Action] = None):
         super().__init__(
             path.join(dirname(__file__), "assets", "Google-Chrome-icon.png"),
             actions=actions,
         )
         self._driver: Optional[WebDriver] = None
+        self._spec = DriverSpec()
 
     @property
     def driver(self):
         if not self._driver:
             try:
-                print("loading chrome")
-                options = webdriver.ChromeOptions()
-                options.add_experimental_option("useAutomationExtension", False)
-                options.add_experimental_option(
-                    "excludeSwitches", ["enable-automation"]
-                )
-                print("starting)")
-                self._driver = webdriver.Chrome(chrome_options=options)
+                self._driver = get_pool().acquire(self._spec)
             except Exception as e:
                 print(f"exception: {e}")
         return self._driver
 
+    def reset_driver(self):
+        if self._driver:
+            get_pool().release(self._driver)
+        self._driver = None
+
+    async def start(self):
+        get_pool().prewarm(self._spec)
+
     def connect(self, scene: KeyScene):
         super().connect(scene)
 
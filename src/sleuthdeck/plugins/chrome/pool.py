@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+from selenium.common.exceptions import WebDriverException
+
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.webdriver import WebDriver
+
+
+@dataclass(frozen=True)
+class DriverSpec:
+    """How to start a Chrome driver. Drivers are only reused for the same spec."""
+
+    profile_dir: Optional[str] = None
+    dark_mode: bool = False
+
+
+def start_chrome(spec: DriverSpec) -> WebDriver:
+    # The webdriver takes a while to import, so it's left to the first driver started
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option("useAutomationExtension", False)
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    if spec.profile_dir:
+        options.add_argument(f"user-data-dir={spec.profile_dir}")
+    if spec.dark_mode:
+        options.add_argument("--force-dark-mode")
+    return webdriver.Chrome(options=options)
+
+
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> DriverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+        return _pool
+
+
+class DriverPool:
+    """Chrome drivers started ahead of time and reused rather than quit.
+
+    :meth:`prewarm` starts a spare in the background, :meth:`acquire` hands out a healthy
+    idle driver (or waits for the one starting), and :meth:`release` parks a driver on a
+    blank page for the next caller. Chrome only allows one browser per profile directory,
+    so a spec with a profile never has more than one driver alive; at most ``max_idle``
+    drivers are kept idle in all.
+    """
+
+    def __init__(self, max_idle: int = 2, factory: Callable[[DriverSpec], WebDriver] = start_chrome):
+        self.max_idle = max_idle
+        self._factory = factory
+        self._lock = threading.Lock()
+        # Oldest first, so the least recently used driver is the one to go when over size
+        self._idle: Deque[Tuple[DriverSpec, WebDriver]] = deque()
+        self._starting: Dict[DriverSpec, Future] = {}
+        self._in_use: Dict[int, DriverSpec] = {}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chrome-pool")
+
+    def prewarm(self, spec: DriverSpec) -> Optional[Future]:
+        """Starts a spare driver for the spec in the background, unless one is idle, starting or can't be had"""
+        with self._lock:
+            if spec in self._starting:
+                return self._starting[spec]
+            if any(s == spec for s, _ in self._idle):
+                return None
+            if spec.profile_dir and spec in self._in_use.values():
+                return None
+            if len(self._idle) + len(self._starting) >= self.max_idle:
+                return None
+            future = self._executor.submit(self._start, spec)
+            self._starting[spec] = future
+            return future
+
+    def acquire(self, spec: DriverSpec) -> WebDriver:
+        while True:
+            with self._lock:
+                driver = self._take_idle(spec)
+                starting = self._starting.get(spec) if driver is None else None
+            if driver is None and starting is not None:
+                try:
+                    starting.result()
+                except Exception as e:
+                    print(f"Unable to start Chrome in the background: {e}")
+                continue
+            if driver is None:
+                print("Starting Chrome")
+                driver = self._factory(spec)
+            elif not self._healthy(driver):
+                self._quit(driver)
+                continue
+            with self._lock:
+                self._in_use[id(driver)] = spec
+            if not spec.profile_dir:
+                # Keep a spare ready for the next caller
+                self.prewarm(spec)
+            return driver
+
+    def release(self, driver: WebDriver):
+        """Parks the driver on a blank page for reuse, or quits it if it is broken or the pool is full"""
+        with self._lock:
+            spec = self._in_use.pop(id(driver), None)
+        if spec is None:
+            return
+        try:
+            driver.get("about:blank")
+            driver.minimize_window()
+        except WebDriverException as e:
+            print(f"Discarding broken Chrome driver: {e}")
+            self._quit(driver)
+            return
+
+        evicted: List[WebDriver] = []
+        with self._lock:
+            self._idle.append((spec, driver))
+            while len(self._idle) > self.max_idle:
+                evicted.append(self._idle.popleft()[1])
+        for old in evicted:
+            self._quit(old)
+
+    def discard(self, driver: WebDriver):
+        with self._lock:
+            self._in_use.pop(id(driver), None)
+        self._quit(driver)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for _, driver in idle:
+            self._quit(driver)
+        self._executor.shutdown(wait=False)
+
+    def _start(self, spec: DriverSpec):
+        try:
+            driver = self._factory(spec)
+            driver.minimize_window()
+        except Exception:
+            with self._lock:
+                self._starting.pop(spec, None)
+            raise
+        with self._lock:
+            self._starting.pop(spec, None)
+            self._idle.append((spec, driver))
+
+    def _take_idle(self, spec: DriverSpec) -> Optional[WebDriver]:
+        for entry in self._idle:
+            if entry[0] == spec:
+                self._idle.remove(entry)
+                return entry[1]
+        return None
+
+    @staticmethod
+    def _healthy(driver: WebDriver) -> bool:
+        try:
+            driver.current_window_handle
+            # Brings a parked window back from being minimized
+            driver.set_window_position(0, 0)
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def _quit(driver: WebDriver):
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
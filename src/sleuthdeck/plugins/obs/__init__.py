@@ -1 +1,5 @@
-from .actions import *
+from sleuthdeck.plugins import lazy_exports
+
+# The keys and actions pull in the deck and GUI stack, so they are only imported when first
+# used. That keeps the client and the mock server importable on their own, e.g. in tests.
+__getattr__ = lazy_exports(__name__, AudioMeterKey="meters")
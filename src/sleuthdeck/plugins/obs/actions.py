@@ -1,147 +1,166 @@
-import base64
-import hashlib
-import json
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import traceback
 from collections import namedtuple
+from concurrent.futures import Future
 from dataclasses import dataclass
 from os import path
 from os.path import dirname
-from random import randint
 from time import sleep
 from typing import Any, Callable
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 
-import pyautogui
 from obsws_python.error import OBSSDKError
 from obsws_python.util import as_dataclass
 
 from sleuthdeck.deck import Action
 from sleuthdeck.deck import ClickType
 from sleuthdeck.deck import KeyScene
+from sleuthdeck.deck import Updatable
 from sleuthdeck.keys import IconKey
+from sleuthdeck.plugins.obs import preview
+from sleuthdeck.plugins.obs.client import ConnectionState
+from sleuthdeck.plugins.obs.client import ExecutionType
+from sleuthdeck.plugins.obs.client import ReconnectingObsClient
+from sleuthdeck.plugins.obs.group import ObsGroup
+from sleuthdeck.plugins.obs.group import ObsTarget
+from sleuthdeck.plugins.obs.group import VendorCanvasTarget
+from sleuthdeck.plugins.obs.state import ObsState
 from sleuthdeck.windows import get_window, By
 
-import websocket
-
-
-# Copied from obsws_python 1.1.1, fixed to support reconnection
-class ReconnectingObsClient:
-    DELAY = 0.001
-
-    def __init__(self, host: str, port: int, password: str):
-        self.ws = websocket.WebSocket()
-        self.host = host
-        self.port = port
-        self.password = password
-        self.subs = 0
-        self._connected = False
-
-    def connect(self):
-        if not self._connected:
-            self.ws.connect(f"ws://{self.host}:{self.port}")
-            self._authenticate(json.loads(self.ws.recv()))
-            self._connected = True
-
-    def _authenticate(self, server_hello):
-        secret = base64.b64encode(
-            hashlib.sha256(
-                (
-                        self.password + server_hello["d"]["authentication"]["salt"]
-                ).encode()
-            ).digest()
-        )
 
-        auth = base64.b64encode(
-            hashlib.sha256(
-                (
-                        secret.decode()
-                        + server_hello["d"]["authentication"]["challenge"]
-                ).encode()
-            ).digest()
-        ).decode()
-
-        payload = {
-            "op": 1,
-            "d": {
-                "rpcVersion": 1,
-                "authentication": auth,
-                "eventSubscriptions": self.subs,
-            },
-        }
-
-        self.ws.send(json.dumps(payload))
-        return self.ws.recv()
-
-    def req(self, req_type, req_data=None):
-        self.connect()
-        if req_data:
-            payload = {
-                "op": 6,
-                "d": {
-                    "requestType": req_type,
-                    "requestId": randint(1, 1000),
-                    "requestData": req_data,
-                },
-            }
-        else:
-            payload = {
-                "op": 6,
-                "d": {"requestType": req_type, "requestId": randint(1, 1000)},
-            }
-        try:
-            self.ws.send(json.dumps(payload))
-        except ConnectionError as ex:
-            print(f"Disconnected: {ex}")
-            self._connected = False
-            raise ex
-        response = json.loads(self.ws.recv())
-        return response["d"]
+@dataclass
+class _Connection:
+    client: ReconnectingObsClient
+    state: ObsState
+    screenshots: preview.ScreenshotBudget
+    meters: Any = None
+
+
+_connections: Dict[Tuple[str, int, str], _Connection] = {}
+_connections_lock = threading.Lock()
+
+
+def _connection(host: str, port: int, password: str) -> _Connection:
+    """The shared connection to the OBS instance, so a reloaded script keeps it and its state"""
+    with _connections_lock:
+        key = (host, port, password)
+        if key not in _connections:
+            client = ReconnectingObsClient(host=host, port=port, password=password)
+            _connections[key] = _Connection(client, ObsState(client), preview.ScreenshotBudget(client))
+        return _connections[key]
 
 
 class OBS:
     def __init__(self, password: str,
                  host: str = "localhost",
-                 port: int = 4444, ):
+                 port: int = 4444,
+                 warm_start: bool = True):
         if not password:
             raise ValueError("Missing password for obs")
         self._started = False
-        self.client = ReconnectingObsClient(host=host, port=port, password=password)
+        self._connection = _connection(host, port, password)
+        self.client = self._connection.client
+        self.state = self._connection.state
+        self.screenshots = self._connection.screenshots
+        self._scene_item_ids: Dict[Tuple[str, str], int] = {}
+        if warm_start:
+            # Connect while the deck starts up rather than on the first key press
+            self.client.start()
+
+    @property
+    def meters(self):
+        """Audio levels, subscribed to on first use since the events are high volume"""
+        with _connections_lock:
+            if self._connection.meters is None:
+                from sleuthdeck.plugins.obs.meters import VolumeMeters
+
+                self._connection.meters = VolumeMeters(self.client)
+            return self._connection.meters
 
     def change_scene(self, name: str):
         return ChangeScene(self, name)
 
+    def set_current_scene(self, name: str):
+        if self.state.program_scene == name:
+            return
+        self.call("SetCurrentProgramScene", {"sceneName": name})
+
     def close(self):
         return Close(self)
 
     def toggle_source(self, name: str, show: bool = None, scene: Optional[str] = None):
         return ToggleSource(self, name, show, scene=scene)
 
-    def set_scene_item_enabled(self, scene: str, name: str, enabled: bool = True):
-        resp = self.call("GetSceneItemId", {
-            "sceneName": scene,
-            "sourceName": name,
-        })
-        self.call("SetSceneItemEnabled", {
-            "sceneName": scene,
-            "sceneItemId": resp.scene_item_id,
-            "sceneItemEnabled": enabled,
-        })
+    def batch(self, execution_type: ExecutionType = ExecutionType.SERIAL_REALTIME,
+              halt_on_failure: bool = False) -> RequestBatch:
+        return RequestBatch(self, execution_type, halt_on_failure)
 
-    def stop_recording(self, vertical=False):
-        def execute(obs):
-            obs.call("StopRecord")
-            if vertical:
-                obs.call("CallVendorRequest", {"vendorName": "aitum-vertical-canvas", "requestType": "stop_recording"})
+    def scene_item_id(self, scene: str, name: str) -> int:
+        item_id = self.state.scene_item_id(scene, name)
+        if item_id is not None:
+            return item_id
+        key = (scene, name)
+        if key not in self._scene_item_ids:
+            resp = self.call("GetSceneItemId", {
+                "sceneName": scene,
+                "sourceName": name,
+            })
+            self._scene_item_ids[key] = resp.scene_item_id
+        return self._scene_item_ids[key]
 
-        return ObsAction(self, execute)
+    def scene_item_enabled(self, scene: str, name: str) -> bool:
+        enabled = self.state.scene_item_enabled(scene, name)
+        if enabled is None:
+            enabled = self.call("GetSceneItemEnabled", {
+                "sceneName": scene,
+                "sceneItemId": self.scene_item_id(scene, name),
+            }).scene_item_enabled
+        return enabled
 
+    def set_scene_item_enabled(self, scene: str, name: str, enabled: bool = True):
+        if self.state.scene_item_enabled(scene, name) == enabled:
+            return
+        try:
+            item_id = self.scene_item_id(scene, name)
+            self.call("SetSceneItemEnabled", {
+                "sceneName": scene,
+                "sceneItemId": item_id,
+                "sceneItemEnabled": enabled,
+            })
+            # The event can arrive after the response, so don't leave a quick second toggle
+            # reading the old state
+            self.state.record_scene_item_enabled(scene, item_id, enabled)
+        except OBSSDKError:
+            # The item may have been recreated with a new id, so look it up again
+            if not self.forget_scene_item_id(scene, name):
+                raise
+            self.set_scene_item_enabled(scene, name, enabled)
+
+    def forget_scene_item_id(self, scene: str, name: str) -> bool:
+        """Drops the id looked up for the item, returning whether there was one to drop"""
+        return self._scene_item_ids.pop((scene, name), None) is not None
+
+    def group(self, vertical: bool = False, others: Sequence[OBS] = ()) -> ObsGroup:
+        """This instance, plus its vertical canvas and other OBS instances, driven together"""
+        targets = [ObsTarget(self.client, f"{self.client.host}:{self.client.port}")]
+        if vertical:
+            targets.append(VendorCanvasTarget(self.client))
+        targets.extend(ObsTarget(o.client, f"{o.client.host}:{o.client.port}") for o in others)
+        return ObsGroup(*targets)
+
+    def stop_recording(self, vertical=False):
+        return ObsAction(self, lambda obs: obs.group(vertical).stop_recording())
 
     def start_recording(self, vertical=False):
-        def execute(obs):
-            obs.call("StartRecord")
-            if vertical:
-                obs.call("CallVendorRequest", {"vendorName": "aitum-vertical-canvas", "requestType": "start_recording"})
-        return ObsAction(self, execute)
+        return ObsAction(self, lambda obs: obs.group(vertical).start_recording())
 
     def set_item_property(self, name: str, property: str, value: Any):
         self.call("SetInputSettings", {"inputName": name,
@@ -162,9 +181,12 @@ class OBS:
                                               "filterSettings": kwargs})
 
     def toggle_filter(self, source_name: str, filter_name: str, enabled: bool = True):
+        if self.state.filter_enabled(source_name, filter_name) == enabled:
+            return
         self.call("SetSourceFilterEnabled", {"sourceName": source_name,
                                               "filterName": filter_name,
                                               "filterEnabled": enabled})
+        self.state.record_filter_enabled(source_name, filter_name, enabled)
 
     def call_vendor(self, vendor: str, param: str, data=None) -> Any:
         return self.call("CallVendorRequest", dict(
@@ -187,11 +209,129 @@ class OBS:
             return as_dataclass(response["requestType"], response["responseData"])
 
 
-class OBSKey(IconKey):
+class RequestBatch:
+    """Collects requests to send to OBS as one RequestBatch message.
+
+    With ``ExecutionType.SERIAL_FRAME`` every request between two sleeps is applied on the
+    same frame.
+    """
+
+    def __init__(self, obs: OBS, execution_type: ExecutionType, halt_on_failure: bool = False):
+        self.obs = obs
+        self.execution_type = execution_type
+        self.halt_on_failure = halt_on_failure
+        self.requests: List[dict] = []
+        # Index of each request that names a scene item by id -> (scene, source name)
+        self._scene_items: Dict[int, Tuple[str, str]] = {}
+
+    def call(self, request_type: str, data: Optional[dict] = None) -> RequestBatch:
+        request = {"requestType": request_type}
+        if data:
+            request["requestData"] = data
+        self.requests.append(request)
+        return self
+
+    def extend(self, requests: Sequence[dict]) -> RequestBatch:
+        """Adds requests that were built ahead of time"""
+        self.requests.extend(requests)
+        return self
+
+    def sleep(self, millis: Optional[int] = None, frames: Optional[int] = None) -> RequestBatch:
+        if self.execution_type == ExecutionType.SERIAL_FRAME:
+            return self.call("Sleep", {"sleepFrames": frames if frames is not None else 1})
+        return self.call("Sleep", {"sleepMillis": millis if millis is not None else 0})
+
+    def change_scene(self, name: str) -> RequestBatch:
+        return self.call("SetCurrentProgramScene", {"sceneName": name})
+
+    def set_scene_item_enabled(self, scene: str, name: str, enabled: bool = True) -> RequestBatch:
+        self._scene_items[len(self.requests)] = (scene, name)
+        return self.call("SetSceneItemEnabled", {
+            "sceneName": scene,
+            "sceneItemId": self.obs.scene_item_id(scene, name),
+            "sceneItemEnabled": enabled,
+        })
+
+    def set_item_property(self, name: str, property: str, value: Any) -> RequestBatch:
+        return self.call("SetInputSettings", {"inputName": name,
+                                              "inputSettings": {property: value},
+                                              "overlay": True})
+
+    def create_record_chapter(self, name: str) -> RequestBatch:
+        return self.call("CreateRecordChapter", {"chapterName": name})
+
+    def send(self) -> List[dict]:
+        """Sends the batch, returning each request's result, or raising OBSSDKError if any failed.
+
+        As with :meth:`OBS.set_scene_item_enabled`, a request that failed on a scene item id
+        which may be stale is sent again with the id looked up afresh.
+        """
+        if not self.requests:
+            return []
+        results = self.obs.client.req_batch(self.requests, self.execution_type, self.halt_on_failure)
+        stale = [
+            idx for idx, result in enumerate(results)
+            if not result["requestStatus"]["result"] and idx in self._scene_items
+            and self.obs.forget_scene_item_id(*self._scene_items[idx])
+        ]
+        if stale:
+            retries = []
+            for idx in stale:
+                request = self.requests[idx]
+                retries.append({**request, "requestData": {
+                    **request["requestData"],
+                    "sceneItemId": self.obs.scene_item_id(*self._scene_items[idx]),
+                }})
+            retried = self.obs.client.req_batch(retries, self.execution_type, self.halt_on_failure)
+            for idx, result in zip(stale, retried):
+                results[idx] = result
+        failures = [_describe_failure(r) for r in results if not r["requestStatus"]["result"]]
+        if failures:
+            raise OBSSDKError("\n".join(failures))
+        return results
+
+    def submit(self) -> Future:
+        """Sends the batch without waiting for it, printing any requests that failed once it completes"""
+        future = self.obs.client.submit(
+            self.obs.client.request_batch(list(self.requests), self.execution_type, self.halt_on_failure)
+        )
+        future.add_done_callback(_report_batch)
+        return future
+
+
+def _report_batch(future: Future):
+    try:
+        _report_failures(future.result())
+    except Exception as e:
+        print(f"Error sending batch to OBS: {e}")
+
+
+def _report_failures(results: List[dict]):
+    for result in results:
+        if not result["requestStatus"]["result"]:
+            print(_describe_failure(result))
+
+
+def _describe_failure(result: dict) -> str:
+    status = result["requestStatus"]
+    return f"Request {result['requestType']} returned code {status['code']} {status.get('comment', '')}"
+
+
+class OBSKey(IconKey, Updatable):
+    """A key with the OBS logo, or optionally a live preview of an OBS scene.
+
+    Previews refresh at ``live_fps`` while the scene is on program and ``preview_fps``
+    otherwise, and the key is only redrawn when the screenshot changes.
+    """
+
     def __init__(
             self,
             text: Optional[str] = None,
             actions: List[Action] = None,
+            obs: Optional[OBS] = None,
+            preview_scene: Optional[str] = None,
+            preview_fps: float = 0.5,
+            live_fps: float = 5,
             **kwargs,
     ):
         super().__init__(
@@ -200,6 +340,65 @@ class OBSKey(IconKey):
             text=text,
             **kwargs,
         )
+        if preview_scene and not obs:
+            raise ValueError("A preview scene needs an OBS instance")
+        self.obs = obs
+        self.text = text
+        self.preview_scene = preview_scene
+        self.preview_fps = preview_fps
+        self.live_fps = live_fps
+
+    async def start(self):
+        if not self.preview_scene:
+            return
+
+        loop = asyncio.get_running_loop()
+        stream_deck = self._scene.deck.stream_deck
+        width, height = stream_deck.key_image_format()["size"]
+        last_frame = None
+        while True:
+            started = loop.time()
+            frame = await self.obs.screenshots.take(self.preview_scene, width, height)
+            if frame and frame != last_frame:
+                last_frame = frame
+                native = await preview.decode_frame(stream_deck, frame, self.text)
+                self._scene.update_native_image(self, native)
+
+            live = self.obs.state.program_scene == self.preview_scene
+            interval = 1 / (self.live_fps if live else self.preview_fps)
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+
+class ObsStatusKey(OBSKey):
+    """Shows whether the OBS connection is up, with a border while connected"""
+
+    LABELS = {
+        ConnectionState.CONNECTED: "Online",
+        ConnectionState.CONNECTING: "Connecting",
+        ConnectionState.DISCONNECTED: "Offline",
+    }
+
+    def __init__(self, obs: OBS, actions: List[Action] = None, **kwargs):
+        super().__init__(text=self.LABELS[obs.client.state], actions=actions, **kwargs)
+        self.obs = obs
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+
+        def changed(state: ConnectionState):
+            loop.call_soon_threadsafe(self._on_state_change, state)
+
+        # The client outlives hot reloads, so the listener goes when the key stops updating
+        self.obs.client.on_state_change(changed)
+        try:
+            self._on_state_change(self.obs.client.state)
+            await super().start()
+            await loop.create_future()
+        finally:
+            self.obs.client.remove_state_listener(changed)
+
+    def _on_state_change(self, state: ConnectionState):
+        self.update_icon(text=self.LABELS[state], enabled=state == ConnectionState.CONNECTED)
 
 
 class Close(Action):
@@ -222,7 +421,7 @@ class ChangeScene(Action):
         self.obs = obs
 
     def __call__(self, scene: KeyScene, key: OBSKey, click: ClickType):
-        self.obs.call("SetCurrentProgramScene", {"sceneName": self.name})
+        self.obs.set_current_scene(self.name)
 
 
 class ObsAction(Action):
@@ -243,14 +442,7 @@ class ToggleSource(Action):
 
     def __call__(self, scene: KeyScene, key: OBSKey, click: ClickType):
         if self._show is None:
-            resp = self.call("GetSceneItemId", {
-                "sceneName": scene,
-                "sourceName": self.name,
-            })
-            visible = self.obs.call("GetSceneItemEnabled", {
-                "sceneName": self.scene,
-                "sceneItemId": resp.scene_item_id,
-            }).sceneItemEnabled
+            visible = not self.obs.scene_item_enabled(self.scene, self.name)
         else:
             visible = self._show
 
@@ -267,41 +459,167 @@ class Crop:
     right: int
 
 
+@dataclass
+class Geometry:
+    x: int
+    y: int
+    width: int
+    height: int
+
+
 class ZoomToMouse(Action):
-    def __init__(self, obs: OBS, scene: str, move_filter_name: str, source_crop: Crop):
+    """Pans a move filter so the zoomed source is centred on the mouse.
+
+    By default each press pans once. With ``follow``, a press starts following the pointer
+    at ``rate`` samples a second and the next press stops, turning the filter off again, as
+    does losing OBS or the pointer. Movement within ``dead_zone``
+    pixels is ignored, panning is eased by ``smoothing`` (1 jumps straight to the pointer),
+    and only one filter update is in flight at a time, so a slow OBS drops samples rather
+    than queueing them. A long press steps through ``zoom_levels``.
+    """
+
+    def __init__(self, obs: OBS, scene: str, move_filter_name: str, source_crop: Crop,
+                 follow: bool = False,
+                 rate: float = 30,
+                 zoom_levels: Sequence[float] = (1.0,),
+                 viewport: Tuple[int, int] = (1920, 1080),
+                 monitor: Optional[Geometry] = None,
+                 smoothing: float = 0.3,
+                 dead_zone: int = 20):
         self.obs = obs
         self.scene = scene
         self.move_filter_name = move_filter_name
         self.crop = source_crop
+        self.follow = follow
+        self.rate = rate
+        self.zoom_levels = list(zoom_levels)
+        self.viewport = viewport
+        self.monitor = monitor
+        self.smoothing = smoothing
+        self.dead_zone = dead_zone
+        self._zoom_idx = 0
+        self._following: Optional[threading.Event] = None
+        self._display = None
+
+    @property
+    def zoom_factor(self) -> float:
+        return self.zoom_levels[self._zoom_idx]
 
     def __call__(self, scene: KeyScene, key: OBSKey, click: ClickType):
-        import gi
-        gi.require_version("Gdk", "3.0")
-        from gi.repository import Gdk
-
-        gdkdsp = Gdk.Display.get_default()
-
-        screen, x, y, _ = gdkdsp.get_pointer()
-        monitor = gdkdsp.get_monitor_at_point(x, y)
-        geo = monitor.get_geometry()
-        # print(f"pointer: x:{x - geo.x} y:{y - geo.y}")
-
-        viewport_width = 1920
-        viewport_height = 1080
-        zoom_factor = 1.0
-
+        if click == ClickType.LONG_PRESS:
+            self._zoom_idx = (self._zoom_idx + 1) % len(self.zoom_levels)
+            print(f"Zoom level {self.zoom_factor}")
+            if self._following:
+                return
+        elif self.follow:
+            if self._following:
+                self._following.set()
+                self._following = None
+            else:
+                self._following = threading.Event()
+                threading.Thread(target=self._follow, args=(self._following,), daemon=True).start()
+            return
+
+        x, y = self._position(*self._pointer())
+        batch = self.obs.batch()
+        batch.call("SetSourceFilterSettings", self._filter_settings(x, y))
+        batch.call("SetSourceFilterEnabled", {"sourceName": self.scene,
+                                              "filterName": self.move_filter_name,
+                                              "filterEnabled": True})
+        batch.send()
+
+    def _follow(self, stopped: threading.Event):
+        try:
+            self._follow_pointer(stopped)
+        except Exception as e:
+            print(f"Stopped following the mouse: {e}")
+            traceback.print_exc()
+        finally:
+            if self._following is stopped:
+                self._following = None
+            # Unless another press has already started following again
+            if self._following is None:
+                try:
+                    self.obs.toggle_filter(self.scene, self.move_filter_name, False)
+                except Exception as e:
+                    print(f"Unable to turn off {self.move_filter_name}: {e}")
+
+    def _follow_pointer(self, stopped: threading.Event):
+        self.obs.toggle_filter(self.scene, self.move_filter_name, True)
+        frame_time = 1 / self.rate
+        next_frame = time.monotonic()
+        anchor = self._pointer()
+        zoom = self.zoom_factor
+        current = target = self._position(*anchor)
+        sent = None
+        in_flight: Optional[Future] = None
+
+        while not stopped.is_set():
+            if in_flight is not None and in_flight.done():
+                # Raises if OBS went away, which ends following, as does a failed update
+                response = in_flight.result()
+                if not response["requestStatus"]["result"]:
+                    raise OBSSDKError(_describe_failure(response))
+                in_flight = None
+
+            pointer = self._pointer()
+            moved = abs(pointer[0] - anchor[0]) > self.dead_zone or abs(pointer[1] - anchor[1]) > self.dead_zone
+            # A long press changes the zoom level while following, which moves the target too
+            if moved or self.zoom_factor != zoom:
+                anchor = pointer
+                zoom = self.zoom_factor
+                target = self._position(*pointer)
+            current = (current[0] + (target[0] - current[0]) * self.smoothing,
+                       current[1] + (target[1] - current[1]) * self.smoothing)
+            position = (round(current[0]), round(current[1]))
+
+            if (position, zoom) != sent and in_flight is None:
+                in_flight = self.obs.client.req_future("SetSourceFilterSettings",
+                                                       self._filter_settings(*position))
+                sent = (position, zoom)
+
+            next_frame += frame_time
+            sleep_interval = next_frame - time.monotonic()
+            if sleep_interval >= 0:
+                stopped.wait(sleep_interval)
+            else:
+                # Fell behind, so skip the missed frames rather than bunching them up
+                next_frame = time.monotonic()
+
+    def _pointer(self) -> Tuple[int, int]:
+        if self._display is None:
+            import gi
+            gi.require_version("Gdk", "3.0")
+            from gi.repository import Gdk
+
+            self._display = Gdk.Display.get_default()
+
+        _, x, y, _ = self._display.get_pointer()
+        return x, y
+
+    def _geometry(self, x: int, y: int) -> Geometry:
+        if self.monitor:
+            return self.monitor
+        geo = self._display.get_monitor_at_point(x, y).get_geometry()
+        return Geometry(geo.x, geo.y, geo.width, geo.height)
+
+    def _position(self, x: int, y: int) -> Tuple[float, float]:
+        geo = self._geometry(x, y)
+        viewport_width, viewport_height = self.viewport
+        zoom_factor = self.zoom_factor
         mouse_pos = namedtuple("Point", "x y")(x - geo.x, y - geo.y)
 
-        # settings = self.obs.get_filter_settings(self.scene, self.move_filter_name)
-        # print(f"settings: {settings}, crop: {settings.filter_settings['crop']}")
-
         new_y = max(min(0, ((mouse_pos.y - self.crop.top) * zoom_factor - (viewport_height / 2)) * -1), (geo.height - viewport_height - (self.crop.bottom + self.crop.top)) * -1)
         new_x = max(min(0, ((mouse_pos.x - self.crop.left) * zoom_factor - (viewport_width / 2)) * -1), (geo.width - viewport_width - (self.crop.left + self.crop.right)) * -1)
-
-        self.obs.set_filter_properties(self.scene, self.move_filter_name,
-                                     pos={"x": new_x, "x_sign": "", "y": new_y, "y_sign": ""},
-                                    scale = {"x": zoom_factor, "x_sign": "", "y": zoom_factor, "y_sign": ""})
-        self.obs.toggle_filter(self.scene, self.move_filter_name, True)
+        return new_x, new_y
+
+    def _filter_settings(self, x: float, y: float) -> dict:
+        return {"sourceName": self.scene,
+                "filterName": self.move_filter_name,
+                "filterSettings": {
+                    "pos": {"x": x, "x_sign": "", "y": y, "y_sign": ""},
+                    "scale": {"x": self.zoom_factor, "x_sign": "", "y": self.zoom_factor, "y_sign": ""},
+                }}
 
 
 class EnableFilter(Action):
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import random
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from enum import auto
+from enum import Enum
+from enum import IntEnum
+from enum import IntFlag
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from websockets.asyncio.client import ClientConnection
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+
+class EventSubscription(IntFlag):
+    NONE = 0
+    GENERAL = 1 << 0
+    CONFIG = 1 << 1
+    SCENES = 1 << 2
+    INPUTS = 1 << 3
+    TRANSITIONS = 1 << 4
+    FILTERS = 1 << 5
+    OUTPUTS = 1 << 6
+    SCENE_ITEMS = 1 << 7
+    MEDIA_INPUTS = 1 << 8
+    VENDORS = 1 << 9
+    UI = 1 << 10
+    ALL = (1 << 11) - 1
+    INPUT_VOLUME_METERS = 1 << 16
+    INPUT_ACTIVE_STATE_CHANGED = 1 << 17
+    INPUT_SHOW_STATE_CHANGED = 1 << 18
+    SCENE_ITEM_TRANSFORM_CHANGED = 1 << 19
+
+
+class ExecutionType(IntEnum):
+    NONE = -1
+    SERIAL_REALTIME = 0
+    SERIAL_FRAME = 1
+    PARALLEL = 2
+
+
+class ConnectionState(Enum):
+    DISCONNECTED = auto()
+    CONNECTING = auto()
+    CONNECTED = auto()
+
+
+EventCallback = Callable[[Dict[str, Any]], None]
+StateCallback = Callable[[ConnectionState], None]
+
+
+def is_idempotent(request_type: str) -> bool:
+    """Whether sending the request twice has the same effect as sending it once"""
+    return request_type.startswith(("Get", "Set")) or request_type == "Sleep"
+
+
+class ReconnectingObsClient:
+    """An obs-websocket v5 client that keeps many requests in flight on one connection.
+
+    The connection lives on its own asyncio loop thread. Each request gets a unique id and
+    a future in the pending table, and a background reader resolves those futures as
+    responses arrive and hands events to their subscribers, so replies can't get crossed
+    between callers.
+
+    Once :meth:`start` is called the client connects in the background and stays connected:
+    websocket pings detect dead sockets, reconnects back off with jitter, requests made while
+    reconnecting wait for the connection, and idempotent requests that were in flight when
+    it dropped are replayed. Without it, the first request connects and a drop fails the
+    pending requests.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        subscriptions: EventSubscription = EventSubscription.ALL,
+        timeout: float = 10,
+        heartbeat: float = 5,
+        reconnect_wait: float = 5,
+        min_backoff: float = 0.5,
+        max_backoff: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.subs = subscriptions
+        self.timeout = timeout
+        self.heartbeat = heartbeat
+        self.reconnect_wait = reconnect_wait
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.state = ConnectionState.DISCONNECTED
+        self.interactive_requests = 0
+        # Set whenever no interactive request is in flight, only touched on the loop thread
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._maintaining = False
+        self._connected = asyncio.Event()
+        self._reader: Optional[asyncio.Task] = None
+        self._state_callbacks: List[StateCallback] = []
+        self._ids = itertools.count(1)
+        self._ws: Optional[ClientConnection] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._event_callbacks: Dict[str, List[EventCallback]] = defaultdict(list)
+        self._connect_callbacks: List[Callable[[], Awaitable]] = []
+        self._loop = asyncio.new_event_loop()
+        self._connecting: Optional[asyncio.Lock] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    def connect(self):
+        self.submit(self.connect_async()).result(timeout=self.timeout)
+
+    def start(self):
+        """Connects in the background now and reconnects whenever the connection drops"""
+        if not self._maintaining:
+            self._maintaining = True
+            self.submit(self._maintain())
+
+    def stop(self):
+        self._maintaining = False
+        if self._ws is not None:
+            self.submit(self._ws.close())
+
+    def req(self, req_type: str, req_data: Optional[dict] = None) -> dict:
+        """Sends a request and blocks for its response"""
+        return self.req_future(req_type, req_data).result(timeout=self.timeout)
+
+    def req_future(self, req_type: str, req_data: Optional[dict] = None) -> Future:
+        """Sends a request without waiting, returning a future for the response"""
+        return self.submit(self.request(req_type, req_data))
+
+    def submit(self, awaitable: Awaitable) -> Future:
+        return asyncio.run_coroutine_threadsafe(awaitable, self._loop)
+
+    def on(self, event_type: str, callback: EventCallback):
+        """Calls back with the event data for each event of the type, on the client's loop thread"""
+        self._event_callbacks[event_type].append(callback)
+
+    def on_connect(self, callback: Callable[[], Awaitable]):
+        """Runs the coroutine function on the client's loop after each (re)connection"""
+        self._connect_callbacks.append(callback)
+
+    def remove_connect_listener(self, callback: Callable[[], Awaitable]):
+        if callback in self._connect_callbacks:
+            self._connect_callbacks.remove(callback)
+
+    def add_subscriptions(self, subscriptions: EventSubscription):
+        """Adds event categories, re-identifying the live connection so they apply straight away"""
+        if self.subs & subscriptions == subscriptions:
+            return
+        self.subs |= subscriptions
+        self.submit(self._reidentify())
+
+    async def _reidentify(self):
+        if self._ws is not None:
+            await self._ws.send(json.dumps({"op": 3, "d": {"eventSubscriptions": int(self.subs)}}))
+
+    def on_state_change(self, callback: StateCallback):
+        """Calls back with the new connection state on each change, on the client's loop thread"""
+        self._state_callbacks.append(callback)
+
+    def remove_state_listener(self, callback: StateCallback):
+        if callback in self._state_callbacks:
+            self._state_callbacks.remove(callback)
+
+    def remove_listener(self, event_type: str, callback: EventCallback):
+        callbacks = self._event_callbacks.get(event_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    async def connect_async(self):
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self._ws is not None:
+                return
+            self._set_state(ConnectionState.CONNECTING)
+            try:
+                ws = await connect(
+                    f"ws://{self.host}:{self.port}",
+                    max_size=2**24,
+                    compression=None,
+                    ping_interval=self.heartbeat,
+                    ping_timeout=self.heartbeat,
+                    open_timeout=self.timeout,
+                )
+                try:
+                    await self._identify(ws, json.loads(await ws.recv()))
+                except Exception:
+                    await ws.close()
+                    raise
+            except Exception:
+                self._set_state(ConnectionState.DISCONNECTED)
+                raise
+            self._ws = ws
+            self._reader = self._loop.create_task(self._read(ws))
+            self._connected.set()
+            self._set_state(ConnectionState.CONNECTED)
+        for callback in self._connect_callbacks:
+            self._loop.create_task(self._run_connect_callback(callback))
+
+    @staticmethod
+    async def _run_connect_callback(callback: Callable[[], Awaitable]):
+        try:
+            await callback()
+        except Exception as e:
+            print(f"Error running OBS connect callback: {e}")
+
+    async def request(self, req_type: str, req_data: Optional[dict] = None, background: bool = False) -> dict:
+        """Sends a request, counting it as interactive unless it is marked as background work"""
+        d = {"requestType": req_type}
+        if req_data:
+            d["requestData"] = req_data
+        if background:
+            return await self._send(6, d, is_idempotent(req_type))
+        self._begin_interactive()
+        try:
+            return await self._send(6, d, is_idempotent(req_type))
+        finally:
+            self._end_interactive()
+
+    async def wait_idle(self):
+        """Waits until no interactive request is in flight, to be run on the client's loop"""
+        while self.interactive_requests:
+            await self._idle.wait()
+
+    def req_batch(
+        self,
+        requests: List[dict],
+        execution_type: ExecutionType = ExecutionType.SERIAL_REALTIME,
+        halt_on_failure: bool = False,
+    ) -> List[dict]:
+        """Sends the requests as one RequestBatch and blocks for their results"""
+        return self.submit(
+            self.request_batch(requests, execution_type, halt_on_failure)
+        ).result(timeout=self.timeout)
+
+    async def request_batch(
+        self,
+        requests: List[dict],
+        execution_type: ExecutionType = ExecutionType.SERIAL_REALTIME,
+        halt_on_failure: bool = False,
+    ) -> List[dict]:
+        self._begin_interactive()
+        try:
+            d = await self._send(
+                8,
+                {
+                    "haltOnFailure": halt_on_failure,
+                    "executionType": int(execution_type),
+                    "requests": requests,
+                },
+                all(is_idempotent(r["requestType"]) for r in requests),
+            )
+        finally:
+            self._end_interactive()
+        return d["results"]
+
+    def _begin_interactive(self):
+        self.interactive_requests += 1
+        self._idle.clear()
+
+    def _end_interactive(self):
+        self.interactive_requests -= 1
+        if not self.interactive_requests:
+            self._idle.set()
+
+    async def _maintain(self):
+        attempt = 0
+        while self._maintaining:
+            try:
+                await self.connect_async()
+                attempt = 0
+                await self._reader
+            except Exception as e:
+                delay = min(self.max_backoff, self.min_backoff * 2**attempt)
+                delay *= random.uniform(0.5, 1.5)
+                attempt += 1
+                print(f"Unable to connect to OBS ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _connection(self) -> ClientConnection:
+        if not self._maintaining:
+            await self.connect_async()
+        elif self._ws is None:
+            try:
+                await asyncio.wait_for(self._connected.wait(), self.reconnect_wait)
+            except asyncio.TimeoutError:
+                raise ConnectionError("Not connected to OBS")
+        return self._ws
+
+    async def _send(self, op: int, d: dict, idempotent: bool) -> dict:
+        replayed = False
+        while True:
+            ws = await self._connection()
+            request_id = str(next(self._ids))
+            d["requestId"] = request_id
+            future = self._loop.create_future()
+            self._pending[request_id] = future
+            try:
+                await ws.send(json.dumps({"op": op, "d": d}))
+                return await future
+            except (ConnectionClosed, ConnectionError, AttributeError) as ex:
+                self._pending.pop(request_id, None)
+                if replayed or not idempotent or not self._maintaining:
+                    print(f"Disconnected: {ex}")
+                    raise ConnectionError(f"Disconnected from OBS: {ex}") from ex
+                print(f"Disconnected, replaying request once reconnected: {ex}")
+                replayed = True
+
+    def _set_state(self, state: ConnectionState):
+        if self.state == state:
+            return
+        self.state = state
+        for callback in list(self._state_callbacks):
+            try:
+                callback(state)
+            except Exception as e:
+                print(f"Error handling OBS connection state {state}: {e}")
+
+    async def _identify(self, ws: ClientConnection, server_hello: dict):
+        d = {"rpcVersion": 1, "eventSubscriptions": int(self.subs)}
+        if "authentication" in server_hello["d"]:
+            d["authentication"] = self._auth(server_hello["d"]["authentication"])
+        await ws.send(json.dumps({"op": 1, "d": d}))
+        identified = json.loads(await ws.recv())
+        if identified["op"] != 2:
+            raise ConnectionError(f"OBS refused identification: {identified}")
+
+    def _auth(self, authentication: dict) -> str:
+        secret = base64.b64encode(
+            hashlib.sha256(
+                (self.password + authentication["salt"]).encode()
+            ).digest()
+        )
+        return base64.b64encode(
+            hashlib.sha256(
+                (secret.decode() + authentication["challenge"]).encode()
+            ).digest()
+        ).decode()
+
+    async def _read(self, ws: ClientConnection):
+        try:
+            async for message in ws:
+                try:
+                    data = json.loads(message)
+                    op, d = data["op"], data["d"]
+                    if op in (7, 9):
+                        future = self._pending.pop(d["requestId"], None)
+                        if future and not future.done():
+                            future.set_result(d)
+                    elif op == 5:
+                        self._dispatch(d["eventType"], d.get("eventData", {}))
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Ignoring malformed message from OBS ({e!r}): {message[:200]!r}")
+        except ConnectionClosed as ex:
+            print(f"Disconnected: {ex}")
+        finally:
+            if self._ws is ws:
+                self._ws = None
+                self._connected.clear()
+                self._set_state(ConnectionState.DISCONNECTED)
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Disconnected from OBS"))
+            # Whatever ended the reader, don't leave the socket open behind a reconnect
+            await ws.close()
+
+    def _dispatch(self, event_type: str, event_data: dict):
+        for callback in list(self._event_callbacks.get(event_type, [])):
+            try:
+                callback(event_data)
+            except Exception as e:
+                print(f"Error handling OBS event {event_type}: {e}")
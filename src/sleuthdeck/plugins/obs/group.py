@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+from abc import ABC
+from abc import abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from sleuthdeck.plugins.obs.client import ReconnectingObsClient
+
+VERTICAL_CANVAS = "aitum-vertical-canvas"
+
+# A request type and its data
+Request = Tuple[str, Optional[dict]]
+
+
+class Target(ABC):
+    """Something a logical OBS operation can be sent to, like an OBS instance or a vendor canvas"""
+
+    def __init__(self, client: ReconnectingObsClient, name: str):
+        self.client = client
+        self.name = name
+
+    @abstractmethod
+    def start_recording(self) -> Request:
+        pass
+
+    @abstractmethod
+    def stop_recording(self) -> Request:
+        pass
+
+    @abstractmethod
+    def change_scene(self, name: str) -> Request:
+        pass
+
+
+class ObsTarget(Target):
+    """The main canvas of an OBS instance"""
+
+    def start_recording(self) -> Request:
+        return "StartRecord", None
+
+    def stop_recording(self) -> Request:
+        return "StopRecord", None
+
+    def change_scene(self, name: str) -> Request:
+        return "SetCurrentProgramScene", {"sceneName": name}
+
+
+class VendorCanvasTarget(Target):
+    """An extra canvas driven through vendor requests, like the Aitum vertical canvas"""
+
+    def __init__(self, client: ReconnectingObsClient, name: str = "vertical", vendor: str = VERTICAL_CANVAS):
+        super().__init__(client, name)
+        self.vendor = vendor
+
+    def start_recording(self) -> Request:
+        return self._vendor("start_recording")
+
+    def stop_recording(self) -> Request:
+        return self._vendor("stop_recording")
+
+    def change_scene(self, name: str) -> Request:
+        return self._vendor("switch_scene", {"scene": name})
+
+    def _vendor(self, request_type: str, data: Optional[dict] = None) -> Request:
+        request = {"vendorName": self.vendor, "requestType": request_type}
+        if data:
+            request["requestData"] = data
+        return "CallVendorRequest", request
+
+
+@dataclass
+class TargetResult:
+    target: str
+    ok: bool
+    # When the request was sent and when its response arrived, from time.monotonic()
+    sent: float
+    completed: float
+    error: Optional[str] = None
+    response: Optional[dict] = None
+
+    @property
+    def duration(self) -> float:
+        return self.completed - self.sent
+
+
+@dataclass
+class GroupResult:
+    operation: str
+    results: List[TargetResult]
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results)
+
+    @property
+    def skew(self) -> float:
+        """Seconds between the first and last target to apply the operation"""
+        completed = [r.completed for r in self.results if r.ok]
+        return max(completed) - min(completed) if completed else 0.0
+
+    def __str__(self) -> str:
+        parts = [
+            f"{r.target} {'ok' if r.ok else 'failed: ' + str(r.error)} in {r.duration * 1000:.0f}ms"
+            for r in self.results
+        ]
+        return f"{self.operation}: {', '.join(parts)} (skew {self.skew * 1000:.1f}ms)"
+
+
+class ObsGroup:
+    """Sends the same logical operation to several targets at once.
+
+    Every request is put on the wire before any response is awaited, so targets on the
+    same connection go out back to back and separate OBS instances are driven in parallel.
+    A failing target doesn't stop the others; each target's outcome is reported.
+    """
+
+    def __init__(self, *targets: Target, timeout: float = 10):
+        if not targets:
+            raise ValueError("An OBS group needs at least one target")
+        self.targets = list(targets)
+        self.timeout = timeout
+
+    def start_recording(self) -> GroupResult:
+        return self.run("start_recording", lambda t: t.start_recording())
+
+    def stop_recording(self) -> GroupResult:
+        return self.run("stop_recording", lambda t: t.stop_recording())
+
+    def set_current_scene(self, name: str) -> GroupResult:
+        return self.run(f"change_scene {name}", lambda t: t.change_scene(name))
+
+    def run(self, operation: str, request: Callable[[Target], Request]) -> GroupResult:
+        requests = [request(target) for target in self.targets]
+        pending: List[Tuple[Target, float, Future]] = []
+        for target, (request_type, data) in zip(self.targets, requests):
+            pending.append((target, time.monotonic(), target.client.submit(_timed(target.client, request_type, data))))
+
+        results = []
+        for target, sent, future in pending:
+            try:
+                response, completed = future.result(timeout=self.timeout)
+            except Exception as e:
+                results.append(TargetResult(target.name, False, sent, time.monotonic(), error=str(e) or repr(e)))
+                continue
+            status = response["requestStatus"]
+            error = None if status["result"] else f"code {status['code']} {status.get('comment', '')}".strip()
+            results.append(TargetResult(target.name, status["result"], sent, completed, error, response))
+
+        result = GroupResult(operation, results)
+        print(result)
+        return result
+
+
+async def _timed(client: ReconnectingObsClient, request_type: str, data: Optional[dict]) -> Tuple[dict, float]:
+    response = await client.request(request_type, data)
+    return response, time.monotonic()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from PIL import Image
+from PIL import ImageDraw
+from StreamDeck.ImageHelpers import PILHelper
+
+from sleuthdeck.deck import Key
+from sleuthdeck.deck import KeyScene
+from sleuthdeck.deck import Updatable
+from sleuthdeck.keys import draw_label
+from sleuthdeck.plugins.obs.client import EventSubscription
+from sleuthdeck.plugins.obs.client import ReconnectingObsClient
+
+# Levels below this are drawn as silence
+FLOOR_DB = -60.0
+
+_sprites: Dict[Tuple, List[bytes]] = {}
+_sprites_lock = threading.Lock()
+
+
+class VolumeMeters:
+    """Latest audio levels for the inputs that have meter keys.
+
+    Subscribes to OBS's high-volume InputVolumeMeters events, which arrive about 20 times a
+    second for every input. Each event only stores a number per watched input; keys read
+    them at their own display rate.
+    """
+
+    def __init__(self, client: ReconnectingObsClient):
+        self._levels: Dict[str, float] = {}
+        client.on("InputVolumeMeters", self._on_meters)
+        client.add_subscriptions(EventSubscription.INPUT_VOLUME_METERS)
+
+    def watch(self, input_name: str):
+        self._levels.setdefault(input_name, 0.0)
+
+    def level(self, input_name: str) -> float:
+        """The input's peak level from 0 (silent) to 1 (0 dB)"""
+        return self._levels.get(input_name, 0.0)
+
+    def _on_meters(self, data: dict):
+        levels = self._levels
+        for meter in data["inputs"]:
+            name = meter["inputName"]
+            if name not in levels:
+                continue
+            peak = max((channel[1] for channel in meter["inputLevelsMul"]), default=0.0)
+            db = 20 * math.log10(peak) if peak > 0 else FLOOR_DB
+            levels[name] = min(1.0, max(0.0, 1 - db / FLOOR_DB))
+
+
+class AudioMeterKey(Key, Updatable):
+    """Shows an OBS input's live audio level as a bar.
+
+    The bar is picked from ``steps`` sprites rendered once per deck, and the key is only
+    written when the level moves to a different sprite, at most ``fps`` times a second.
+    """
+
+    def __init__(self, obs, input_name: str, text: Optional[str] = None, fps: float = 15,
+                 steps: int = 12, **kwargs):
+        super().__init__(**kwargs)
+        self.obs = obs
+        self.input_name = input_name
+        self.text = text if text is not None else input_name
+        self.fps = fps
+        self.steps = steps
+        self._scene: Optional[KeyScene] = None
+
+    def connect(self, scene: KeyScene):
+        self._scene = scene
+        self.obs.meters.watch(self.input_name)
+
+    async def start(self):
+        stream_deck = self._scene.deck.stream_deck
+        loop = asyncio.get_running_loop()
+        sprites = await loop.run_in_executor(None, level_sprites, stream_deck, self.text, self.steps)
+        shown = None
+        while True:
+            step = round(self.obs.meters.level(self.input_name) * (self.steps - 1))
+            if step != shown:
+                shown = step
+                self._scene.update_native_image(self, sprites[step])
+            await asyncio.sleep(1 / self.fps)
+
+
+def level_sprites(stream_deck, text: str, steps: int) -> List[bytes]:
+    """Renders, or returns the already rendered, native key images for each level step"""
+    key = (stream_deck.id(), text, steps)
+    with _sprites_lock:
+        if key not in _sprites:
+            _sprites[key] = [_render_level(stream_deck, text, step / (steps - 1)) for step in range(steps)]
+        return _sprites[key]
+
+
+def _render_level(stream_deck, text: str, level: float) -> bytes:
+    image = PILHelper.create_image(stream_deck)
+    draw = ImageDraw.Draw(image)
+    text_margin = 16 if text else 0
+    top, bottom = text_margin + 2, image.height - 4
+    left, right = image.width // 3, image.width * 2 // 3
+    draw.rectangle((left, top, right, bottom), outline="gray")
+    bar_top = bottom - round((bottom - top) * level)
+    if level > 0:
+        color = "red" if level > 0.9 else "yellow" if level > 0.7 else "green"
+        draw.rectangle((left + 1, bar_top, right - 1, bottom - 1), fill=color)
+    if text:
+        draw_label(image, text, 12)
+    return PILHelper.to_native_key_format(stream_deck, image)
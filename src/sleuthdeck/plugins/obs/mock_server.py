@@ -0,0 +1,461 @@
+"""A local stand-in for OBS's obs-websocket v5 server, for tests and load benchmarks.
+
+It implements the handshake (with optional authentication), the requests this project
+sends, request batches and events, over a small in-memory model of scenes, inputs and
+filters. Latency, dropped connections and a timeline of handled requests make it possible
+to measure clients without a running OBS::
+
+    with MockObsServer(password="secret", latency=0.01) as server:
+        client = ReconnectingObsClient("127.0.0.1", server.port, "secret")
+        client.req("SetCurrentProgramScene", {"sceneName": "Me full"})
+        print(server.timeline)
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+from websockets.asyncio.server import serve
+from websockets.asyncio.server import ServerConnection
+from websockets.exceptions import ConnectionClosed
+
+from sleuthdeck.plugins.obs.client import EventSubscription
+
+# Request status codes from the obs-websocket protocol
+SUCCESS = 100
+MISSING_REQUEST_FIELD = 300
+RESOURCE_NOT_FOUND = 600
+UNKNOWN_REQUEST_TYPE = 204
+
+EVENT_CATEGORIES = {
+    "CurrentProgramSceneChanged": EventSubscription.SCENES,
+    "CurrentPreviewSceneChanged": EventSubscription.SCENES,
+    "SceneListChanged": EventSubscription.SCENES,
+    "SceneItemEnableStateChanged": EventSubscription.SCENE_ITEMS,
+    "SourceFilterEnableStateChanged": EventSubscription.FILTERS,
+    "RecordStateChanged": EventSubscription.OUTPUTS,
+    "InputVolumeMeters": EventSubscription.INPUT_VOLUME_METERS,
+}
+
+
+class RequestFailed(Exception):
+    def __init__(self, code: int, comment: str):
+        super().__init__(comment)
+        self.code = code
+        self.comment = comment
+
+
+@dataclass
+class TimelineEntry:
+    request_type: str
+    request_id: str
+    received: float
+    responded: float = 0.0
+    success: bool = True
+    batch_id: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.responded - self.received
+
+
+@dataclass
+class SceneItem:
+    id: int
+    source: str
+    enabled: bool = True
+
+
+@dataclass
+class MockObsState:
+    scenes: Dict[str, List[SceneItem]] = field(default_factory=dict)
+    program_scene: Optional[str] = None
+    preview_scene: Optional[str] = None
+    inputs: Dict[str, dict] = field(default_factory=dict)
+    filters: Dict[Tuple[str, str], dict] = field(default_factory=dict)
+    recording: bool = False
+    chapters: List[str] = field(default_factory=list)
+    vendor_requests: List[dict] = field(default_factory=list)
+
+    def add_scene(self, name: str, *sources: str):
+        items = self.scenes.setdefault(name, [])
+        next_id = max((i.id for items in self.scenes.values() for i in items), default=0) + 1
+        for offset, source in enumerate(sources):
+            items.append(SceneItem(next_id + offset, source))
+            self.inputs.setdefault(source, {})
+        if self.program_scene is None:
+            self.program_scene = name
+            self.preview_scene = name
+
+    def add_filter(self, source: str, name: str, enabled: bool = False, **settings):
+        self.filters[(source, name)] = {"enabled": enabled, "settings": settings}
+
+    def item(self, scene: str, item_id: int) -> SceneItem:
+        for item in self._scene(scene):
+            if item.id == item_id:
+                return item
+        raise RequestFailed(RESOURCE_NOT_FOUND, f"No scene item {item_id} in {scene}")
+
+    def _scene(self, scene: str) -> List[SceneItem]:
+        if scene not in self.scenes:
+            raise RequestFailed(RESOURCE_NOT_FOUND, f"No scene named {scene}")
+        return self.scenes[scene]
+
+    def _filter(self, source: str, name: str) -> dict:
+        if (source, name) not in self.filters:
+            raise RequestFailed(RESOURCE_NOT_FOUND, f"No filter {name} on {source}")
+        return self.filters[(source, name)]
+
+
+Latency = Union[float, Callable[[str], float]]
+
+
+class MockObsServer:
+    def __init__(
+        self,
+        password: Optional[str] = None,
+        latency: Latency = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fps: int = 60,
+        state: Optional[MockObsState] = None,
+        event_delay: float = 0.0,
+    ):
+        self.password = password
+        self.latency = latency
+        # How long after its response the events a request raised are sent, as real OBS
+        # makes no promise they arrive first
+        self.event_delay = event_delay
+        self.host = host
+        self.port = port
+        self.fps = fps
+        self.state = state or default_state()
+        self.timeline: List[TimelineEntry] = []
+        self._salt = "c2FsdA=="
+        self._challenge = "Y2hhbGxlbmdl"
+        self._connections: Dict[ServerConnection, int] = {}
+        self._drop_on: Dict[str, int] = {}
+        # Events raised by the request handler that is running, sent after its response is built
+        self._pending_events: List[Tuple[str, dict]] = []
+        self._delayed_events: Set[asyncio.Task] = set()
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> MockObsServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(timeout=5)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    def drop_connections(self):
+        """Closes every client connection, as if OBS had gone away"""
+        asyncio.run_coroutine_threadsafe(self._drop_all(), self._loop).result(timeout=5)
+
+    def drop_on(self, request_type: str, times: int = 1):
+        """Drops the connection instead of answering the next requests of the type"""
+        self._drop_on[request_type] = times
+
+    def emit(self, event_type: str, data: Optional[dict] = None):
+        asyncio.run_coroutine_threadsafe(self._emit(event_type, data or {}), self._loop).result(timeout=5)
+
+    def requests(self, request_type: Optional[str] = None) -> List[TimelineEntry]:
+        return [e for e in self.timeline if request_type is None or e.request_type == request_type]
+
+    async def _start(self):
+        self._server = await serve(self._handle, self.host, self.port, compression=None, max_size=2**24)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _stop(self):
+        for task in list(self._delayed_events):
+            task.cancel()
+        await self._drop_all()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _drop_all(self):
+        for ws in list(self._connections):
+            await ws.close()
+
+    async def _handle(self, ws: ServerConnection):
+        hello = {"obsWebSocketVersion": "5.0.0-mock", "rpcVersion": 1}
+        if self.password is not None:
+            hello["authentication"] = {"challenge": self._challenge, "salt": self._salt}
+        await ws.send(json.dumps({"op": 0, "d": hello}))
+        identify = json.loads(await ws.recv())
+        if identify["op"] != 1:
+            await ws.close(4007, "Not identified")
+            return
+        if self.password is not None and identify["d"].get("authentication") != self._expected_auth():
+            await ws.close(4009, "Authentication failed")
+            return
+        self._connections[ws] = identify["d"].get("eventSubscriptions", int(EventSubscription.ALL))
+        await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                if data["op"] == 3:
+                    self._connections[ws] = data["d"].get("eventSubscriptions", self._connections[ws])
+                    await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+                elif data["op"] in (6, 8):
+                    self._loop.create_task(self._respond(ws, data["op"], data["d"]))
+        except ConnectionClosed:
+            pass
+        finally:
+            self._connections.pop(ws, None)
+
+    def _expected_auth(self) -> str:
+        secret = base64.b64encode(hashlib.sha256((self.password + self._salt).encode()).digest())
+        return base64.b64encode(hashlib.sha256((secret.decode() + self._challenge).encode()).digest()).decode()
+
+    async def _respond(self, ws: ServerConnection, op: int, d: dict):
+        request_type = d.get("requestType", "RequestBatch")
+        entry = TimelineEntry(request_type, d["requestId"], time.monotonic())
+        self.timeline.append(entry)
+
+        latency = self.latency(request_type) if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+
+        if self._drop_on.get(request_type):
+            self._drop_on[request_type] -= 1
+            await ws.close()
+            return
+
+        if op == 6:
+            response = await self._execute(d)
+            entry.success = response["requestStatus"]["result"]
+        else:
+            response = {"requestId": d["requestId"], "results": await self._execute_batch(d)}
+        entry.responded = time.monotonic()
+        try:
+            await ws.send(json.dumps({"op": 7 if op == 6 else 9, "d": response}))
+        except ConnectionClosed:
+            pass
+
+    async def _execute_batch(self, d: dict) -> List[dict]:
+        results = []
+        frame_mode = d.get("executionType", 0) == 1
+        for request in d.get("requests", []):
+            entry = TimelineEntry(request["requestType"], request.get("requestId", ""), time.monotonic(),
+                                  batch_id=d["requestId"])
+            self.timeline.append(entry)
+            if request["requestType"] == "Sleep":
+                data = request.get("requestData", {})
+                await asyncio.sleep(data.get("sleepFrames", 0) / self.fps if frame_mode
+                                    else data.get("sleepMillis", 0) / 1000)
+                result = self._status(request, SUCCESS)
+            else:
+                result = await self._execute(request)
+            entry.responded = time.monotonic()
+            entry.success = result["requestStatus"]["result"]
+            results.append(result)
+            if d.get("haltOnFailure") and not entry.success:
+                break
+        return results
+
+    async def _execute(self, request: dict) -> dict:
+        handler = getattr(self, f"_req_{request['requestType']}", None)
+        if handler is None:
+            return self._status(request, UNKNOWN_REQUEST_TYPE, "Unknown request type")
+        try:
+            response_data = handler(request.get("requestData") or {})
+        except RequestFailed as e:
+            self._pending_events = []
+            return self._status(request, e.code, e.comment)
+        except KeyError as e:
+            self._pending_events = []
+            return self._status(request, MISSING_REQUEST_FIELD, f"Missing field {e}")
+        events, self._pending_events = self._pending_events, []
+        if self.event_delay and events:
+            task = asyncio.create_task(self._emit_later(events))
+            self._delayed_events.add(task)
+            task.add_done_callback(self._delayed_events.discard)
+        else:
+            for event_type, event_data in events:
+                await self._emit(event_type, event_data)
+        result = self._status(request, SUCCESS)
+        if response_data is not None:
+            result["responseData"] = response_data
+        return result
+
+    @staticmethod
+    def _status(request: dict, code: int, comment: Optional[str] = None) -> dict:
+        status = {"result": code == SUCCESS, "code": code}
+        if comment:
+            status["comment"] = comment
+        result = {"requestType": request["requestType"], "requestStatus": status}
+        if "requestId" in request:
+            result["requestId"] = request["requestId"]
+        return result
+
+    def _event(self, event_type: str, data: dict):
+        self._pending_events.append((event_type, data))
+
+    async def _emit_later(self, events: List[Tuple[str, dict]]):
+        await asyncio.sleep(self.event_delay)
+        for event_type, event_data in events:
+            await self._emit(event_type, event_data)
+
+    async def _emit(self, event_type: str, data: dict):
+        category = EVENT_CATEGORIES.get(event_type, EventSubscription.GENERAL)
+        message = json.dumps({"op": 5, "d": {"eventType": event_type, "eventIntent": int(category),
+                                             "eventData": data}})
+        for ws, subscriptions in list(self._connections.items()):
+            if subscriptions & category:
+                try:
+                    await ws.send(message)
+                except ConnectionClosed:
+                    pass
+
+    # Request handlers, named after the request types they implement
+
+    def _req_GetVersion(self, data: dict) -> dict:
+        return {"obsVersion": "30.0.0", "obsWebSocketVersion": "5.0.0-mock", "rpcVersion": 1}
+
+    def _req_GetSceneList(self, data: dict) -> dict:
+        names = list(self.state.scenes)
+        return {
+            "currentProgramSceneName": self.state.program_scene,
+            "currentPreviewSceneName": self.state.preview_scene,
+            "scenes": [{"sceneName": name, "sceneIndex": len(names) - 1 - i}
+                       for i, name in reversed(list(enumerate(names)))],
+        }
+
+    def _req_GetCurrentProgramScene(self, data: dict) -> dict:
+        return {"currentProgramSceneName": self.state.program_scene}
+
+    def _req_SetCurrentProgramScene(self, data: dict) -> None:
+        self.state._scene(data["sceneName"])
+        if self.state.program_scene != data["sceneName"]:
+            self.state.program_scene = data["sceneName"]
+            self._event("CurrentProgramSceneChanged", {"sceneName": data["sceneName"]})
+
+    def _req_GetSceneItemList(self, data: dict) -> dict:
+        return {"sceneItems": [
+            {"sceneItemId": item.id, "sourceName": item.source, "sceneItemEnabled": item.enabled,
+             "sceneItemIndex": idx}
+            for idx, item in enumerate(self.state._scene(data["sceneName"]))
+        ]}
+
+    def _req_GetSceneItemId(self, data: dict) -> dict:
+        for item in self.state._scene(data["sceneName"]):
+            if item.source == data["sourceName"]:
+                return {"sceneItemId": item.id}
+        raise RequestFailed(RESOURCE_NOT_FOUND, f"No source {data['sourceName']} in {data['sceneName']}")
+
+    def _req_GetSceneItemEnabled(self, data: dict) -> dict:
+        return {"sceneItemEnabled": self.state.item(data["sceneName"], data["sceneItemId"]).enabled}
+
+    def _req_SetSceneItemEnabled(self, data: dict) -> None:
+        item = self.state.item(data["sceneName"], data["sceneItemId"])
+        if item.enabled != data["sceneItemEnabled"]:
+            item.enabled = data["sceneItemEnabled"]
+            self._event("SceneItemEnableStateChanged", {"sceneName": data["sceneName"],
+                                                        "sceneItemId": item.id,
+                                                        "sceneItemEnabled": item.enabled})
+
+    def _req_GetInputSettings(self, data: dict) -> dict:
+        if data["inputName"] not in self.state.inputs:
+            raise RequestFailed(RESOURCE_NOT_FOUND, f"No input {data['inputName']}")
+        return {"inputSettings": self.state.inputs[data["inputName"]], "inputKind": "text_ft2_source_v2"}
+
+    def _req_SetInputSettings(self, data: dict) -> None:
+        if data["inputName"] not in self.state.inputs:
+            raise RequestFailed(RESOURCE_NOT_FOUND, f"No input {data['inputName']}")
+        if data.get("overlay", True):
+            self.state.inputs[data["inputName"]].update(data["inputSettings"])
+        else:
+            self.state.inputs[data["inputName"]] = dict(data["inputSettings"])
+
+    def _req_GetSourceFilterList(self, data: dict) -> dict:
+        return {"filters": [
+            {"filterName": name, "filterEnabled": f["enabled"], "filterSettings": f["settings"]}
+            for (source, name), f in self.state.filters.items() if source == data["sourceName"]
+        ]}
+
+    def _req_GetSourceFilter(self, data: dict) -> dict:
+        f = self.state._filter(data["sourceName"], data["filterName"])
+        return {"filterEnabled": f["enabled"], "filterSettings": f["settings"]}
+
+    def _req_SetSourceFilterSettings(self, data: dict) -> None:
+        self.state._filter(data["sourceName"], data["filterName"])["settings"].update(data["filterSettings"])
+
+    def _req_SetSourceFilterEnabled(self, data: dict) -> None:
+        f = self.state._filter(data["sourceName"], data["filterName"])
+        if f["enabled"] != data["filterEnabled"]:
+            f["enabled"] = data["filterEnabled"]
+            self._event("SourceFilterEnableStateChanged", {"sourceName": data["sourceName"],
+                                                           "filterName": data["filterName"],
+                                                           "filterEnabled": f["enabled"]})
+
+    def _req_StartRecord(self, data: dict) -> None:
+        if self.state.recording:
+            raise RequestFailed(500, "Output already running")
+        self.state.recording = True
+        self._event("RecordStateChanged", {"outputActive": True, "outputState": "OBS_WEBSOCKET_OUTPUT_STARTED"})
+
+    def _req_StopRecord(self, data: dict) -> dict:
+        if not self.state.recording:
+            raise RequestFailed(501, "Output not running")
+        self.state.recording = False
+        self._event("RecordStateChanged", {"outputActive": False, "outputState": "OBS_WEBSOCKET_OUTPUT_STOPPED"})
+        return {"outputPath": "/tmp/mock.mkv"}
+
+    def _req_CreateRecordChapter(self, data: dict) -> None:
+        if not self.state.recording:
+            raise RequestFailed(501, "Output not running")
+        self.state.chapters.append(data.get("chapterName", ""))
+
+    def _req_StopVirtualCam(self, data: dict) -> None:
+        pass
+
+    def _req_GetSourceScreenshot(self, data: dict) -> dict:
+        content = f"{data['sourceName']}:{self.state.program_scene}".encode()
+        return {"imageData": f"data:image/{data['imageFormat']};base64,{base64.b64encode(content).decode()}"}
+
+    def _req_CallVendorRequest(self, data: dict) -> dict:
+        self.state.vendor_requests.append(data)
+        return {"vendorName": data["vendorName"], "requestType": data["requestType"], "responseData": {}}
+
+
+def default_state() -> MockObsState:
+    """Scenes, sources and filters named like the ones in work.py"""
+    state = MockObsState()
+    state.add_scene("Me full", "Webcam")
+    state.add_scene("Me and Guest", "Webcam", "Guest 1")
+    state.add_scene("Starting soon")
+    state.add_scene("[Scene] Lower-third (labels)", "Title", "Byline", "Chat highlight",
+                    "Guest 1a", "Guest 1b", "Guest 2a", "Guest 2b")
+    state.add_scene("[scene] Screenshare", "Screen")
+    state.add_filter("[scene] Screenshare", "Zoomed")
+    state.add_filter("[scene] Screenshare", "Full screen")
+    state.add_filter("Webcam", "Shader - rain")
+    return state
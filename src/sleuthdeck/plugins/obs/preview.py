@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+from StreamDeck.ImageHelpers import PILHelper
+
+from sleuthdeck.keys import draw_label
+from sleuthdeck.plugins.obs.client import ReconnectingObsClient
+
+# Decoding and converting frames is kept off the deck, key and OBS client threads
+_decoder = ThreadPoolExecutor(max_workers=2, thread_name_prefix="obs-preview")
+
+
+class ScreenshotBudget:
+    """Limits how many screenshots are requested from OBS at once.
+
+    Screenshots are sent as background requests and wait while any interactive request is in
+    flight, so previews never hold up a key press. Used from the deck's updating loop.
+    """
+
+    def __init__(self, client: ReconnectingObsClient, max_concurrent: int = 1):
+        self._client = client
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._max_concurrent = max_concurrent
+
+    async def take(self, source: str, width: int, height: int) -> Optional[str]:
+        """Returns the base64 encoded JPEG of the source at the given size, or None if it failed"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+        async with self._semaphore:
+            try:
+                response = await asyncio.wrap_future(
+                    self._client.submit(self._screenshot(source, width, height))
+                )
+            except ConnectionError:
+                return None
+        if not response["requestStatus"]["result"]:
+            return None
+        return response["responseData"]["imageData"]
+
+    async def _screenshot(self, source: str, width: int, height: int) -> dict:
+        # On the client's loop, so nothing can start between the wait and the request
+        await self._client.wait_idle()
+        return await self._client.request(
+            "GetSourceScreenshot",
+            {
+                "sourceName": source,
+                "imageFormat": "jpg",
+                "imageWidth": width,
+                "imageHeight": height,
+                "imageCompressionQuality": 80,
+            },
+            background=True,
+        )
+
+
+async def decode_frame(stream_deck, image_data: str, text: Optional[str] = None):
+    """Decodes a screenshot and converts it to the deck's native key format on the decoder pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _decoder, _decode_frame, stream_deck, image_data, text
+    )
+
+
+def _decode_frame(stream_deck, image_data: str, text: Optional[str]):
+    _, _, encoded = image_data.partition(",")
+    image = Image.open(BytesIO(base64.b64decode(encoded))).convert("RGB")
+    size = stream_deck.key_image_format()["size"]
+    if image.size != size:
+        image = image.resize(size)
+    if text:
+        draw_label(image, text, 12, backdrop="black")
+    return PILHelper.to_native_key_format(stream_deck, image)
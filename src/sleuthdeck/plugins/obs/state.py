@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from sleuthdeck.plugins.obs.client import ExecutionType
+from sleuthdeck.plugins.obs.client import ReconnectingObsClient
+
+
+class ObsState:
+    """A local mirror of the OBS state that keys care about.
+
+    Seeded each time the client connects and kept current from OBS events, so reads never
+    need a round trip. Everything reads as unknown (None) until the first seed completes.
+    """
+
+    def __init__(self, client: ReconnectingObsClient):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.scenes: List[str] = []
+        self.program_scene: Optional[str] = None
+        self.preview_scene: Optional[str] = None
+        # scene name -> source name -> scene item id
+        self._item_ids: Dict[str, Dict[str, int]] = {}
+        # (scene name, scene item id) -> enabled
+        self._item_enabled: Dict[Tuple[str, int], bool] = {}
+        # (source name, filter name) -> enabled
+        self._filters: Dict[Tuple[str, str], bool] = {}
+
+        self._client = client
+        client.on_connect(self._seed)
+        client.on("CurrentProgramSceneChanged", self._on_program_scene_changed)
+        client.on("CurrentPreviewSceneChanged", self._on_preview_scene_changed)
+        client.on("SceneListChanged", self._on_scene_list_changed)
+        client.on("SceneNameChanged", self._on_scene_name_changed)
+        client.on("SceneRemoved", self._on_scene_removed)
+        client.on("SceneItemCreated", self._on_scene_item_created)
+        client.on("SceneItemRemoved", self._on_scene_item_removed)
+        client.on("SceneItemEnableStateChanged", self._on_scene_item_enable_state_changed)
+        client.on("InputNameChanged", self._on_input_name_changed)
+        client.on("SourceFilterCreated", self._on_filter_created)
+        client.on("SourceFilterRemoved", self._on_filter_removed)
+        client.on("SourceFilterNameChanged", self._on_filter_name_changed)
+        client.on("SourceFilterEnableStateChanged", self._on_filter_enable_state_changed)
+
+    def scene_item_id(self, scene: str, source: str) -> Optional[int]:
+        with self._lock:
+            return self._item_ids.get(scene, {}).get(source)
+
+    def scene_item_enabled(self, scene: str, source: str) -> Optional[bool]:
+        with self._lock:
+            item_id = self._item_ids.get(scene, {}).get(source)
+            return self._item_enabled.get((scene, item_id))
+
+    def filter_enabled(self, source: str, filter_name: str) -> Optional[bool]:
+        with self._lock:
+            return self._filters.get((source, filter_name))
+
+    def record_scene_item_enabled(self, scene: str, item_id: int, enabled: bool):
+        """Records a change this client made, which its event may not have confirmed yet"""
+        with self._lock:
+            self._item_enabled[(scene, item_id)] = enabled
+
+    def record_filter_enabled(self, source: str, filter_name: str, enabled: bool):
+        """Records a change this client made, which its event may not have confirmed yet"""
+        with self._lock:
+            self._filters[(source, filter_name)] = enabled
+
+    async def _seed(self):
+        self.ready = False
+        scene_list = (await self._client.request("GetSceneList"))["responseData"]
+        scenes = [s["sceneName"] for s in reversed(scene_list["scenes"])]
+        results = await self._client.request_batch(
+            [{"requestType": "GetSceneItemList", "requestData": {"sceneName": s}} for s in scenes],
+            ExecutionType.PARALLEL,
+        )
+        item_ids = {}
+        item_enabled = {}
+        sources = set(scenes)
+        for scene, result in zip(scenes, results):
+            item_ids[scene] = {}
+            for item in result.get("responseData", {}).get("sceneItems", []):
+                item_ids[scene][item["sourceName"]] = item["sceneItemId"]
+                item_enabled[(scene, item["sceneItemId"])] = item["sceneItemEnabled"]
+                sources.add(item["sourceName"])
+
+        sources = sorted(sources)
+        results = await self._client.request_batch(
+            [{"requestType": "GetSourceFilterList", "requestData": {"sourceName": s}} for s in sources],
+            ExecutionType.PARALLEL,
+        )
+        filters = {}
+        for source, result in zip(sources, results):
+            for f in result.get("responseData", {}).get("filters", []):
+                filters[(source, f["filterName"])] = f["filterEnabled"]
+
+        with self._lock:
+            self.scenes = scenes
+            self.program_scene = scene_list.get("currentProgramSceneName")
+            self.preview_scene = scene_list.get("currentPreviewSceneName")
+            self._item_ids = item_ids
+            self._item_enabled = item_enabled
+            self._filters = filters
+        self.ready = True
+        print(f"Synchronized OBS state: {len(scenes)} scenes, {len(filters)} filters")
+
+    def _on_program_scene_changed(self, data: dict):
+        self.program_scene = data["sceneName"]
+
+    def _on_preview_scene_changed(self, data: dict):
+        self.preview_scene = data["sceneName"]
+
+    def _on_scene_list_changed(self, data: dict):
+        with self._lock:
+            self.scenes = [s["sceneName"] for s in reversed(data["scenes"])]
+            for scene in self.scenes:
+                self._item_ids.setdefault(scene, {})
+
+    def _on_scene_name_changed(self, data: dict):
+        old, new = data["oldSceneName"], data["sceneName"]
+        with self._lock:
+            self._item_ids[new] = self._item_ids.pop(old, {})
+            for (scene, item_id) in [k for k in self._item_enabled if k[0] == old]:
+                self._item_enabled[(new, item_id)] = self._item_enabled.pop((scene, item_id))
+            self._rename_source(old, new)
+            if self.program_scene == old:
+                self.program_scene = new
+            if self.preview_scene == old:
+                self.preview_scene = new
+
+    def _on_scene_removed(self, data: dict):
+        with self._lock:
+            self._item_ids.pop(data["sceneName"], None)
+
+    def _on_scene_item_created(self, data: dict):
+        with self._lock:
+            self._item_ids.setdefault(data["sceneName"], {})[data["sourceName"]] = data["sceneItemId"]
+            # New scene items are visible unless OBS says otherwise
+            self._item_enabled[(data["sceneName"], data["sceneItemId"])] = True
+
+    def _on_scene_item_removed(self, data: dict):
+        with self._lock:
+            items = self._item_ids.get(data["sceneName"], {})
+            if items.get(data["sourceName"]) == data["sceneItemId"]:
+                del items[data["sourceName"]]
+            self._item_enabled.pop((data["sceneName"], data["sceneItemId"]), None)
+
+    def _on_scene_item_enable_state_changed(self, data: dict):
+        with self._lock:
+            self._item_enabled[(data["sceneName"], data["sceneItemId"])] = data["sceneItemEnabled"]
+
+    def _on_input_name_changed(self, data: dict):
+        with self._lock:
+            self._rename_source(data["oldInputName"], data["inputName"])
+
+    def _on_filter_created(self, data: dict):
+        with self._lock:
+            self._filters[(data["sourceName"], data["filterName"])] = data.get("filterEnabled", True)
+
+    def _on_filter_removed(self, data: dict):
+        with self._lock:
+            self._filters.pop((data["sourceName"], data["filterName"]), None)
+
+    def _on_filter_name_changed(self, data: dict):
+        with self._lock:
+            enabled = self._filters.pop((data["sourceName"], data["oldFilterName"]), None)
+            if enabled is not None:
+                self._filters[(data["sourceName"], data["filterName"])] = enabled
+
+    def _on_filter_enable_state_changed(self, data: dict):
+        with self._lock:
+            self._filters[(data["sourceName"], data["filterName"])] = data["filterEnabled"]
+
+    def _rename_source(self, old: str, new: str):
+        for items in self._item_ids.values():
+            if old in items:
+                items[new] = items.pop(old)
+        for (source, filter_name) in [k for k in self._filters if k[0] == old]:
+            self._filters[(new, filter_name)] = self._filters.pop((source, filter_name))
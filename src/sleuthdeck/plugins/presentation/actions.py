@@ -1,102 +1,174 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from time import sleep
-from typing import Optional, List
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
 
-import yaml
 from obsws_python.error import OBSSDKError
-from slugify import slugify
 
 from sleuthdeck.deck import Action, KeyScene, Key, ClickType
 from sleuthdeck.plugins.obs import OBS
+from sleuthdeck.plugins.obs.client import ExecutionType
+from sleuthdeck.plugins.presentation.library import episode_id
+from sleuthdeck.plugins.presentation.library import EpisodeLibrary
+from sleuthdeck.plugins.presentation.library import Event
+from sleuthdeck.plugins.presentation.library import Section
 
 
-@dataclass
-class Event:
-    title: str
-    sections: List[Section]
-    id: Optional[str] = None
-
-    @property
-    def slug(self):
-        return slugify(self.title)
-
-
-@dataclass
-class Section:
-    title: str
-    byline: str
-    scene: str | None
+class Presentation:
+    """Steps through the sections of an episode, showing each one's labels in OBS.
 
+    The episode file's directory is loaded as an :class:`EpisodeLibrary`, so other episodes
+    can be switched to from the deck without re-reading files.
+    """
 
-class Presentation:
     def __init__(self, obs: OBS, path: str, title_scene_item="Section title",
                 byline_scene_item="Section byline",
                  title_scene="Title", overlay_scene="Overlay",
                  guest1_name_item="Guest 1a",
                  guest1_title_item="Guest 1b",
                  guest2_name_item="Guest 2a",
-                 guest2_title_item="Guest 2b"
+                 guest2_title_item="Guest 2b",
+                 scene_change_frames: int = 18,
+                 watch: bool = True,
                  ):
         self.path = path
         self.obs = obs
-        self.guest1_name_item = guest1_name_item
-        self.guest1_title_item = guest1_title_item
-        self.guest2_name_item = guest2_name_item
-        self.guest2_title_item = guest2_title_item
-
-        self.current_section_idx = 0
-        try:
-            self._reload()
-        except ConnectionError:
-            return
-
-        if not self.event.sections:
-            return
-
+        self.guest_items = [(guest1_name_item, guest1_title_item), (guest2_name_item, guest2_title_item)]
+        # Frames to hold the labels back after a scene change, about 300ms at 60fps
+        self.scene_change_frames = scene_change_frames
         self.title_scene_item = title_scene_item
         self.byline_scene_item = byline_scene_item
         self.title_scene = title_scene
         self.overlay_scene = overlay_scene
         self._recording = False
 
+        self.current_section_idx = 0
+        self.library = EpisodeLibrary.for_directory(os.path.dirname(os.path.abspath(path)))
+        self.event = self.library.get(episode_id(path)) or Event("Missing", [])
+        # Guest label requests for each episode, ready to send when it is selected
+        self._staged: Dict[str, List[dict]] = {}
+        # (episode id, section index, change scene) -> the requests that move to the section
+        self._plans: Dict[Tuple[Optional[str], int, bool], List[dict]] = {}
+        # Bumped whenever plans are thrown away, so a compile that started before can't store
+        # a stale plan
+        self._plans_generation = 0
+        # Guards the episode, section and plans across key presses, the library watcher and
+        # the compiler. Never taken on the OBS client's loop, which a press may be waiting on.
+        self._lock = threading.RLock()
+        self._compiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="presentation-plans")
+        self.library.on_change(self._on_episode_changed)
+        if watch:
+            self.library.watch()
+        # The guest labels go out once OBS is up, so a missing OBS never holds up the deck
+        self.obs.client.on_connect(self._on_obs_connect)
+        # Plans hold scene item ids, which change when a label is recreated
+        self.obs.client.on("SceneItemCreated", self._on_scene_items_changed)
+        self.obs.client.on("SceneItemRemoved", self._on_scene_items_changed)
+        if self.obs.client.connected:
+            self._compile_plans(self.event)
+            self._submit_guest_labels()
+
+    def close(self):
+        """Stops following episode and OBS changes, for when the script is reloaded"""
+        self.library.remove_listener(self._on_episode_changed)
+        self.obs.client.remove_connect_listener(self._on_obs_connect)
+        self.obs.client.remove_listener("SceneItemCreated", self._on_scene_items_changed)
+        self.obs.client.remove_listener("SceneItemRemoved", self._on_scene_items_changed)
+        self._compiler.shutdown(wait=False, cancel_futures=True)
+
     def _reload(self):
-        with open(self.path, "r") as stream:
-            try:
-                data = yaml.safe_load(stream)
-            except yaml.YAMLError as exc:
-                print(exc)
-                self.event = Event("Missing", [])
-        sections = []
-        if "sections" in data:
-            sections = [Section(title=s["title"], byline=s["byline"], scene=s.get("scene")) for s in data["sections"]]
-
-        if "guest1" in data:
-            try:
-                self.obs.set_item_property(self.guest1_name_item, "text", data["guest1"]["name"])
-                self.obs.set_item_property(self.guest1_title_item, "text", data["guest1"]["title"])
-            except OBSSDKError:
-                print("Error resetting guest labels")
+        self.library.refresh(self.path)
+        with self._lock:
+            self.event = self.library.get(episode_id(self.path)) or Event("Missing", [])
 
-        if "guest2" in data:
-            try:
-                self.obs.set_item_property(self.guest2_name_item, "text", data["guest2"]["name"])
-                self.obs.set_item_property(self.guest2_title_item, "text", data["guest2"]["title"])
-            except OBSSDKError:
-                print("Error resetting guest labels")
+    def select_episode(self, event_id: str) -> Action:
+        def action(scene: KeyScene, key: Key, click: ClickType):
+            event = self.library.get(event_id)
+            if event is None:
+                print(f"No episode {event_id}")
+                return
+            self._activate(event)
 
-        self.event = Event(
-            title=data["title"],
-            sections=sections,
-        )
+        return action
 
-    def next_section(self) -> Action:
+    def next_episode(self) -> Action:
         def action(scene: KeyScene, key: Key, click: ClickType):
-            section = self._next_section()
+            self._step_episode(1)
+
+        return action
 
-            self._update_labels(section, next_scene=section.scene)
-            self.obs.create_record_chapter(section.title)
+    def previous_episode(self) -> Action:
+        def action(scene: KeyScene, key: Key, click: ClickType):
+            self._step_episode(-1)
+
+        return action
+
+    def _step_episode(self, step: int):
+        episodes = self.library.episodes
+        if not episodes:
+            return
+        ids = [e.id for e in episodes]
+        with self._lock:
+            idx = ids.index(self.event.id) + step if self.event.id in ids else 0
+            self._activate(episodes[idx % len(episodes)])
+
+    def _activate(self, event: Event):
+        print(f"Switching to episode {event.id}: {event.title}")
+        with self._lock:
+            self.event = event
+            self.path = self.library.path_of(event.id)
+            self.current_section_idx = 0
+            if event.sections:
+                self._go_to(0, change_scene=False, staged=self._guest_label_requests(event))
+            else:
+                self._send_guest_labels()
+            self._compile_plans(event)
+
+    def _on_episode_changed(self, event_id: str):
+        # Called on the library watcher's thread, so wait for any press in progress
+        with self._lock:
+            self._staged.pop(event_id, None)
+            self._clear_plans(event_id)
+            if event_id == self.event.id:
+                self.event = self.library.get(event_id) or self.event
+                self.current_section_idx = min(self.current_section_idx, max(0, len(self.event.sections) - 1))
+                self._compile_plans(self.event)
+
+    def _guest_label_requests(self, event: Event) -> List[dict]:
+        if event.id not in self._staged:
+            batch = self.obs.batch()
+            for guest, (name_item, title_item) in zip(event.guests, self.guest_items):
+                if guest:
+                    batch.set_item_property(name_item, "text", guest.name)
+                    batch.set_item_property(title_item, "text", guest.title)
+            self._staged[event.id] = batch.requests
+        return self._staged[event.id]
+
+    def _send_guest_labels(self):
+        batch = self.obs.batch()
+        batch.extend(self._guest_label_requests(self.event))
+        try:
+            batch.send()
+        except OBSSDKError:
+            print("Error resetting guest labels")
+
+    def _submit_guest_labels(self):
+        """Sends the guest labels without waiting for OBS to answer"""
+        requests = self._guest_label_requests(self.event)
+        if requests:
+            self.obs.batch().extend(requests).submit()
+
+    def next_section(self) -> Action:
+        def action(scene: KeyScene, key: Key, click: ClickType):
+            with self._lock:
+                self._next_section()
+                self._go_to(self.current_section_idx)
 
         return action
 
@@ -104,41 +176,108 @@ class Presentation:
         def action(scene: KeyScene, key: Key, click: ClickType):
             if reload:
                 self._reload()
-            self.current_section_idx = 0
-            self._update_labels(self.event.sections[0])
-            self.obs.create_record_chapter(self.event.sections[self.current_section_idx].title)
+            with self._lock:
+                staged = self._guest_label_requests(self.event) if reload else []
+                self._go_to(0, change_scene=False, staged=staged)
 
         return action
 
     def toggle_record(self) -> Action:
         def action(scene: KeyScene, key: Key, click: ClickType):
             if self._recording:
-                self.obs.stop_recording(vertical=True)
+                self.obs.group(vertical=True).stop_recording()
                 self._recording = False
             else:
-                self.obs.start_recording(vertical=True)
+                self.obs.group(vertical=True).start_recording()
                 self._recording = True
 
         return action
 
     def previous_section(self) -> Action:
         def action(scene: KeyScene, key: Key, click: ClickType):
-            section = self._previous_section()
-            self._update_labels(section, next_scene=section.scene)
-            self.obs.create_record_chapter(section.title)
+            with self._lock:
+                self._previous_section()
+                self._go_to(self.current_section_idx)
 
         return action
 
-    def _update_labels(self, section, next_scene: str | None = False):
-        self.obs.set_scene_item_enabled(self.overlay_scene, self.title_scene_item, False)
-        self.obs.set_scene_item_enabled(self.overlay_scene, self.byline_scene_item, False)
-        self.obs.set_item_property(self.title_scene_item, "text", section.title)
-        self.obs.set_item_property(self.byline_scene_item, "text", section.byline)
-        if next_scene:
-            self.obs.call("SetCurrentProgramScene", {"sceneName": next_scene})
-            sleep(.3)
-        self.obs.set_scene_item_enabled(self.overlay_scene, self.title_scene_item, True)
-        self.obs.set_scene_item_enabled(self.overlay_scene, self.byline_scene_item, True)
+    def _go_to(self, idx: int, change_scene: bool = True, staged: Sequence[dict] = ()):
+        """Sends the section's transition plan in one batch, without waiting for OBS to apply it"""
+        self.current_section_idx = idx
+        batch = self.obs.batch(ExecutionType.SERIAL_FRAME)
+        batch.extend(staged)
+        batch.extend(self._plan(self.event, idx, change_scene))
+        batch.submit()
+
+        # Off the critical path now the batch is on its way
+        if self.event.sections:
+            self._compiler.submit(self._plan, self.event, (idx + 1) % len(self.event.sections), True)
+
+    def _plan(self, event: Event, idx: int, change_scene: bool) -> List[dict]:
+        key = (event.id, idx, change_scene)
+        with self._lock:
+            plan = self._plans.get(key)
+            generation = self._plans_generation
+        if plan is None:
+            plan = self._compile(event.sections[idx], change_scene)
+            with self._lock:
+                if generation == self._plans_generation:
+                    plan = self._plans.setdefault(key, plan)
+        return plan
+
+    def _clear_plans(self, event_id: Optional[str] = None):
+        """Throws away the plans for the episode, or for every episode"""
+        with self._lock:
+            self._plans_generation += 1
+            if event_id is None:
+                self._plans.clear()
+            else:
+                for key in [k for k in self._plans if k[0] == event_id]:
+                    del self._plans[key]
+
+    def _compile(self, section: Section, change_scene: bool) -> List[dict]:
+        """The requests that show the section: hide the labels, retitle them, change scene, show them"""
+        batch = self.obs.batch(ExecutionType.SERIAL_FRAME)
+        batch.set_scene_item_enabled(self.overlay_scene, self.title_scene_item, False)
+        batch.set_scene_item_enabled(self.overlay_scene, self.byline_scene_item, False)
+        batch.set_item_property(self.title_scene_item, "text", section.title)
+        batch.set_item_property(self.byline_scene_item, "text", section.byline)
+        if change_scene and section.scene:
+            batch.change_scene(section.scene)
+            batch.sleep(frames=self.scene_change_frames)
+        batch.set_scene_item_enabled(self.overlay_scene, self.title_scene_item, True)
+        batch.set_scene_item_enabled(self.overlay_scene, self.byline_scene_item, True)
+        batch.create_record_chapter(section.title)
+        return batch.requests
+
+    def _compile_plans(self, event: Event):
+        """Compiles every section's plan in the background, so the first presses don't have to"""
+        def compile_all():
+            if event is not self.event:
+                # Another episode was selected before this one's turn came
+                return
+            try:
+                for idx in range(len(event.sections)):
+                    self._plan(event, idx, True)
+                if event.sections:
+                    self._plan(event, 0, False)
+            except (ConnectionError, OBSSDKError, TimeoutError) as e:
+                print(f"Unable to prepare transitions for {event.id}, will retry on use: {e}")
+
+        self._compiler.submit(compile_all)
+
+    async def _on_obs_connect(self):
+        # Scene item ids can change while OBS is away
+        self._compiler.submit(self._recompile_plans)
+        self._submit_guest_labels()
+
+    def _on_scene_items_changed(self, data: dict):
+        if data.get("sceneName") == self.overlay_scene:
+            self._compiler.submit(self._recompile_plans)
+
+    def _recompile_plans(self):
+        self._clear_plans()
+        self._compile_plans(self.event)
 
     def _next_section(self) -> Section:
         if len(self.event.sections) - 1 == self.current_section_idx:
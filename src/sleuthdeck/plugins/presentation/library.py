@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from dataclasses import field
+from fnmatch import fnmatch
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from slugify import slugify
+
+
+@dataclass
+class Section:
+    title: str
+    byline: str
+    scene: str | None
+
+
+@dataclass
+class Guest:
+    name: str
+    title: str
+
+
+@dataclass
+class Event:
+    title: str
+    sections: List[Section]
+    id: Optional[str] = None
+    guests: List[Optional[Guest]] = field(default_factory=list)
+
+    @property
+    def slug(self):
+        return slugify(self.title)
+
+
+class EpisodeError(ValueError):
+    pass
+
+
+def parse_event(data: dict, event_id: Optional[str] = None) -> Event:
+    """Builds an event from a parsed episode file, raising EpisodeError if it is malformed"""
+    if not isinstance(data, dict):
+        raise EpisodeError("Episode must be a mapping")
+    if not isinstance(data.get("title"), str):
+        raise EpisodeError("Episode is missing a title")
+
+    sections = []
+    for idx, s in enumerate(data.get("sections") or []):
+        if not isinstance(s, dict) or not isinstance(s.get("title"), str):
+            raise EpisodeError(f"Section {idx + 1} is missing a title")
+        byline = s.get("byline") or ""
+        scene = s.get("scene")
+        if not isinstance(byline, str) or (scene is not None and not isinstance(scene, str)):
+            raise EpisodeError(f"Section {idx + 1} has an invalid byline or scene")
+        sections.append(Section(title=s["title"], byline=byline, scene=scene))
+
+    guests = []
+    # Older episodes only had the one guest, under "guest"
+    for key in (("guest1", "guest"), ("guest2",)):
+        guest = next((data[k] for k in key if k in data), None)
+        if guest is not None and not (isinstance(guest, dict) and "name" in guest):
+            raise EpisodeError(f"Guest {key[0]} is missing a name")
+        guests.append(Guest(str(guest["name"]), str(guest.get("title") or "")) if guest else None)
+
+    return Event(title=data["title"], sections=sections, id=event_id, guests=guests)
+
+
+def load_event(path: str) -> Event:
+    import yaml
+
+    with open(path, "r") as stream:
+        try:
+            data = yaml.safe_load(stream)
+        except yaml.YAMLError as exc:
+            raise EpisodeError(str(exc)) from exc
+    return parse_event(data, episode_id(path))
+
+
+def episode_id(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+_libraries: Dict[str, EpisodeLibrary] = {}
+_libraries_lock = threading.Lock()
+
+
+class EpisodeLibrary:
+    """The episode files in a directory, each parsed and validated once.
+
+    Episodes are cached by modification time, so :meth:`refresh` only re-parses files that
+    changed. With :meth:`watch`, changes are picked up as they happen and listeners are told
+    which episode changed.
+    """
+
+    def __init__(self, directory: str, pattern: str = "*.yml"):
+        self.directory = os.path.abspath(directory)
+        self.pattern = pattern
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        # episode id -> (mtime, path, event)
+        self._episodes: Dict[str, Tuple[float, str, Event]] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._observer = None
+        self.refresh()
+
+    @classmethod
+    def for_directory(cls, directory: str) -> EpisodeLibrary:
+        """The shared library for the directory, so reloaded scripts keep the parsed episodes"""
+        directory = os.path.abspath(directory)
+        with _libraries_lock:
+            if directory not in _libraries:
+                _libraries[directory] = cls(directory)
+            return _libraries[directory]
+
+    @property
+    def episodes(self) -> List[Event]:
+        with self._lock:
+            return [event for _, (_, _, event) in sorted(self._episodes.items())]
+
+    def get(self, event_id: str) -> Optional[Event]:
+        with self._lock:
+            entry = self._episodes.get(event_id)
+            return entry[2] if entry else None
+
+    def path_of(self, event_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._episodes.get(event_id)
+            return entry[1] if entry else None
+
+    def on_change(self, callback: Callable[[str], None]):
+        """Calls back with the episode id whenever an episode is added, changed or removed"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def refresh(self, path: Optional[str] = None):
+        """Re-reads the episodes whose files changed, or just the given file"""
+        if path is not None:
+            self._refresh_file(os.path.abspath(path))
+            return
+        with self._lock:
+            seen = set()
+            for name in os.listdir(self.directory):
+                if fnmatch(name, self.pattern):
+                    seen.add(episode_id(name))
+                    self._refresh_file(os.path.join(self.directory, name))
+            for event_id in set(self._episodes) - seen:
+                self._remove(event_id)
+
+    def watch(self):
+        """Keeps the library current from filesystem events until the process exits"""
+        with self._lock:
+            if self._observer is not None:
+                return
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+
+            library = self
+
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.is_directory:
+                        return
+                    for path in (event.src_path, getattr(event, "dest_path", "")):
+                        if path and fnmatch(os.path.basename(path), library.pattern):
+                            library.refresh(path)
+
+            self._observer = Observer()
+            self._observer.daemon = True
+            self._observer.schedule(Handler(), path=self.directory)
+            self._observer.start()
+
+    def _refresh_file(self, path: str):
+        event_id = episode_id(path)
+        with self._lock:
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                self._remove(event_id)
+                return
+            cached = self._episodes.get(event_id)
+            if cached and cached[0] == mtime:
+                return
+            try:
+                event = load_event(path)
+            except (EpisodeError, OSError) as e:
+                print(f"Invalid episode {path}: {e}")
+                self.errors[event_id] = str(e)
+                # Keep the last good version, if any, rather than losing the episode mid-show
+                return
+            self.errors.pop(event_id, None)
+            self._episodes[event_id] = (mtime, path, event)
+        self._notify(event_id)
+
+    def _remove(self, event_id: str):
+        with self._lock:
+            removed = self._episodes.pop(event_id, None)
+            self.errors.pop(event_id, None)
+        if removed:
+            self._notify(event_id)
+
+    def _notify(self, event_id: str):
+        for callback in list(self._listeners):
+            try:
+                callback(event_id)
+            except Exception as e:
+                print(f"Error handling change to episode {event_id}: {e}")
@@ -1,3 +1,13 @@
 class Sleuth:
-    def __init__(self, token: str):
+    def __init__(self, token: str, url: str = None, interval: float = 30):
         self.token = token
+        self.url = url
+        self.interval = interval
+
+    @property
+    def poller(self):
+        """The poller shared by every key watching this account"""
+        from sleuthdeck.plugins.sleuth.poller import get_poller
+        from sleuthdeck.plugins.sleuth.poller import SLEUTH_STATUS_URL
+
+        return get_poller(self.token, url=self.url or SLEUTH_STATUS_URL, interval=self.interval)
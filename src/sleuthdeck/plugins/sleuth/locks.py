@@ -1,26 +1,104 @@
-import threading
+import asyncio
+from abc import ABC
+from abc import abstractmethod
+from functools import partial
 from os import path
 from os.path import dirname
+from typing import List
 from typing import Optional
 
-from sleuthdeck.deck import Deck
+from sleuthdeck.deck import Action
+from sleuthdeck.deck import ClickType
 from sleuthdeck.deck import Key
+from sleuthdeck.deck import KeyScene
+from sleuthdeck.deck import Updatable
+from sleuthdeck.keys import IconKey
 from sleuthdeck.plugins.sleuth import Sleuth
+from sleuthdeck.plugins.sleuth.poller import Status
+from sleuthdeck.plugins.sleuth.poller import Target
 
+ICONS_PATH = path.join(dirname(__file__), "../../../assets/fontawesome-free-6.0.0-desktop/svgs/solid")
 
-class RepositoryLockKey(Key):
-    def __init__(self, sleuth: Sleuth, project: str, deployment: Optional[str] = None):
-        super().__init__()
+DEPLOYMENT_COLORS = {
+    "healthy": "green",
+    "deploying": "yellow",
+    "failing": "red",
+}
+
+
+def _icon(name: str) -> str:
+    return path.join(ICONS_PATH, f"{name}.svg")
+
+
+class Refresh(Action):
+    """Asks Sleuth for the latest status now"""
+
+    def __init__(self, sleuth: Sleuth):
         self.sleuth = sleuth
+
+    def __call__(self, scene: KeyScene, key: Key, click: ClickType):
+        self.sleuth.poller.refresh()
+
+
+class SleuthStatusKey(IconKey, Updatable, ABC):
+    """Shows a project or deployment status from Sleuth, redrawn only when it changes"""
+
+    def __init__(self, sleuth: Sleuth, target: Target, image_file: str, text: Optional[str] = None,
+                 actions: List[Action] = None):
+        # Shown until the first status arrives
+        super().__init__(image_file, text=text, actions=actions or [Refresh(sleuth)])
+        self._image_loader = partial(self._image_loader, tint="gray")
+        self.sleuth = sleuth
+        self.target = target
+        self._shown: Optional[Status] = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        poller = self.sleuth.poller
+
+        def changed(status: Status):
+            loop.call_soon_threadsafe(self._show, status)
+
+        poller.subscribe(self.target, changed)
+        poller.start()
+        try:
+            await loop.create_future()
+        finally:
+            poller.unsubscribe(self.target, changed)
+
+    def _show(self, status: Status):
+        if status == self._shown:
+            return
+        self._shown = status
+        self.update_icon(**self.icon(status))
+
+    @abstractmethod
+    def icon(self, status: Status) -> dict:
+        """The update_icon arguments that show the status"""
+
+
+class RepositoryLockKey(SleuthStatusKey):
+    def __init__(self, sleuth: Sleuth, project: str, deployment: Optional[str] = None, text: Optional[str] = None,
+                 actions: List[Action] = None):
+        super().__init__(sleuth, Target(project, deployment), path.join(dirname(__file__), "assets", "lock.jpg"),
+                         text=text or project, actions=actions)
         self.project = project
         self.deployment = deployment
-        self._thread = threading.Thread(target=self._update)
 
-    def connect(self, deck: Deck):
-        image = path.join(dirname(__file__), "lock.jpg")
-        self.image = image
-        super().connect(deck)
+    def icon(self, status: Status) -> dict:
+        if status.locked:
+            return dict(image_file=_icon("lock"), tint="red", enabled=True)
+        return dict(image_file=_icon("lock-open"), tint="green", enabled=False)
+
+
+class DeploymentStatusKey(SleuthStatusKey):
+    def __init__(self, sleuth: Sleuth, project: str, deployment: str, text: Optional[str] = None,
+                 actions: List[Action] = None):
+        super().__init__(sleuth, Target(project, deployment), _icon("circle-question"),
+                         text=text or deployment, actions=actions)
+        self.project = project
+        self.deployment = deployment
 
-    def _update(self):
-        # todo: add periodic updates from sleuth to update actions and icon
-        pass
+    def icon(self, status: Status) -> dict:
+        return dict(image_file=_icon("rocket"), tint=DEPLOYMENT_COLORS.get(status.state, "gray"),
+                    enabled=status.locked)
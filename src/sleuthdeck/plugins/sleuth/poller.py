@@ -0,0 +1,262 @@
+"""Polls Sleuth for the lock and deployment status of everything the deck shows, in one request.
+
+The status endpoint is asked about every watched project and deployment at once::
+
+    GET <url>?project=<slug>&deployment=<project slug>/<deployment slug>...
+
+and answers with::
+
+    {"projects": {"<project slug>": {
+        "locked": true, "locked_by": "...", "reason": "...",
+        "deployments": {"<deployment slug>": {"state": "healthy", "revision": "..."}}
+    }}}
+
+Responses are cached with their ``ETag`` and ``Last-Modified`` headers, so a poll where
+nothing changed is a 304 with no body.
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import traceback
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.error import HTTPError
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import Request
+from urllib.request import urlopen
+
+SLEUTH_STATUS_URL = "https://app.sleuth.io/api/1/deck/status"
+
+
+@dataclass(frozen=True)
+class Target:
+    """A project's lock, or with a deployment, that deployment's status"""
+
+    project: str
+    deployment: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Status:
+    locked: bool = False
+    locked_by: Optional[str] = None
+    reason: Optional[str] = None
+    # e.g. "healthy", "deploying" or "failing", for deployments
+    state: Optional[str] = None
+    revision: Optional[str] = None
+
+
+StatusCallback = Callable[[Status], None]
+
+
+def parse_statuses(data: dict, targets: List[Target]) -> Dict[Target, Status]:
+    projects = data.get("projects") or {}
+    statuses = {}
+    for target in targets:
+        project = projects.get(target.project)
+        if project is None:
+            continue
+        lock = dict(
+            locked=bool(project.get("locked")),
+            locked_by=project.get("locked_by"),
+            reason=project.get("reason"),
+        )
+        if target.deployment is None:
+            statuses[target] = Status(**lock)
+            continue
+        deployment = (project.get("deployments") or {}).get(target.deployment)
+        if deployment is not None:
+            statuses[target] = Status(**lock, state=deployment.get("state"), revision=deployment.get("revision"))
+    return statuses
+
+
+class StatusPoller:
+    """One thread that polls for every subscribed target, telling subscribers only what changed.
+
+    Once started, new subscriptions are fetched straight away rather than waiting for the
+    next interval, and the thread stops when the last subscriber leaves.
+    Failed polls back off exponentially, with jitter, up to ``max_backoff`` seconds, and a
+    ``Retry-After`` from the server is honoured.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        url: str = SLEUTH_STATUS_URL,
+        interval: float = 30,
+        max_backoff: float = 300,
+        timeout: float = 10,
+    ):
+        self.token = token
+        self.url = url
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Target, List[StatusCallback]] = {}
+        self._statuses: Dict[Target, Status] = {}
+        # (query, etag, last modified) of the last full response
+        self._validators: Tuple[Optional[str], Optional[str], Optional[str]] = (None, None, None)
+        self._failures = 0
+        self._wake = threading.Event()
+        # Set to stop the running thread; each start gets its own, so a restart can't race
+        # a thread that is still winding down
+        self._stopped: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, target: Target, callback: StatusCallback):
+        """Calls back with the target's status now if known, then on the poller thread each time it changes"""
+        with self._lock:
+            callbacks = self._subscribers.setdefault(target, [])
+            new_target = not callbacks
+            callbacks.append(callback)
+            status = self._statuses.get(target)
+        if status is not None:
+            callback(status)
+        if new_target:
+            self._wake.set()
+
+    def unsubscribe(self, target: Target, callback: StatusCallback):
+        with self._lock:
+            callbacks = self._subscribers.get(target, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                # The status is kept, as a 304 for the same targets later on still refers to it
+                self._subscribers.pop(target, None)
+            idle = not self._subscribers
+        if idle:
+            self.stop()
+
+    def status(self, target: Target) -> Optional[Status]:
+        with self._lock:
+            return self._statuses.get(target)
+
+    def refresh(self):
+        """Polls now rather than at the next interval"""
+        self._wake.set()
+
+    def start(self):
+        with self._lock:
+            if self._stopped is not None:
+                return
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stopped,), daemon=True, name="sleuth-poller"
+            )
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            stopped, self._stopped = self._stopped, None
+        if stopped is not None:
+            stopped.set()
+            self._wake.set()
+
+    def poll(self) -> float:
+        """Polls once, returning how long to wait before the next poll"""
+        with self._lock:
+            targets = sorted(self._subscribers, key=lambda t: (t.project, t.deployment or ""))
+        if not targets:
+            return self.interval
+        try:
+            data = self._fetch(targets)
+        except HTTPError as e:
+            return self._failed(e, e.headers.get("Retry-After") if e.headers else None)
+        except (URLError, OSError, ValueError) as e:
+            return self._failed(e)
+        self._failures = 0
+        if data is not None:
+            self._update(parse_statuses(data, targets))
+        return self.interval
+
+    def _fetch(self, targets: List[Target]) -> Optional[dict]:
+        """The status response, or None if it hasn't changed since the last one"""
+        query = urlencode(
+            [("project", p) for p in sorted({t.project for t in targets})]
+            + [("deployment", f"{t.project}/{t.deployment}") for t in targets if t.deployment]
+        )
+        headers = {"Authorization": f"apikey {self.token}", "Accept": "application/json"}
+        last_query, etag, last_modified = self._validators
+        if query == last_query:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        self.requests += 1
+        try:
+            with urlopen(Request(f"{self.url}?{query}", headers=headers), timeout=self.timeout) as resp:
+                data = json.loads(resp.read())
+                self._validators = (query, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                return data
+        except HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+    def _failed(self, error: Exception, retry_after: Optional[str] = None) -> float:
+        self._failures += 1
+        delay = min(self.max_backoff, self.interval * 2 ** (self._failures - 1)) * random.uniform(0.5, 1.5)
+        server_delay = _retry_after_seconds(retry_after)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        print(f"Unable to get Sleuth status, retrying in {delay:.0f}s: {error}")
+        return delay
+
+    def _update(self, statuses: Dict[Target, Status]):
+        changed = []
+        with self._lock:
+            for target, status in statuses.items():
+                if target in self._subscribers and self._statuses.get(target) != status:
+                    self._statuses[target] = status
+                    changed.extend((callback, status) for callback in self._subscribers[target])
+        for callback, status in changed:
+            try:
+                callback(status)
+            except Exception as e:
+                print(f"Error showing Sleuth status: {e}")
+                traceback.print_exc()
+
+    def _run(self, stopped: threading.Event):
+        while not stopped.is_set():
+            self._wake.clear()
+            delay = self.poll()
+            if not stopped.is_set():
+                self._wake.wait(delay)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+_pollers: Dict[Tuple[str, str], StatusPoller] = {}
+_pollers_lock = threading.Lock()
+
+
+def get_poller(token: str, url: str = SLEUTH_STATUS_URL, interval: float = 30) -> StatusPoller:
+    """The shared poller for the account, so every key, and a reloaded script, polls together"""
+    with _pollers_lock:
+        key = (url, token)
+        if key not in _pollers:
+            _pollers[key] = StatusPoller(token, url=url, interval=interval)
+        return _pollers[key]
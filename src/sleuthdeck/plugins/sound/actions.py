@@ -1,16 +1,33 @@
-from pydub import AudioSegment
-from pydub.playback import play
+from typing import Optional
+
 from sleuthdeck.deck import Action
 from sleuthdeck.deck import ClickType
 from sleuthdeck.deck import Key
 from sleuthdeck.deck import KeyScene
+from sleuthdeck.plugins.sound.engine import get_engine
 
 
 class Play(Action):
-    def __init__(self, sound_file: str, gain: int = 0):
-        sound = AudioSegment.from_file(sound_file)
-        sound += gain
-        self._sound = sound
+    """Plays the sound without waiting for it to finish, so sounds can overlap"""
+
+    def __init__(self, sound_file: str, gain: int = 0, preload: bool = True):
+        self.sound_file = sound_file
+        self.gain = gain
+        if preload:
+            # Decoded once into the shared cache, however many keys play it
+            get_engine().samples.get(sound_file, gain)
+
+    def __call__(self, scene: KeyScene, key: Key, click: ClickType):
+        get_engine().play(self.sound_file, self.gain)
+
+
+class Stop(Action):
+    """Stops the given sound, or every sound, optionally fading it out over ``fade`` seconds"""
+
+    def __init__(self, sound_file: Optional[str] = None, gain: int = 0, fade: float = 0.0):
+        self.sound_file = sound_file
+        self.gain = gain
+        self.fade = fade
 
     def __call__(self, scene: KeyScene, key: Key, click: ClickType):
-        play(self._sound)
+        get_engine().stop(self.sound_file, self.gain, self.fade)
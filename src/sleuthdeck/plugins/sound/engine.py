@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+FRAME_RATE = 44100
+CHANNELS = 2
+
+
+@dataclass
+class Sample:
+    """Decoded 16-bit PCM, shaped (frames, channels), possibly backed by a file on disk"""
+
+    name: str
+    frames: np.ndarray
+
+    @property
+    def duration(self) -> float:
+        return len(self.frames) / FRAME_RATE
+
+
+class SampleCache:
+    """Decodes each sound file once per gain and shares the result between every player.
+
+    With a ``cache_dir``, decoded PCM is also written there and memory-mapped, so clips are
+    paged in as they play, the OS shares them between processes, and later runs skip the
+    decode. Entries are keyed by the file's path and modification time.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, float, float], Sample] = {}
+
+    def get(self, sound_file: str, gain: float = 0) -> Sample:
+        path = os.path.abspath(sound_file)
+        key = (path, os.stat(path).st_mtime, gain)
+        with self._lock:
+            sample = self._samples.get(key)
+        if sample is None:
+            sample = Sample(os.path.basename(path), self._load(key))
+            with self._lock:
+                sample = self._samples.setdefault(key, sample)
+        return sample
+
+    def _load(self, key: Tuple[str, float, float]) -> np.ndarray:
+        pcm_path = None
+        if self.cache_dir:
+            digest = hashlib.sha1(repr((key, FRAME_RATE, CHANNELS)).encode()).hexdigest()
+            pcm_path = os.path.join(self.cache_dir, f"{digest}.pcm")
+            if os.path.exists(pcm_path):
+                return np.memmap(pcm_path, dtype=np.int16, mode="r").reshape(-1, CHANNELS)
+
+        frames = decode(key[0], key[2])
+        if pcm_path is None:
+            return frames
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{pcm_path}.{os.getpid()}.tmp"
+        frames.tofile(tmp_path)
+        os.replace(tmp_path, pcm_path)
+        return np.memmap(pcm_path, dtype=np.int16, mode="r").reshape(-1, CHANNELS)
+
+
+def decode(sound_file: str, gain: float = 0) -> np.ndarray:
+    from pydub import AudioSegment
+
+    sound = AudioSegment.from_file(sound_file)
+    sound = sound.set_frame_rate(FRAME_RATE).set_channels(CHANNELS).set_sample_width(2)
+    if gain:
+        sound += gain
+    return np.frombuffer(sound.raw_data, dtype=np.int16).reshape(-1, CHANNELS)
+
+
+class Voice:
+    """One playing sound. The mixer reads it from its own thread, so it only ever moves forward."""
+
+    def __init__(self, sample: Sample):
+        self.sample = sample
+        self.position = 0
+        self.volume = 1.0
+        # Volume change per frame while fading out
+        self.fade_step = 0.0
+        self.done = threading.Event()
+
+    def stop(self, fade: float = 0.0):
+        if fade > 0:
+            self.fade_step = self.volume / (fade * FRAME_RATE)
+        else:
+            self.volume = 0.0
+            self.fade_step = 1.0
+
+    def mix_into(self, out: np.ndarray):
+        frames = self.sample.frames[self.position:self.position + len(out)]
+        count = len(frames)
+        chunk = frames.astype(np.float32)
+        if self.fade_step:
+            envelope = np.clip(self.volume - self.fade_step * np.arange(count, dtype=np.float32), 0, 1)
+            chunk *= envelope[:, None]
+            self.volume = max(0.0, self.volume - self.fade_step * count)
+        elif self.volume != 1.0:
+            chunk *= self.volume
+        out[:count] += chunk
+        self.position += count
+        if self.position >= len(self.sample.frames) or self.volume <= 0:
+            self.done.set()
+
+
+class Mixer:
+    """A single output stream that stays open and mixes every playing sound into it.
+
+    Starting a sound only adds a voice to the list the stream callback reads, so it starts
+    within one audio block and never blocks the caller. Needs the optional ``sounddevice``
+    package and an output device.
+    """
+
+    def __init__(self, block_size: int = 256):
+        import sounddevice
+
+        self._voices: List[Voice] = []
+        self._lock = threading.Lock()
+        self._stream = sounddevice.OutputStream(
+            samplerate=FRAME_RATE,
+            channels=CHANNELS,
+            dtype="int16",
+            blocksize=block_size,
+            latency="low",
+            callback=self._callback,
+        )
+        self._stream.start()
+
+    def play(self, sample: Sample) -> Voice:
+        voice = Voice(sample)
+        with self._lock:
+            self._voices.append(voice)
+        return voice
+
+    def stop(self, sample: Optional[Sample] = None, fade: float = 0.0):
+        with self._lock:
+            voices = [v for v in self._voices if sample is None or v.sample is sample]
+        for voice in voices:
+            voice.stop(fade)
+
+    def close(self):
+        self._stream.stop()
+        self._stream.close()
+
+    def _callback(self, outdata, frames, time, status):
+        with self._lock:
+            voices = list(self._voices)
+        mix = np.zeros((frames, CHANNELS), dtype=np.float32)
+        for voice in voices:
+            voice.mix_into(mix)
+        np.clip(mix, -32768, 32767, out=mix)
+        outdata[:] = mix.astype(np.int16)
+        finished = [v for v in voices if v.done.is_set()]
+        if finished:
+            with self._lock:
+                self._voices = [v for v in self._voices if not v.done.is_set()]
+
+
+class FallbackPlayer:
+    """Plays each sound with pydub on its own thread, for when there is no usable mixer"""
+
+    def play(self, sample: Sample) -> Voice:
+        from pydub import AudioSegment
+        from pydub.playback import play
+
+        voice = Voice(sample)
+        segment = AudioSegment(
+            data=np.ascontiguousarray(sample.frames).tobytes(),
+            sample_width=2,
+            frame_rate=FRAME_RATE,
+            channels=CHANNELS,
+        )
+
+        def run():
+            play(segment)
+            voice.done.set()
+
+        threading.Thread(target=run, daemon=True).start()
+        return voice
+
+    def stop(self, sample: Optional[Sample] = None, fade: float = 0.0):
+        print("Stopping sounds needs the sounddevice package")
+
+    def close(self):
+        pass
+
+
+class SoundEngine:
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.samples = SampleCache(cache_dir)
+        self._output = None
+        self._lock = threading.Lock()
+
+    @property
+    def output(self):
+        with self._lock:
+            if self._output is None:
+                try:
+                    self._output = Mixer()
+                except Exception as e:
+                    print(f"Audio mixer unavailable, falling back to pydub playback: {e}")
+                    self._output = FallbackPlayer()
+            return self._output
+
+    def play(self, sound_file: str, gain: float = 0) -> Voice:
+        return self.output.play(self.samples.get(sound_file, gain))
+
+    def stop(self, sound_file: Optional[str] = None, gain: float = 0, fade: float = 0.0):
+        sample = self.samples.get(sound_file, gain) if sound_file else None
+        self.output.stop(sample, fade)
+
+
+_engine: Optional[SoundEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> SoundEngine:
+    """The shared engine. Set SLEUTHDECK_SOUND_CACHE to a directory to memory-map decoded clips."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SoundEngine(os.getenv("SLEUTHDECK_SOUND_CACHE"))
+        return _engine
@@ -1,24 +1,29 @@
 from os import path
 from os.path import dirname
-from time import sleep
 from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import TYPE_CHECKING
 
-from selenium import webdriver
-from selenium.webdriver.chrome.webdriver import WebDriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.wait import WebDriverWait
 from sleuthdeck.colors import Color
 from sleuthdeck.deck import Action
 from sleuthdeck.deck import ClickType
 from sleuthdeck.deck import Key
 from sleuthdeck.deck import KeyScene
 from sleuthdeck.deck import Updatable
+from sleuthdeck.plugins.chrome.pool import DriverSpec
+from sleuthdeck.plugins.chrome.pool import get_pool
+from sleuthdeck.plugins.twitch.chat import TwitchChatReader
+from sleuthdeck.plugins.twitch.chat import watch_unread
 from sleuthdeck.keys import detect_windows_toggle
+from sleuthdeck.keys import FontAwesomeKey
 from sleuthdeck.keys import IconKey
 from sleuthdeck.windows import get_window
 
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.webdriver import WebDriver
+    from sleuthdeck.plugins.obs import OBS
+
 
 class TwitchKey(IconKey, Updatable):
     def __init__(
@@ -36,29 +41,27 @@ class TwitchKey(IconKey, Updatable):
         self._driver: Optional[WebDriver] = None
         self.dark_mode = dark_mode
         self._profile_dir = profile_dir
+        self._spec = DriverSpec(profile_dir=profile_dir, dark_mode=dark_mode)
         self._original_actions = list(actions)
 
     @property
     def driver(self):
         if not self._driver:
-            options = webdriver.ChromeOptions()
-            options.add_experimental_option("useAutomationExtension", False)
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_argument(f"user-data-dir={self._profile_dir}")
-            if self.dark_mode:
-                options.add_argument("--force-dark-mode")
-            self._driver = webdriver.Chrome(chrome_options=options)
+            self._driver = get_pool().acquire(self._spec)
         return self._driver
 
     def reset_driver(self):
+        """Hands the driver back to the pool, which parks it for the next time chat is opened"""
         if self._driver:
-            self._driver.close()
+            get_pool().release(self._driver)
         self._driver = None
 
     def connect(self, scene: KeyScene):
         super().connect(scene)
 
     async def start(self):
+        # Start Chrome while the scene is up rather than on the first press
+        get_pool().prewarm(self._spec)
         await detect_windows_toggle(
             "Twitch - Google Chrome",
             on_opened=self._on_opened,
@@ -76,31 +79,75 @@ class TwitchKey(IconKey, Updatable):
         self.actions.extend(self._original_actions)
 
 
+# Runs in the page: dismisses callouts and strips the header as they are added, for as long as
+# `watchMillis`, and calls back as soon as the ready selector matches (or the wait times out)
+CLEANUP_SCRIPT = """
+const [closeSelectors, removeSelectors, readySelector, watchMillis, done] = arguments;
+const clean = () => {
+    for (const selector of closeSelectors) {
+        document.querySelectorAll(selector).forEach(el => el.click());
+    }
+    for (const selector of removeSelectors) {
+        document.querySelectorAll(selector).forEach(el => el.remove());
+    }
+};
+let finished = false;
+const finish = ready => {
+    if (!finished) {
+        finished = true;
+        done(ready);
+    }
+};
+const observer = new MutationObserver(() => {
+    clean();
+    if (document.querySelector(readySelector)) {
+        finish(true);
+    }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true});
+setTimeout(() => observer.disconnect(), watchMillis);
+clean();
+if (document.querySelector(readySelector)) {
+    finish(true);
+}
+setTimeout(() => finish(false), watchMillis);
+"""
+
+
 class OpenChat(Action):
-    def __init__(self, channel: str, hide_header: bool = False):
+    """Opens the channel's popout chat, returning once the chat input is on the page.
+
+    Callouts matching ``callout_selectors`` are dismissed, and with ``hide_header`` elements
+    matching ``header_selectors`` are removed, by an observer in the page that keeps cleaning
+    up for ``watch_seconds`` as Twitch adds them.
+    """
+
+    def __init__(self, channel: str, hide_header: bool = False,
+                 callout_selectors: Sequence[str] = (".tw-callout__close",),
+                 header_selectors: Sequence[str] = (".stream-chat-header",),
+                 ready_selector: str = '[data-a-target="chat-input"]',
+                 watch_seconds: float = 20):
         self.channel = channel
         self.hide_header = hide_header
+        self.callout_selectors = list(callout_selectors)
+        self.header_selectors = list(header_selectors)
+        self.ready_selector = ready_selector
+        self.watch_seconds = watch_seconds
 
     def __call__(self, scene: KeyScene, key: Key, click: ClickType):
         driver: WebDriver = key.driver
         driver.get(f"https://www.twitch.tv/popout/{self.channel}/chat?popout=")
 
-        if self.hide_header:
-            WebDriverWait(driver, 20).until(
-                EC.visibility_of_element_located((By.CLASS_NAME, "hMQljH"))
-            )
-            driver.execute_script(
-                """
-               var l = document.getElementsByClassName("Layout-sc-nxg1ff-0 hMQljH")[0];
-               l.parentNode.removeChild(l);
-            """
-            )
-
-        for _ in range(3 * 10):
-            callouts = driver.find_elements(By.CLASS_NAME, "tw-callout__close")
-            for callout in callouts:
-                callout.click()
-            sleep(0.1)
+        driver.set_script_timeout(self.watch_seconds + 1)
+        ready = driver.execute_async_script(
+            CLEANUP_SCRIPT,
+            self.callout_selectors,
+            self.header_selectors if self.hide_header else [],
+            self.ready_selector,
+            int(self.watch_seconds * 1000),
+        )
+        if not ready:
+            print(f"Chat for {self.channel} didn't finish loading")
 
 
 class CloseChatAction(Action):
@@ -110,3 +157,60 @@ class CloseChatAction(Action):
             key.reset_driver()
         else:
             print("No chat to close")
+
+
+class ChatKey(FontAwesomeKey, Updatable):
+    """Shows how many chat messages have come in since one was last shown.
+
+    The count is redrawn at most ``fps`` times a second, and only when it changes, so a
+    busy chat costs the deck a few key images a second at most.
+    """
+
+    def __init__(self, chat: TwitchChatReader, actions: List[Action] = None, fps: float = 4):
+        super().__init__("solid/comment", text="0", actions=actions)
+        self.chat = chat
+        self.fps = fps
+
+    async def start(self):
+        self.chat.start()
+        await watch_unread(self.chat.buffer, self._show, self.fps)
+
+    def _show(self, unread: int):
+        self.update_icon(text=str(unread), enabled=unread > 0)
+
+
+class SelectChatMessage(Action):
+    """Moves the selection to an older (negative step) or newer (positive step) message"""
+
+    def __init__(self, chat: TwitchChatReader, step: int = -1):
+        self.chat = chat
+        self.step = step
+
+    def __call__(self, scene: KeyScene, key: Key, click: ClickType):
+        self.chat.buffer.select(self.step)
+        message = self.chat.buffer.selected()
+        if message:
+            print(f"Selected chat message: {message}")
+
+
+class ShowChatMessage(Action):
+    """Puts the selected chat message in an OBS text source and shows its callout, in one batch"""
+
+    def __init__(self, obs: "OBS", chat: TwitchChatReader, text_source: str = "Chat message text",
+                 callout: str = "Chat message callout", scene: str = "[Scene] Overlay - Full"):
+        self.obs = obs
+        self.chat = chat
+        self.text_source = text_source
+        self.callout = callout
+        self.scene = scene
+
+    def __call__(self, scene: KeyScene, key: Key, click: ClickType):
+        message = self.chat.buffer.selected()
+        if message is None:
+            print("No chat message to show")
+            return
+        (self.obs.batch()
+            .set_item_property(self.text_source, "text", str(message))
+            .set_scene_item_enabled(self.scene, self.callout, True)
+            .submit())
+        self.chat.buffer.mark_read()
@@ -0,0 +1,300 @@
+"""Reads Twitch chat over IRC-over-websocket into a bounded buffer of recent messages."""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+
+TWITCH_IRC_URL = "wss://irc-ws.chat.twitch.tv:443"
+
+_TAG_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+
+
+@dataclass
+class IrcMessage:
+    command: str
+    params: List[str] = field(default_factory=list)
+    tags: Dict[str, str] = field(default_factory=dict)
+    prefix: Optional[str] = None
+
+    @property
+    def nick(self) -> Optional[str]:
+        return self.prefix.split("!", 1)[0] if self.prefix else None
+
+
+def _unescape_tag(value: str) -> str:
+    if "\\" not in value:
+        return value
+    out = []
+    chars = iter(value)
+    for c in chars:
+        if c == "\\":
+            nxt = next(chars, "")
+            out.append(_TAG_ESCAPES.get(nxt, nxt))
+        else:
+            out.append(c)
+    return "".join(out)
+
+
+def parse_line(line: str) -> IrcMessage:
+    tags = {}
+    prefix = None
+    if line.startswith("@"):
+        raw_tags, line = line[1:].split(" ", 1)
+        for tag in raw_tags.split(";"):
+            key, _, value = tag.partition("=")
+            tags[key] = _unescape_tag(value)
+        line = line.lstrip(" ")
+    if line.startswith(":"):
+        prefix, line = line[1:].split(" ", 1)
+        line = line.lstrip(" ")
+
+    trailing = None
+    if " :" in line:
+        line, trailing = line.split(" :", 1)
+    params = line.split()
+    command = params.pop(0) if params else ""
+    if trailing is not None:
+        params.append(trailing)
+    return IrcMessage(command=command, params=params, tags=tags, prefix=prefix)
+
+
+class IrcParser:
+    """Splits a stream of IRC data into messages, holding on to any partial last line"""
+
+    def __init__(self):
+        self._partial = ""
+
+    def feed(self, data: str) -> List[IrcMessage]:
+        data = self._partial + data
+        lines = data.split("\r\n")
+        self._partial = lines.pop()
+        return [parse_line(line) for line in lines if line]
+
+
+@dataclass
+class ChatMessage:
+    id: str
+    channel: str
+    user: str
+    display_name: str
+    text: str
+    received: float
+    badges: List[str] = field(default_factory=list)
+    is_action: bool = False
+
+    @classmethod
+    def from_irc(cls, msg: IrcMessage) -> ChatMessage:
+        text = msg.params[-1] if len(msg.params) > 1 else ""
+        is_action = text.startswith("\x01ACTION ") and text.endswith("\x01")
+        if is_action:
+            text = text[8:-1]
+        user = msg.nick or ""
+        return cls(
+            id=msg.tags.get("id", ""),
+            channel=msg.params[0].lstrip("#") if msg.params else "",
+            user=user,
+            display_name=msg.tags.get("display-name") or user,
+            text=text,
+            received=time.time(),
+            badges=[b.split("/", 1)[0] for b in msg.tags.get("badges", "").split(",") if b],
+            is_action=is_action,
+        )
+
+    def __str__(self):
+        return f"{self.display_name}: {self.text}"
+
+
+ChatFilter = Callable[[ChatMessage], bool]
+
+
+def exclude_users(*users: str) -> ChatFilter:
+    names = {u.lower() for u in users}
+    return lambda m: m.user.lower() not in names
+
+
+def exclude_commands(prefix: str = "!") -> ChatFilter:
+    return lambda m: not m.text.startswith(prefix)
+
+
+def min_length(length: int) -> ChatFilter:
+    return lambda m: len(m.text.strip()) >= length
+
+
+def mentioning(*words: str) -> ChatFilter:
+    lowered = [w.lower() for w in words]
+    return lambda m: any(w in m.text.lower() for w in lowered)
+
+
+class ChatBuffer:
+    """The most recent chat messages that pass the filters, with an unread count and a selection.
+
+    ``version`` goes up on every change, so readers can cheaply tell whether anything they
+    show is out of date.
+    """
+
+    def __init__(self, size: int = 200, filters: Iterable[ChatFilter] = ()):
+        self.filters = list(filters)
+        self.version = 0
+        self._messages: Deque[ChatMessage] = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._unread = 0
+        # Offset from the newest message, or None to follow the newest
+        self._selected: Optional[int] = None
+
+    @property
+    def unread(self) -> int:
+        return self._unread
+
+    def add(self, message: ChatMessage) -> bool:
+        if not all(f(message) for f in self.filters):
+            return False
+        with self._lock:
+            self._messages.append(message)
+            self._unread = min(self._unread + 1, len(self._messages))
+            if self._selected is not None:
+                self._selected = min(self._selected + 1, len(self._messages) - 1)
+            self.version += 1
+        return True
+
+    def recent(self, count: int) -> List[ChatMessage]:
+        with self._lock:
+            return list(self._messages)[-count:]
+
+    def select(self, step: int):
+        """Moves the selection towards older (negative) or newer (positive) messages"""
+        with self._lock:
+            if not self._messages:
+                return
+            offset = (self._selected or 0) - step
+            offset = max(0, min(offset, len(self._messages) - 1))
+            self._selected = offset or None
+            self.version += 1
+
+    def selected(self) -> Optional[ChatMessage]:
+        with self._lock:
+            if not self._messages:
+                return None
+            return self._messages[-1 - (self._selected or 0)]
+
+    def mark_read(self):
+        with self._lock:
+            self._unread = 0
+            self._selected = None
+            self.version += 1
+
+
+async def watch_unread(buffer: ChatBuffer, callback: Callable[[int], None], fps: float = 4):
+    """Calls back with the unread count whenever it has changed, at most ``fps`` times a second.
+
+    However fast messages arrive, a burst is drawn as one change per frame.
+    """
+    shown = None
+    while True:
+        unread = buffer.unread
+        if unread != shown:
+            shown = unread
+            callback(unread)
+        await asyncio.sleep(1 / fps)
+
+
+class TwitchChatReader:
+    """Reads a channel's chat into a :class:`ChatBuffer`, reconnecting when the connection drops.
+
+    Connects anonymously unless a nick and oauth token are given. Point ``url`` at a local
+    server to run against a stand-in instead of Twitch.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        buffer: Optional[ChatBuffer] = None,
+        url: str = TWITCH_IRC_URL,
+        nick: Optional[str] = None,
+        token: Optional[str] = None,
+        min_backoff: float = 1,
+        max_backoff: float = 60,
+    ):
+        self.channel = channel.lower().lstrip("#")
+        self.buffer = buffer or ChatBuffer()
+        self.url = url
+        self.nick = nick or f"justinfan{random.randint(10000, 99999)}"
+        self.token = token
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connected = threading.Event()
+        self._running = False
+        self._ws = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        if not self._thread.is_alive():
+            self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+
+    def stop(self):
+        self._running = False
+        if self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+
+    async def _run(self):
+        attempt = 0
+        while self._running:
+            try:
+                await self._read()
+                attempt = 0
+            except (OSError, WebSocketException) as e:
+                # Includes a failed handshake, such as a 503 while Twitch is down
+                print(f"Twitch chat disconnected: {e}")
+            except Exception as e:
+                print(f"Error reading Twitch chat: {e}")
+                traceback.print_exc()
+            finally:
+                self.connected.clear()
+                self._ws = None
+            if not self._running:
+                break
+            delay = min(self.max_backoff, self.min_backoff * 2**attempt) * random.uniform(0.5, 1.5)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _read(self):
+        async with connect(self.url, compression=None) as ws:
+            self._ws = ws
+            await ws.send("CAP REQ :twitch.tv/tags twitch.tv/commands")
+            if self.token:
+                await ws.send(f"PASS oauth:{self.token.removeprefix('oauth:')}")
+            await ws.send(f"NICK {self.nick}")
+            await ws.send(f"JOIN #{self.channel}")
+
+            parser = IrcParser()
+            async for data in ws:
+                for msg in parser.feed(data if isinstance(data, str) else data.decode()):
+                    if msg.command == "PING":
+                        await ws.send(f"PONG :{msg.params[-1] if msg.params else 'tmi.twitch.tv'}")
+                    elif msg.command == "PRIVMSG":
+                        self.buffer.add(ChatMessage.from_irc(msg))
+                    elif msg.command == "JOIN" and msg.nick == self.nick:
+                        self.connected.set()
+                    elif msg.command == "RECONNECT":
+                        # Twitch is about to restart the server, so go and find another
+                        await ws.close()
+                        return
@@ -1 +1,3 @@
-from .keys import *
+from sleuthdeck.plugins import lazy_exports
+
+__getattr__ = lazy_exports(__name__, default="keys")
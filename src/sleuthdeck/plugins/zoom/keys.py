@@ -14,6 +14,7 @@ from sleuthdeck.deck import Updatable
 from sleuthdeck.keys import IconKey
 from sleuthdeck.keys import detect_windows_toggle
 from sleuthdeck.windows import get_window
+from sleuthdeck.x11 import get_registry
 
 
 class StartMeetingKey(IconKey, Updatable):
@@ -75,12 +76,14 @@ class EndMeeting(SendHotkey):
         super().__call__(scene, key, click)
         w = get_window("Zoom Meeting")
         if w:
-            w.focus()
+            # Give Zoom time to show its confirmation before accepting it
             sleep(.5)
             print("pressing enter")
-            from pyautogui import press
-            press("enter")
+            registry = get_registry()
+            if registry:
+                registry.send_hotkey(["enter"], w.window_id)
+            else:
+                w.focus()
+                from pyautogui import press
+                press("enter")
             print("pressed enter")
-
-
-
@@ -0,0 +1,401 @@
+"""Runs child processes off the calling thread, with timeouts, a concurrency cap and their output logged."""
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import MutableSequence
+from typing import Optional
+from typing import Tuple
+
+import psutil
+
+# Long enough for any sane line of output, e.g. a full `wmctrl -lx` entry
+LINE_LIMIT = 2**20
+# Lines of output kept from a command, for when one is far chattier than expected
+OUTPUT_LINES = 10000
+# Where commands without a timeout take their slot, whatever pool they asked for
+UNTIMED_POOL = "untimed"
+
+
+@dataclass
+class ProcessResult:
+    args: List[str]
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+
+class App:
+    """A long-running program, tracked by pid from when it starts until it exits"""
+
+    def __init__(self, name: str, output_lines: int = 200):
+        self.name = name
+        self.pid: Optional[int] = None
+        self.returncode: Optional[int] = None
+        self.ready = threading.Event()
+        self.exited = threading.Event()
+        # The last lines it wrote, when it is our child rather than adopted
+        self.output: Deque[str] = deque(maxlen=output_lines)
+
+    @property
+    def running(self) -> bool:
+        return self.pid is not None and not self.exited.is_set()
+
+    def __repr__(self):
+        state = "exited" if self.exited.is_set() else "ready" if self.ready.is_set() else "starting"
+        return f"App({self.name!r}, pid={self.pid}, {state})"
+
+
+AppCallback = Callable[[App], None]
+
+
+class ProcessSupervisor:
+    """Runs commands and launches apps as asyncio subprocesses on a loop thread of its own.
+
+    :meth:`run` is for commands that finish: at most ``max_concurrent`` from each pool run at
+    once, each is stopped if it outlives its timeout, and output is logged line by line as it
+    arrives. Commands without a timeout may never finish, so they share a pool of their own
+    rather than hold up the commands that will.
+    :meth:`launch` and :meth:`adopt` are for apps that stay up: they are tracked by pid, and
+    listeners hear when each starts, becomes ready and exits, on a worker thread.
+    """
+
+    def __init__(self, max_concurrent: int = 8, kill_after: float = 2, output_grace: float = 0.5):
+        self.max_concurrent = max_concurrent
+        self.kill_after = kill_after
+        # Launchers hand their output pipes to the program they start, so output isn't waited
+        # on for longer than this once the process itself has exited
+        self.output_grace = output_grace
+        self._lock = threading.Lock()
+        self._apps: Dict[str, App] = {}
+        self._listeners: Dict[str, List[AppCallback]] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="processes")
+        self._thread.start()
+
+    def run(
+        self,
+        cmd: str,
+        *args: str,
+        timeout: Optional[float] = None,
+        log: bool = True,
+        pool: str = "commands",
+    ) -> Future:
+        """Runs the command, returning a future for its :class:`ProcessResult`.
+
+        The timeout includes any time spent waiting for a free slot in the pool.
+        """
+        return asyncio.run_coroutine_threadsafe(self._run([cmd, *args], timeout, log, pool), self._loop)
+
+    def launch(
+        self,
+        name: str,
+        cmd: str,
+        *args: str,
+        match: Optional[str] = None,
+        ready: Optional[str] = None,
+        start_timeout: float = 30,
+        log: bool = False,
+    ) -> App:
+        """Starts an app unless it is already running, and tracks it until it exits.
+
+        If the command hands off to the real program, as ``gtk-launch`` and ``xdg-open`` do,
+        ``match`` is a pattern for the program's command line so it can be found and tracked
+        instead. Otherwise the app is ready once a line of its output matches ``ready``, or
+        straight away without one.
+        """
+        with self._lock:
+            app = self._apps.get(name)
+            if app is not None and (app.running or (app.pid is None and not app.exited.is_set())):
+                return app
+            app = self._apps[name] = App(name)
+        asyncio.run_coroutine_threadsafe(
+            self._launch(app, [cmd, *args], match, ready, start_timeout, log), self._loop
+        )
+        return app
+
+    def adopt(self, name: str, match: str) -> Optional[App]:
+        """Tracks an app that is already running, found by a pattern for its command line"""
+        with self._lock:
+            app = self._apps.get(name)
+            if app is not None and app.running:
+                return app
+        pids = find_processes(match)
+        if not pids:
+            return None
+        with self._lock:
+            app = self._apps[name] = App(name)
+        self._started(app, pids[0])
+        self._ready(app)
+        asyncio.run_coroutine_threadsafe(self._track(app), self._loop)
+        return app
+
+    def app(self, name: str) -> Optional[App]:
+        with self._lock:
+            return self._apps.get(name)
+
+    def on_change(self, name: str, callback: AppCallback):
+        """Calls back with the app each time the named app starts, becomes ready or exits"""
+        with self._lock:
+            self._listeners.setdefault(name, []).append(callback)
+
+    def remove_listener(self, name: str, callback: AppCallback):
+        with self._lock:
+            callbacks = self._listeners.get(name, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    async def _run(self, args: List[str], timeout: Optional[float], log: bool, pool: str) -> ProcessResult:
+        name = os.path.basename(args[0])
+        if timeout is None:
+            pool = UNTIMED_POOL
+        slots = self._slots.get(pool)
+        if slots is None:
+            slots = self._slots[pool] = asyncio.Semaphore(self.max_concurrent)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            print(f"{name} waited longer than {timeout}s to start, giving up")
+            return ProcessResult(args, None, "", "", timed_out=True)
+        try:
+            remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            return await self._run_now(args, name, remaining, log)
+        finally:
+            slots.release()
+
+    async def _run_now(self, args: List[str], name: str, timeout: Optional[float], log: bool) -> ProcessResult:
+        try:
+            proc, exited = await self._spawn(args)
+        except OSError as e:
+            print(f"Unable to run {name}: {e}")
+            return ProcessResult(args, None, "", str(e))
+
+        stdout: Deque[str] = deque(maxlen=OUTPUT_LINES)
+        stderr: Deque[str] = deque(maxlen=OUTPUT_LINES)
+        pumps = [
+            asyncio.create_task(_pump(proc.stdout, stdout, name if log else None)),
+            asyncio.create_task(_pump(proc.stderr, stderr, name if log else None)),
+        ]
+        timed_out = False
+        try:
+            await asyncio.wait_for(asyncio.shield(exited), timeout)
+        except asyncio.TimeoutError:
+            print(f"{name} took longer than {timeout}s, stopping it")
+            timed_out = True
+            await self._stop(proc, exited)
+        await asyncio.wait(pumps, timeout=self.output_grace)
+        return ProcessResult(
+            args, proc.returncode, "".join(stdout), "".join(stderr), timed_out=timed_out
+        )
+
+    async def _launch(
+        self,
+        app: App,
+        args: List[str],
+        match: Optional[str],
+        ready: Optional[str],
+        start_timeout: float,
+        log: bool,
+    ):
+        if match is not None:
+            # Start times come from the boot time, which is only given to the second
+            launched = time.time() - 1
+            result = await self._run(args, start_timeout, log, "launchers")
+            pid = await self._find(match, launched, start_timeout)
+            if pid is None:
+                print(f"{app.name} didn't start")
+                self._exited(app, result.returncode)
+                return
+            self._started(app, pid)
+            self._ready(app)
+            await self._track(app)
+            return
+
+        try:
+            proc, exited = await self._spawn(args)
+        except OSError as e:
+            print(f"Unable to launch {app.name}: {e}")
+            self._exited(app, None)
+            return
+        self._started(app, proc.pid)
+        pattern = re.compile(ready) if ready else None
+        if pattern is None:
+            self._ready(app)
+
+        def on_line(line: str):
+            if pattern is not None and not app.ready.is_set() and pattern.search(line):
+                self._ready(app)
+
+        prefix = app.name if log else None
+        pumps = [
+            asyncio.create_task(_pump(proc.stdout, app.output, prefix, on_line)),
+            asyncio.create_task(_pump(proc.stderr, app.output, prefix, on_line)),
+        ]
+        await exited
+        await asyncio.wait(pumps, timeout=self.output_grace)
+        self._exited(app, proc.returncode)
+
+    async def _spawn(self, args: List[str]) -> Tuple[asyncio.subprocess.Process, asyncio.Future]:
+        """Starts the process, along with a future for when it exits"""
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.subprocess_exec(
+            lambda: _Protocol(LINE_LIMIT, loop),
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        return asyncio.subprocess.Process(transport, protocol, loop), protocol.exited
+
+    async def _stop(self, proc: asyncio.subprocess.Process, exited: asyncio.Future):
+        try:
+            proc.terminate()
+            try:
+                await asyncio.wait_for(asyncio.shield(exited), self.kill_after)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await exited
+        except ProcessLookupError:
+            pass
+
+    async def _find(self, match: str, since: float, timeout: float) -> Optional[int]:
+        deadline = time.monotonic() + timeout
+        while True:
+            pids = find_processes(match, since=since)
+            if pids or time.monotonic() > deadline:
+                return pids[0] if pids else None
+            await asyncio.sleep(0.25)
+
+    async def _track(self, app: App):
+        await wait_for_exit(app.pid)
+        self._exited(app, None)
+
+    def _started(self, app: App, pid: int):
+        print(f"{app.name} started with pid {pid}")
+        app.pid = pid
+        self._notify(app)
+
+    def _ready(self, app: App):
+        app.ready.set()
+        self._notify(app)
+
+    def _exited(self, app: App, returncode: Optional[int]):
+        if app.pid is not None:
+            print(f"{app.name} (pid {app.pid}) exited" + (f" with {returncode}" if returncode else ""))
+        app.returncode = returncode
+        app.exited.set()
+        self._notify(app)
+
+    def _notify(self, app: App):
+        with self._lock:
+            callbacks = list(self._listeners.get(app.name, []))
+        for callback in callbacks:
+            self._loop.call_soon_threadsafe(self._loop.run_in_executor, None, _call, callback, app)
+
+
+class _Protocol(asyncio.subprocess.SubprocessStreamProtocol):
+    """Tells as soon as the process exits.
+
+    ``Process.wait()`` also waits for the output pipes to close, which for a launcher like
+    ``xdg-open`` is when the program it started exits, as that inherits them. What is still
+    in the pipes after the process exits is drained in the background, so the program never
+    blocks on a full pipe.
+    """
+
+    def __init__(self, limit: int, loop: asyncio.AbstractEventLoop):
+        super().__init__(limit=limit, loop=loop)
+        self.exited = loop.create_future()
+
+    def process_exited(self):
+        super().process_exited()
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+
+def _call(callback: AppCallback, app: App):
+    try:
+        callback(app)
+    except Exception as e:
+        print(f"Error handling {app.name} change: {e}")
+        traceback.print_exc()
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    sink: MutableSequence[str],
+    prefix: Optional[str],
+    on_line: Optional[Callable[[str], None]] = None,
+):
+    async for raw in stream:
+        line = raw.decode(errors="replace")
+        sink.append(line)
+        if prefix:
+            print(f"[{prefix}] {line.rstrip()}")
+        if on_line:
+            on_line(line)
+
+
+def find_processes(pattern: str, since: Optional[float] = None) -> List[int]:
+    """Pids of the processes whose command line matches, oldest first, optionally only those started since"""
+    regex = re.compile(pattern)
+    found = []
+    for proc in psutil.process_iter(["pid", "cmdline", "create_time"]):
+        cmdline = " ".join(proc.info["cmdline"] or [])
+        if proc.pid == os.getpid() or not cmdline or not regex.search(cmdline):
+            continue
+        created = proc.info["create_time"] or 0.0
+        if since is None or created >= since:
+            found.append((created, proc.pid))
+    return [pid for _, pid in sorted(found)]
+
+
+async def wait_for_exit(pid: int):
+    """Waits for a process that isn't our child to exit, using a pidfd where the OS has them"""
+    try:
+        fd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        return
+    except (AttributeError, OSError):
+        while psutil.pid_exists(pid):
+            await asyncio.sleep(1)
+        return
+
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    # A pidfd becomes readable once the process exits
+    loop.add_reader(fd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
+
+
+_supervisor: Optional[ProcessSupervisor] = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor() -> ProcessSupervisor:
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ProcessSupervisor()
+        return _supervisor
@@ -0,0 +1,107 @@
+"""Times how long each module takes to import, like ``python -X importtime`` but switchable at runtime."""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from importlib.abc import MetaPathFinder
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    # Time in the module's own code, then including the modules it imported
+    self_time: float = 0.0
+    total_time: float = 0.0
+
+
+class ImportProfiler(MetaPathFinder):
+    """Records the import time of every module loaded while installed.
+
+    Sits first on ``sys.meta_path``, finds modules with the finders after it and wraps their
+    loaders in a timer. Modules already imported aren't loaded again, so aren't counted.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, ImportTiming] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def clear(self):
+        with self._lock:
+            self.timings.clear()
+
+    def find_spec(self, fullname, path, target=None):
+        finders = sys.meta_path[sys.meta_path.index(self) + 1:] if self in sys.meta_path else []
+        for finder in finders:
+            find_spec = getattr(finder, "find_spec", None)
+            spec = find_spec(fullname, path, target) if find_spec else None
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def timed(self, name: str, call: Callable[[], T]) -> T:
+        stack: List[float] = self._local.__dict__.setdefault("stack", [])
+        # Time spent importing other modules from within this one
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                timing = self.timings.setdefault(name, ImportTiming(name))
+                timing.self_time += elapsed - children
+                timing.total_time += elapsed
+
+    def report(self, limit: int = 25) -> str:
+        with self._lock:
+            timings = sorted(self.timings.values(), key=lambda t: t.self_time, reverse=True)
+        total = sum(t.self_time for t in timings)
+        lines = [f"Imported {len(timings)} modules in {total * 1000:.0f}ms", f"{'self ms':>9} {'total ms':>9}  module"]
+        for timing in timings[:limit]:
+            lines.append(f"{timing.self_time * 1000:9.1f} {timing.total_time * 1000:9.1f}  {timing.module}")
+        return "\n".join(lines)
+
+
+class _TimedLoader:
+    def __init__(self, loader, profiler: ImportProfiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        # Extension modules do their work here rather than in exec_module
+        return self._profiler.timed(spec.name, lambda: self._loader.create_module(spec))
+
+    def exec_module(self, module):
+        try:
+            self._profiler.timed(module.__name__, lambda: self._loader.exec_module(module))
+        finally:
+            # Leave the module with its real loader, which other tools may check the type of
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
@@ -1,6 +1,7 @@
-import subprocess
+from sleuthdeck.processes import get_supervisor
 
 
-def run(cmd, *args) -> str:
-    process = subprocess.run([cmd] + list(args), stdout=subprocess.PIPE, text=True)
-    return process.stdout
+def run(cmd, *args, timeout: float = 10) -> str:
+    # A pool of its own, so window lookups never wait behind commands run from keys
+    result = get_supervisor().run(cmd, *args, timeout=timeout, log=False, pool="shell").result()
+    return result.stdout
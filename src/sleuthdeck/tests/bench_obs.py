@@ -0,0 +1,44 @@
+"""Benchmarks OBS client throughput and latency against the mock server.
+
+Run with ``python -m sleuthdeck.tests.bench_obs`` from the ``src`` directory.
+"""
+import statistics
+import time
+
+from sleuthdeck.plugins.obs.client import ReconnectingObsClient
+from sleuthdeck.plugins.obs.mock_server import MockObsServer
+
+
+def run(latency: float, in_flight: int, total: int = 500):
+    with MockObsServer(password="secret", latency=latency) as server:
+        client = ReconnectingObsClient("127.0.0.1", server.port, "secret")
+        client.connect()
+
+        start = time.monotonic()
+        futures = []
+        for _ in range(total):
+            futures.append(client.req_future("GetCurrentProgramScene"))
+            if len(futures) >= in_flight:
+                futures.pop(0).result(timeout=10)
+        for future in futures:
+            future.result(timeout=10)
+        elapsed = time.monotonic() - start
+        client.stop()
+
+        durations = sorted(e.duration for e in server.timeline)
+        p95 = durations[int(len(durations) * 0.95)]
+        print(
+            f"latency {latency * 1000:4.0f}ms, {in_flight:3} in flight: "
+            f"{total / elapsed:8.1f} req/s, "
+            f"server median {statistics.median(durations) * 1000:.2f}ms, p95 {p95 * 1000:.2f}ms"
+        )
+
+
+def main():
+    for latency in (0.0, 0.005):
+        for in_flight in (1, 10, 100):
+            run(latency, in_flight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmarks parsing and diffing ``wmctrl -lx`` dumps.
+
+Run with ``python -m sleuthdeck.tests.bench_windows`` from the ``src`` directory.
+"""
+import random
+import timeit
+
+from sleuthdeck.windows import WindowListParser
+
+CLASSES = [
+    "obs.obs",
+    "google-chrome (/home/mrdon/.config/google-chrome).Google-chrome",
+    "zoom.zoom",
+    "gnome-terminal-server.Gnome-terminal",
+    "jetbrains-pycharm.jetbrains-pycharm",
+]
+
+
+def make_dump(count: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(count):
+        window_class = rnd.choice(CLASSES)
+        title = " ".join(rnd.choice(["Twitch", "Chat", "-", "Google", "Chrome", "Zoom", "Meeting"])
+                         for _ in range(rnd.randint(1, 8)))
+        lines.append(f"0x{i + 0x1000000:08x}  {rnd.randint(0, 3)} {window_class:<20} mrdon-home {title}")
+    return "\n".join(lines) + "\n"
+
+
+def retitle_one(dump: str) -> str:
+    lines = dump.splitlines()
+    lines[len(lines) // 2] += " (edited)"
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    for count in (100, 300, 800):
+        dump = make_dump(count)
+        changed = retitle_one(dump)
+        number = 200
+
+        cold = timeit.timeit(lambda: WindowListParser().parse(dump), number=number)
+
+        parser = WindowListParser()
+        parser.parse(dump)
+        warm = timeit.timeit(lambda: parser.parse(dump), number=number)
+
+        differ = WindowListParser()
+        snapshots = [dump, changed]
+
+        def diff():
+            snapshots.reverse()
+            return differ.diff(snapshots[0])
+
+        diffs = timeit.timeit(diff, number=number)
+
+        print(
+            f"{count:4} windows: "
+            f"cold parse {cold / number * 1000:.3f}ms, "
+            f"warm parse {warm / number * 1000:.3f}ms, "
+            f"diff {diffs / number * 1000:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
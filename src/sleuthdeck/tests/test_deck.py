@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+from PIL import Image
+
+from sleuthdeck.deck import Deck
+from sleuthdeck.deck import Key
+
+
+class FakeStreamDeck:
+    KEY_COUNT = 6
+    KEY_COLS = 3
+
+    def __init__(self):
+        self.writes = []
+        self._open = False
+        self._lock = threading.RLock()
+
+    def id(self):
+        return "fake"
+
+    def open(self):
+        self._open = True
+
+    def close(self):
+        self._open = False
+
+    def is_open(self):
+        return self._open
+
+    def reset(self):
+        pass
+
+    def key_image_format(self):
+        return {"size": (72, 72), "format": "BMP", "flip": (False, False), "rotation": 0}
+
+    def set_key_image(self, pos, image):
+        self.writes.append(pos)
+
+    def set_key_callback(self, callback):
+        pass
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class FakeHotkeys:
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def use(self, keymap):
+        pass
+
+    def reset(self):
+        pass
+
+
+def script(*colors: str, closed: list):
+    def run(deck: Deck):
+        main = deck.new_key_scene()
+        other = deck.new_key_scene()
+        for pos, color in enumerate(colors):
+            main.add(pos, Key(image=Image.new("RGB", (72, 72), color)))
+        other.add(0, Key(image=Image.new("RGB", (72, 72), "white")))
+        deck.on_close(lambda: closed.append(colors))
+        deck.change_scene(main)
+
+    return run
+
+
+def test_reload_only_writes_changed_keys():
+    stream_deck = FakeStreamDeck()
+    deck = Deck(stream_deck, FakeHotkeys())
+    closed = []
+    try:
+        script("red", "blue", "green", closed=closed)(deck)
+        old = deck.scene
+        stream_deck.writes.clear()
+
+        deck.reload(script("red", "yellow", "green", closed=closed))
+
+        assert [1] == stream_deck.writes
+        assert [("red", "blue", "green")] == closed
+        assert deck.scene is not old
+        assert deck.scene.active and not old.active
+
+        def broken(deck: Deck):
+            deck.new_key_scene()
+            raise RuntimeError("typo")
+
+        # A script that fails to build leaves the old scenes showing
+        current = deck.scene
+        with pytest.raises(RuntimeError):
+            deck.reload(broken)
+        assert deck.scene is current
+        assert current.active
+    finally:
+        deck.close()
@@ -0,0 +1,61 @@
+from selenium.common.exceptions import WebDriverException
+
+from sleuthdeck.plugins.chrome.pool import DriverPool
+from sleuthdeck.plugins.chrome.pool import DriverSpec
+
+
+class FakeDriver:
+    def __init__(self):
+        self.url = None
+        self.quit_called = False
+        self.broken = False
+
+    @property
+    def current_window_handle(self):
+        if self.broken:
+            raise WebDriverException("gone")
+        return "window"
+
+    def get(self, url):
+        self.url = url
+
+    def minimize_window(self):
+        pass
+
+    def set_window_position(self, x, y):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_prewarmed_driver_is_reused():
+    started = []
+    pool = DriverPool(factory=lambda spec: started.append(FakeDriver()) or started[-1])
+    spec = DriverSpec(profile_dir="/tmp/profile")
+
+    pool.prewarm(spec).result(timeout=5)
+    driver = pool.acquire(spec)
+    assert [driver] == started
+    # The profile is in use, so there's nothing to prewarm until it comes back
+    assert pool.prewarm(spec) is None
+
+    pool.release(driver)
+    assert "about:blank" == driver.url
+    assert driver is pool.acquire(spec)
+    assert 1 == len(started)
+
+
+def test_broken_and_excess_drivers_are_quit():
+    pool = DriverPool(max_idle=1, factory=lambda spec: FakeDriver())
+    first = pool.acquire(DriverSpec(profile_dir="a"))
+    second = pool.acquire(DriverSpec(profile_dir="b"))
+
+    pool.release(first)
+    pool.release(second)
+    assert first.quit_called
+
+    second.broken = True
+    replacement = pool.acquire(DriverSpec(profile_dir="b"))
+    assert second.quit_called
+    assert replacement is not second
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from sleuthdeck.plugins.presentation.library import EpisodeError
+from sleuthdeck.plugins.presentation.library import EpisodeLibrary
+from sleuthdeck.plugins.presentation.library import parse_event
+
+EPISODE = """
+title: "DORA Metrics 101"
+guest:
+  name: Kate
+  title: Head of Engineering
+sections:
+  - title: Welcome!
+    byline: Let's make this interactive
+  - title: "Questions"
+    byline:
+    scene: "Me and Guest"
+"""
+
+
+def test_parse_event():
+    import yaml
+
+    event = parse_event(yaml.safe_load(EPISODE), "s01e01")
+
+    assert "s01e01" == event.id
+    assert ["Welcome!", "Questions"] == [s.title for s in event.sections]
+    assert "" == event.sections[1].byline
+    assert "Me and Guest" == event.sections[1].scene
+    assert "Kate" == event.guests[0].name
+    assert event.guests[1] is None
+
+
+def test_parse_event_requires_section_titles():
+    with pytest.raises(EpisodeError):
+        parse_event({"title": "Broken", "sections": [{"byline": "No title"}]})
+
+
+def test_library_reparses_only_changed_files(tmp_path):
+    (tmp_path / "s01e01.yml").write_text(EPISODE)
+    (tmp_path / "s01e02.yml").write_text('title: "Second"\nsections: []\n')
+    (tmp_path / "notes.txt").write_text("not an episode")
+
+    library = EpisodeLibrary(str(tmp_path))
+    changed = []
+    library.on_change(changed.append)
+    assert ["s01e01", "s01e02"] == [e.id for e in library.episodes]
+
+    first = library.get("s01e01")
+    library.refresh()
+    assert first is library.get("s01e01")
+    assert [] == changed
+
+    path = tmp_path / "s01e02.yml"
+    path.write_text('title: "Second, renamed"\nsections: []\n')
+    os.utime(path, (1, 1))
+    library.refresh()
+    assert ["s01e02"] == changed
+    assert "Second, renamed" == library.get("s01e02").title
+
+    path.write_text("title: [broken")
+    os.utime(path, (2, 2))
+    library.refresh(str(path))
+    assert "Second, renamed" == library.get("s01e02").title
+    assert "s01e02" in library.errors
+
+    path.unlink()
+    library.refresh()
+    assert library.get("s01e02") is None
@@ -0,0 +1,40 @@
+import pytest
+
+keyboard = pytest.importorskip("pynput.keyboard", exc_type=ImportError)
+mouse = pytest.importorskip("pynput.mouse", exc_type=ImportError)
+
+from sleuthdeck.hotkeys import Hotkeys  # noqa: E402
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_named_keys_and_mouse_buttons_fire_bindings():
+    hotkeys = Hotkeys(InlineExecutor())
+    fired = []
+    hotkeys.register("ctrl+shift+f5", lambda: fired.append("reload"))
+    hotkeys.register("mouse8", lambda: fired.append("zoom"))
+
+    hotkeys.on_press(keyboard.Key.ctrl_l)
+    hotkeys.on_press(keyboard.Key.shift_r)
+    hotkeys.on_press(keyboard.Key.f5)
+    assert ["reload"] == fired
+
+    hotkeys.on_release(keyboard.Key.f5)
+    hotkeys.on_release(keyboard.Key.shift_r)
+    hotkeys.on_release(keyboard.Key.ctrl_l)
+    hotkeys.on_press(keyboard.Key.f5)
+    assert ["reload"] == fired
+
+    # A named key reported by vk alone
+    hotkeys.on_press(keyboard.Key.ctrl_l)
+    hotkeys.on_press(keyboard.Key.shift_l)
+    hotkeys.on_press(keyboard.KeyCode.from_vk(keyboard.Key.f5.value.vk))
+    hotkeys.on_release(keyboard.Key.shift_l)
+    hotkeys.on_release(keyboard.Key.ctrl_l)
+    assert ["reload", "reload"] == fired
+
+    hotkeys.on_click(0, 0, mouse.Button.button8, True)
+    assert ["reload", "reload", "zoom"] == fired
@@ -0,0 +1,63 @@
+import pytest
+
+from sleuthdeck.keymap import Keymap
+from sleuthdeck.keymap import Matcher
+from sleuthdeck.keymap import parse_binding
+from sleuthdeck.keymap import parse_chord
+
+
+def test_parse_binding():
+    assert (frozenset({"ctrl", "shift", "f5"}),) == parse_binding("Control+Shift+F5")
+    assert (frozenset({"ctrl", "k"}), frozenset({"ctrl", "c"})) == parse_binding("ctrl+k ctrl+c")
+    assert (frozenset({"mouse8"}),) == parse_binding("8")
+
+    with pytest.raises(ValueError):
+        parse_chord("ctrl+shift")
+    # Scroll wheel "buttons" are reported as scrolls, not clicks
+    with pytest.raises(ValueError):
+        parse_chord("5")
+
+
+def test_matcher_chords_and_sequences():
+    fired = []
+    keymap = (Keymap()
+              .bind("ctrl+f5", lambda: fired.append("reload"))
+              .bind("ctrl+k ctrl+c", lambda: fired.append("comment"))
+              .bind("g", lambda: fired.append("top"))
+              .bind("g g", lambda: fired.append("bottom")))
+    matcher = Matcher(keymap, timeout=1)
+
+    def press(spec, now):
+        for callback in matcher.feed(parse_chord(spec), now):
+            callback()
+
+    press("ctrl+f5", 0)
+    assert ["reload"] == fired
+
+    press("ctrl+k", 1)
+    assert matcher.pending
+    press("ctrl+c", 1.5)
+    assert ["reload", "comment"] == fired
+
+    # "g" is both a binding and a prefix, so it waits to see if another "g" follows
+    press("g", 2)
+    press("g", 2.5)
+    assert "bottom" == fired[-1]
+    press("g", 3)
+    press("ctrl+f5", 3.2)
+    assert ["top", "reload"] == fired[-2:]
+    press("g", 4)
+    for callback in matcher.expire(5.1):
+        callback()
+    assert "top" == fired[-1]
+
+
+def test_swapping_keymaps_drops_pending_sequence():
+    fired = []
+    matcher = Matcher(Keymap().bind("ctrl+k ctrl+c", lambda: fired.append("old")))
+    matcher.feed(parse_chord("ctrl+k"), 0)
+
+    matcher.keymap = Keymap().bind("ctrl+c", lambda: fired.append("new"))
+    for callback in matcher.feed(parse_chord("ctrl+c"), 0.1):
+        callback()
+    assert ["new"] == fired
@@ -0,0 +1,247 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+
+import pytest
+from websockets.asyncio.server import serve
+
+from sleuthdeck.plugins.obs.client import ConnectionState
+from sleuthdeck.plugins.obs.client import ExecutionType
+from sleuthdeck.plugins.obs.client import ReconnectingObsClient
+from sleuthdeck.plugins.obs.group import ObsGroup
+from sleuthdeck.plugins.obs.group import ObsTarget
+from sleuthdeck.plugins.obs.group import VendorCanvasTarget
+from sleuthdeck.plugins.obs.mock_server import MockObsServer
+from sleuthdeck.plugins.obs.preview import ScreenshotBudget
+from sleuthdeck.plugins.obs.state import ObsState
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    with MockObsServer(password="secret") as server:
+        yield server
+
+
+def test_request_roundtrip(server):
+    client = ReconnectingObsClient("127.0.0.1", server.port, "secret")
+    client.req("SetCurrentProgramScene", {"sceneName": "Me and Guest"})
+
+    response = client.req("GetCurrentProgramScene")
+    assert "Me and Guest" == response["responseData"]["currentProgramSceneName"]
+    assert ["SetCurrentProgramScene", "GetCurrentProgramScene"] == [e.request_type for e in server.timeline]
+
+
+def test_bad_password(server):
+    client = ReconnectingObsClient("127.0.0.1", server.port, "wrong", timeout=2)
+    with pytest.raises(Exception):
+        client.connect()
+    assert ConnectionState.DISCONNECTED == client.state
+
+
+def test_malformed_messages_are_skipped():
+    loop = asyncio.new_event_loop()
+
+    async def handler(ws):
+        await ws.send(json.dumps({"op": 0, "d": {"rpcVersion": 1}}))
+        await ws.recv()
+        await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+        async for message in ws:
+            d = json.loads(message)["d"]
+            # Garbage, then a response missing its request id, then the real response
+            await ws.send("{not json")
+            await ws.send(json.dumps({"op": 7, "d": {"requestType": d["requestType"]}}))
+            await ws.send(json.dumps({"op": 7, "d": {
+                "requestType": d["requestType"], "requestId": d["requestId"],
+                "requestStatus": {"result": True, "code": 100},
+                "responseData": {"obsVersion": "30.0.0"}}}))
+
+    async def start():
+        return await serve(handler, "127.0.0.1", 0)
+
+    server = loop.run_until_complete(start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = server.sockets[0].getsockname()[1]
+
+    client = ReconnectingObsClient("127.0.0.1", port, "", timeout=5)
+    assert "30.0.0" == client.req("GetVersion")["responseData"]["obsVersion"]
+    assert "30.0.0" == client.req("GetVersion")["responseData"]["obsVersion"]
+    assert ConnectionState.CONNECTED == client.state
+
+    async def close():
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(close(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def test_requests_are_pipelined():
+    with MockObsServer(latency=0.05) as server:
+        client = ReconnectingObsClient("127.0.0.1", server.port, "")
+        client.connect()
+
+        start = time.monotonic()
+        futures = [client.req_future("GetVersion") for _ in range(50)]
+        for future in futures:
+            assert future.result(timeout=5)["requestStatus"]["result"]
+
+        # Serially these would take 2.5s
+        assert time.monotonic() - start < 1.0
+        assert 50 == len(server.requests("GetVersion"))
+
+
+def test_screenshots_wait_for_interactive_requests():
+    with MockObsServer(latency=0.2) as server:
+        client = ReconnectingObsClient("127.0.0.1", server.port, "")
+        client.connect()
+        budget = ScreenshotBudget(client)
+
+        pressed = client.req_future("SetCurrentProgramScene", {"sceneName": "Me and Guest"})
+        image = asyncio.run(budget.take("Webcam", 8, 8))
+
+        assert pressed.done()
+        assert "Webcam:Me and Guest" == base64.b64decode(image.partition(",")[2]).decode()
+        press = server.requests("SetCurrentProgramScene")[0]
+        assert server.requests("GetSourceScreenshot")[0].received >= press.responded
+        client.stop()
+
+
+def test_batch_halts_on_failure(server):
+    client = ReconnectingObsClient("127.0.0.1", server.port, "secret")
+    results = client.req_batch(
+        [
+            {"requestType": "Sleep", "requestData": {"sleepFrames": 2}},
+            {"requestType": "GetSceneItemId", "requestData": {"sceneName": "Nope", "sourceName": "Webcam"}},
+            {"requestType": "StartRecord"},
+        ],
+        ExecutionType.SERIAL_FRAME,
+        halt_on_failure=True,
+    )
+
+    assert [True, False] == [r["requestStatus"]["result"] for r in results]
+    assert not server.state.recording
+
+
+def test_state_follows_events(server):
+    client = ReconnectingObsClient("127.0.0.1", server.port, "secret")
+    state = ObsState(client)
+    client.connect()
+    wait_until(lambda: state.ready)
+
+    assert "Me full" == state.program_scene
+    assert state.filter_enabled("Webcam", "Shader - rain") is False
+
+    item_id = server.state.scenes["Me and Guest"][1].id
+    other = ReconnectingObsClient("127.0.0.1", server.port, "secret")
+    other.req("SetSceneItemEnabled", {"sceneName": "Me and Guest", "sceneItemId": item_id,
+                                      "sceneItemEnabled": False})
+    other.req("SetCurrentProgramScene", {"sceneName": "Starting soon"})
+
+    wait_until(lambda: state.program_scene == "Starting soon")
+    assert state.scene_item_enabled("Me and Guest", "Guest 1") is False
+
+
+def test_quick_toggles_dont_wait_for_events():
+    # The keys and actions need the deck and its display stack
+    actions = pytest.importorskip("sleuthdeck.plugins.obs.actions", exc_type=ImportError)
+    with MockObsServer(password="secret", event_delay=0.5) as server:
+        obs = actions.OBS("secret", host="127.0.0.1", port=server.port)
+        wait_until(lambda: obs.state.ready)
+        toggle_guest = actions.ToggleSource(obs, "Guest 1", scene="Me and Guest")
+        toggle_rain = actions.ObsAction(obs, lambda o: o.toggle_filter(
+            "Webcam", "Shader - rain", not o.state.filter_enabled("Webcam", "Shader - rain")))
+
+        for _ in range(2):
+            toggle_guest(None, None, actions.ClickType.CLICK)
+            toggle_rain(None, None, actions.ClickType.CLICK)
+
+        assert server.state.item("Me and Guest", obs.scene_item_id("Me and Guest", "Guest 1")).enabled
+        assert 2 == len(server.requests("SetSceneItemEnabled"))
+        assert not server.state._filter("Webcam", "Shader - rain")["enabled"]
+        assert 2 == len(server.requests("SetSourceFilterEnabled"))
+        obs.client.stop()
+
+
+def test_batch_looks_up_stale_scene_items_and_raises_on_failure():
+    actions = pytest.importorskip("sleuthdeck.plugins.obs.actions", exc_type=ImportError)
+    with MockObsServer(password="secret") as server:
+        obs = actions.OBS("secret", host="127.0.0.1", port=server.port)
+        wait_until(lambda: obs.state.ready)
+        # A scene OBS didn't announce, so its item ids are looked up and cached
+        server.state.add_scene("Extra", "Webcam")
+        obs.scene_item_id("Extra", "Webcam")
+        server.state.scenes["Extra"][0].id = 99
+
+        obs.batch().set_scene_item_enabled("Extra", "Webcam", False).send()
+
+        assert not server.state.item("Extra", 99).enabled
+        assert 2 == len(server.requests("SetSceneItemEnabled"))
+        with pytest.raises(actions.OBSSDKError):
+            obs.batch().change_scene("Nope").send()
+        obs.client.stop()
+
+
+def test_following_the_mouse_cleans_up_when_it_fails():
+    actions = pytest.importorskip("sleuthdeck.plugins.obs.actions", exc_type=ImportError)
+    with MockObsServer(password="secret") as server:
+        obs = actions.OBS("secret", host="127.0.0.1", port=server.port)
+        wait_until(lambda: obs.state.ready)
+        zoom = actions.ZoomToMouse(obs, "[scene] Screenshare", "Zoomed", actions.Crop(0, 0, 0, 0),
+                                   follow=True, rate=100, monitor=actions.Geometry(0, 0, 1920, 1080))
+        samples = [(100, 100)] * 5
+
+        def pointer():
+            if not samples:
+                raise RuntimeError("Display went away")
+            return samples.pop()
+
+        zoom._pointer = pointer
+        zoom(None, None, actions.ClickType.CLICK)
+
+        wait_until(lambda: zoom._following is None)
+        wait_until(lambda: 2 == len(server.requests("SetSourceFilterEnabled")))
+        assert not server.state._filter("[scene] Screenshare", "Zoomed")["enabled"]
+        assert server.requests("SetSourceFilterSettings")
+        obs.client.stop()
+
+
+def test_idempotent_request_replayed_after_drop(server):
+    client = ReconnectingObsClient("127.0.0.1", server.port, "secret", min_backoff=0.05)
+    client.start()
+    wait_until(lambda: client.state == ConnectionState.CONNECTED)
+
+    server.drop_on("GetSceneList")
+    response = client.req("GetSceneList")
+
+    assert "Me full" == response["responseData"]["currentProgramSceneName"]
+    assert 2 == len(server.requests("GetSceneList"))
+    client.stop()
+
+
+def test_group_records_on_every_target():
+    with MockObsServer() as first, MockObsServer() as second:
+        one = ReconnectingObsClient("127.0.0.1", first.port, "")
+        two = ReconnectingObsClient("127.0.0.1", second.port, "")
+        group = ObsGroup(ObsTarget(one, "one"), VendorCanvasTarget(one), ObsTarget(two, "two"))
+
+        result = group.start_recording()
+
+        assert result.ok
+        assert ["one", "vertical", "two"] == [r.target for r in result.results]
+        assert first.state.recording and second.state.recording
+        assert "start_recording" == first.state.vendor_requests[0]["requestType"]
+        assert result.skew < 1.0
+
+        second.state.recording = False
+        result = group.stop_recording()
+        assert [True, True, False] == [r.ok for r in result.results]
+        assert not first.state.recording
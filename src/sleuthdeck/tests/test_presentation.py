@@ -0,0 +1,92 @@
+import os
+import time
+
+import pytest
+
+from sleuthdeck.plugins.obs.mock_server import MockObsServer
+from sleuthdeck.plugins.obs.mock_server import SceneItem
+
+EPISODE = """
+title: "DORA Metrics 101"
+sections:
+  - title: Welcome!
+    byline: Let's make this interactive
+  - title: "Questions"
+    byline: Ask away
+"""
+
+OVERLAY = "[Scene] Lower-third (labels)"
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_recreated_labels_are_shown_by_their_new_id(tmp_path):
+    # The presentation needs the deck and its display stack
+    actions = pytest.importorskip("sleuthdeck.plugins.presentation.actions", exc_type=ImportError)
+    obs_actions = pytest.importorskip("sleuthdeck.plugins.obs.actions", exc_type=ImportError)
+    path = tmp_path / "s01e01.yml"
+    path.write_text(EPISODE)
+
+    with MockObsServer(password="secret") as server:
+        obs = obs_actions.OBS("secret", host="127.0.0.1", port=server.port)
+        wait_until(lambda: obs.state.ready)
+        presentation = actions.Presentation(obs, str(path), title_scene_item="Title",
+                                            byline_scene_item="Byline", overlay_scene=OVERLAY,
+                                            watch=False)
+        try:
+            wait_until(lambda: len(presentation._plans) == 3)
+
+            # The title label is deleted and added back in OBS, which gives it a new id
+            items = server.state.scenes[OVERLAY]
+            old = next(i for i in items if i.source == "Title")
+            items.remove(old)
+            server.emit("SceneItemRemoved", {"sceneName": OVERLAY, "sourceName": "Title",
+                                             "sceneItemId": old.id})
+            items.append(SceneItem(99, "Title", enabled=False))
+            server.emit("SceneItemCreated", {"sceneName": OVERLAY, "sourceName": "Title",
+                                             "sceneItemId": 99})
+            wait_until(lambda: obs.scene_item_id(OVERLAY, "Title") == 99)
+
+            presentation.next_section()(None, None, actions.ClickType.CLICK)
+
+            wait_until(lambda: server.state.inputs["Title"].get("text") == "Questions")
+            wait_until(lambda: server.state.item(OVERLAY, 99).enabled)
+        finally:
+            presentation.close()
+            obs.client.stop()
+
+
+def test_episode_edits_apply_between_presses(tmp_path):
+    actions = pytest.importorskip("sleuthdeck.plugins.presentation.actions", exc_type=ImportError)
+    obs_actions = pytest.importorskip("sleuthdeck.plugins.obs.actions", exc_type=ImportError)
+    path = tmp_path / "s01e01.yml"
+    path.write_text(EPISODE)
+
+    with MockObsServer(password="secret") as server:
+        obs = obs_actions.OBS("secret", host="127.0.0.1", port=server.port)
+        wait_until(lambda: obs.state.ready)
+        presentation = actions.Presentation(obs, str(path), title_scene_item="Title",
+                                            byline_scene_item="Byline", overlay_scene=OVERLAY,
+                                            watch=False)
+        try:
+            next_section = presentation.next_section()
+            next_section(None, None, actions.ClickType.CLICK)
+            wait_until(lambda: server.state.inputs["Title"].get("text") == "Questions")
+
+            # The episode loses the section that is showing
+            path.write_text(EPISODE.split("  - title: \"Questions\"")[0].replace("Welcome!", "Hello"))
+            os.utime(path, (time.time() + 1, time.time() + 1))
+            presentation.library.refresh(str(path))
+            assert 0 == presentation.current_section_idx
+            assert ["Hello"] == [s.title for s in presentation.event.sections]
+
+            next_section(None, None, actions.ClickType.CLICK)
+            wait_until(lambda: server.state.inputs["Title"].get("text") == "Hello")
+        finally:
+            presentation.close()
+            obs.client.stop()
@@ -0,0 +1,117 @@
+import sys
+import threading
+import time
+
+import psutil
+
+from sleuthdeck.processes import find_processes
+from sleuthdeck.processes import ProcessSupervisor
+
+
+def python(code: str):
+    return sys.executable, "-c", code
+
+
+def test_run_captures_output_and_times_out():
+    supervisor = ProcessSupervisor(kill_after=1)
+
+    result = supervisor.run(*python("import sys; print('out'); print('err', file=sys.stderr)")).result(5)
+    assert result.ok
+    assert "out\n" == result.stdout
+    assert "err\n" == result.stderr
+
+    start = time.monotonic()
+    result = supervisor.run(*python("import time; time.sleep(30)"), timeout=0.2).result(10)
+    assert result.timed_out
+    assert not result.ok
+    assert time.monotonic() - start < 5
+
+    result = supervisor.run("/no/such/command").result(5)
+    assert result.returncode is None
+
+
+def test_run_limits_concurrency():
+    supervisor = ProcessSupervisor(max_concurrent=2)
+    start = time.monotonic()
+    futures = [supervisor.run(*python("import time; time.sleep(0.3)"), timeout=10) for _ in range(4)]
+    for future in futures:
+        assert future.result(10).ok
+    assert time.monotonic() - start >= 0.6
+
+
+def test_long_running_commands_dont_starve_the_others():
+    supervisor = ProcessSupervisor(max_concurrent=1, kill_after=1)
+    sleep = python("import time; time.sleep(5)")
+    quick = python("print('done')")
+
+    try:
+        # Untimed commands may never finish, so they share a pool of their own
+        untimed = supervisor.run(*sleep)
+        assert supervisor.run(*quick, timeout=5).result(5).ok
+        queued = supervisor.run(*quick)
+
+        # Each pool has its own slots
+        timed = supervisor.run(*sleep, timeout=3)
+        time.sleep(0.2)
+        assert supervisor.run(*quick, timeout=5, pool="shell").result(5).ok
+
+        # Waiting for a slot counts towards the timeout
+        start = time.monotonic()
+        result = supervisor.run(*quick, timeout=0.3).result(5)
+        assert result.timed_out
+        assert time.monotonic() - start < 2
+
+        assert timed.result(10).timed_out
+        assert not untimed.done()
+        assert not queued.done()
+    finally:
+        # Don't leave the sleep running after the test
+        for child in psutil.Process().children():
+            try:
+                if "time.sleep(5)" in " ".join(child.cmdline()):
+                    child.kill()
+            except psutil.NoSuchProcess:
+                pass
+    assert untimed.result(5).returncode is not None
+    assert queued.result(5).ok
+
+
+def test_launch_tracks_readiness_and_exit():
+    supervisor = ProcessSupervisor()
+    changes = []
+    exited = threading.Event()
+
+    def changed(app):
+        changes.append((app.ready.is_set(), app.exited.is_set()))
+        if app.exited.is_set():
+            exited.set()
+
+    supervisor.on_change("app", changed)
+    app = supervisor.launch("app", *python(
+        "import time; time.sleep(0.2); print('listening', flush=True); time.sleep(0.3)"
+    ), ready="listening")
+    # Already starting, so not launched again
+    assert app is supervisor.launch("app", *python("raise SystemExit(1)"))
+
+    assert app.ready.wait(5)
+    assert app.running
+    assert exited.wait(5)
+    assert 0 == app.returncode
+    assert "listening\n" in app.output
+    assert (True, True) in changes
+
+
+def test_launch_adopts_the_program_a_launcher_hands_off_to():
+    supervisor = ProcessSupervisor()
+    # Starts a detached program and exits straight away, like gtk-launch
+    launcher = python(
+        "import subprocess, sys; "
+        "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(2)', 'handed-off-app'], "
+        "start_new_session=True)"
+    )
+    app = supervisor.launch("handed-off", *launcher, match="handed-off-app")
+
+    assert app.ready.wait(5)
+    assert app.pid in find_processes("handed-off-app")
+    assert app.exited.wait(5)
+    assert not app.running
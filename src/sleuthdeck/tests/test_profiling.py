@@ -0,0 +1,31 @@
+import importlib
+import sys
+
+from sleuthdeck.profiling import ImportProfiler
+
+
+def test_import_profiler_splits_self_and_total_time(tmp_path, monkeypatch):
+    pkg = tmp_path / "profiled"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("from profiled import slow\n")
+    (pkg / "slow.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        module = importlib.import_module("profiled")
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("profiled", None)
+        sys.modules.pop("profiled.slow", None)
+
+    slow = profiler.timings["profiled.slow"]
+    package = profiler.timings["profiled"]
+    assert slow.self_time >= 0.05
+    assert package.total_time >= slow.total_time
+    assert package.self_time < 0.05
+    # The module keeps its real loader once imported
+    assert type(module.__loader__).__name__ == "SourceFileLoader"
+    assert "profiled.slow" in profiler.report()
+    assert profiler not in sys.meta_path
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+import pytest
+
+from sleuthdeck.plugins.sleuth.poller import Status
+from sleuthdeck.plugins.sleuth.poller import StatusPoller
+from sleuthdeck.plugins.sleuth.poller import Target
+
+
+class SleuthStandIn:
+    """Serves project statuses with an ETag, like the Sleuth status endpoint"""
+
+    def __init__(self):
+        self.projects = {}
+        self.requests = []
+        self.fail_with = None
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests.append((parse_qs(urlparse(self.path).query), dict(self.headers)))
+                if stand_in.fail_with:
+                    self.send_response(stand_in.fail_with)
+                    self.send_header("Retry-After", "7")
+                    self.end_headers()
+                    return
+                body = json.dumps({"projects": stand_in.projects}).encode()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/status"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def sleuth():
+    stand_in = SleuthStandIn()
+    yield stand_in
+    stand_in.close()
+
+
+def test_polls_every_target_in_one_conditional_request(sleuth):
+    sleuth.projects = {"api": {"locked": False, "deployments": {"prod": {"state": "healthy", "revision": "abc"}}}}
+    poller = StatusPoller("token", url=sleuth.url, interval=5)
+    lock, prod = Target("api"), Target("api", "prod")
+    seen = []
+    poller.subscribe(lock, lambda s: seen.append(("lock", s)))
+    poller.subscribe(prod, lambda s: seen.append(("prod", s)))
+
+    assert 5 == poller.poll()
+    assert 1 == len(sleuth.requests)
+    query, headers = sleuth.requests[0]
+    assert {"project": ["api"], "deployment": ["api/prod"]} == query
+    assert "apikey token" == headers["Authorization"]
+    assert ("lock", Status()) in seen
+    assert ("prod", Status(state="healthy", revision="abc")) in seen
+
+    # Nothing changed, so the server answers 304 and nobody is told anything
+    seen.clear()
+    poller.poll()
+    assert "If-None-Match" in sleuth.requests[-1][1]
+    assert [] == seen
+
+    # Only the key whose status changed hears about it
+    sleuth.projects["api"]["deployments"]["prod"]["state"] = "failing"
+    poller.poll()
+    assert [("prod", Status(state="failing", revision="abc"))] == seen
+
+    # A new subscriber to a known target gets the status straight away
+    later = []
+    poller.subscribe(prod, later.append)
+    assert [Status(state="failing", revision="abc")] == later
+
+
+def test_backs_off_on_errors(sleuth):
+    poller = StatusPoller("token", url=sleuth.url, interval=1, max_backoff=60)
+    poller.subscribe(Target("api"), lambda s: None)
+
+    sleuth.fail_with = 503
+    assert poller.poll() >= 7
+    delays = [poller.poll() for _ in range(4)]
+    assert delays[-1] > 7
+
+    sleuth.fail_with = None
+    sleuth.projects = {"api": {"locked": True, "locked_by": "don"}}
+    assert 1 == poller.poll()
+    assert Status(locked=True, locked_by="don") == poller.status(Target("api"))
+
+
+def test_stops_polling_when_the_last_subscriber_leaves(sleuth):
+    sleuth.projects = {"api": {"locked": False}}
+    poller = StatusPoller("token", url=sleuth.url, interval=60)
+    seen = threading.Event()
+
+    def changed(status):
+        seen.set()
+
+    poller.subscribe(Target("api"), changed)
+    poller.start()
+    assert seen.wait(5)
+    thread = poller._thread
+
+    poller.unsubscribe(Target("api"), changed)
+    thread.join(5)
+    assert not thread.is_alive()
+
+    # A script reloaded into the deck subscribes again
+    poller.subscribe(Target("api"), changed)
+    poller.start()
+    assert poller._thread is not thread and poller._thread.is_alive()
+    for _ in range(500):
+        if 2 == len(sleuth.requests):
+            break
+        threading.Event().wait(0.01)
+    assert 2 == len(sleuth.requests)
+    poller.stop()
@@ -0,0 +1,48 @@
+import numpy as np
+
+import sleuthdeck.plugins.sound.engine as engine
+from sleuthdeck.plugins.sound.engine import Sample
+from sleuthdeck.plugins.sound.engine import SampleCache
+from sleuthdeck.plugins.sound.engine import Voice
+
+
+def test_samples_are_decoded_once(tmp_path, monkeypatch):
+    decoded = []
+
+    def decode(path, gain):
+        decoded.append((path, gain))
+        return np.ones((100, engine.CHANNELS), dtype=np.int16)
+
+    monkeypatch.setattr(engine, "decode", decode)
+    clip = tmp_path / "rimshot.mp3"
+    clip.write_bytes(b"")
+
+    cache = SampleCache(str(tmp_path / "cache"))
+    assert cache.get(str(clip)) is cache.get(str(clip))
+    cache.get(str(clip), gain=-13)
+    assert 2 == len(decoded)
+
+    # A new cache, like after a reload, maps the PCM written by the first
+    reloaded = SampleCache(str(tmp_path / "cache")).get(str(clip))
+    assert isinstance(reloaded.frames, np.memmap)
+    assert 2 == len(decoded)
+    assert 100 == len(reloaded.frames)
+
+
+def test_voices_mix_and_fade():
+    sample = Sample("tone", np.full((1000, engine.CHANNELS), 1000, dtype=np.int16))
+    first, second = Voice(sample), Voice(sample)
+    out = np.zeros((600, engine.CHANNELS), dtype=np.float32)
+    first.mix_into(out)
+    second.mix_into(out)
+    assert 2000 == out[0, 0]
+
+    first.stop(fade=100 / engine.FRAME_RATE)
+    out = np.zeros((600, engine.CHANNELS), dtype=np.float32)
+    first.mix_into(out)
+    assert 0 < out[50, 0] < 1000
+    assert 0 == out[200, 0]
+    assert first.done.is_set()
+
+    second.mix_into(np.zeros((600, engine.CHANNELS), dtype=np.float32))
+    assert second.done.is_set()
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+from websockets.asyncio.server import serve
+
+from sleuthdeck.plugins.twitch.chat import ChatBuffer
+from sleuthdeck.plugins.twitch.chat import ChatMessage
+from sleuthdeck.plugins.twitch.chat import exclude_commands
+from sleuthdeck.plugins.twitch.chat import IrcParser
+from sleuthdeck.plugins.twitch.chat import parse_line
+from sleuthdeck.plugins.twitch.chat import TwitchChatReader
+from sleuthdeck.plugins.twitch.chat import watch_unread
+
+
+def privmsg(user: str, text: str, msg_id: str = "1") -> str:
+    return (f"@badges=moderator/1;display-name={user.title()};id={msg_id} "
+            f":{user}!{user}@{user}.tmi.twitch.tv PRIVMSG #mrdonbrown :{text}\r\n")
+
+
+def test_parse_line_with_tags():
+    msg = parse_line(r"@display-name=Don;msg-id=hi\sthere :don!don@tmi PRIVMSG #chan :hello :) there")
+
+    assert "PRIVMSG" == msg.command
+    assert ["#chan", "hello :) there"] == msg.params
+    assert "hi there" == msg.tags["msg-id"]
+    assert "don" == msg.nick
+
+
+def test_parser_holds_partial_lines():
+    parser = IrcParser()
+    line = privmsg("don", "hello")
+
+    assert [] == parser.feed(line[:20])
+    messages = parser.feed(line[20:] + "PING :tmi.twitch.tv\r\n")
+    assert ["PRIVMSG", "PING"] == [m.command for m in messages]
+
+
+def test_buffer_is_bounded_and_filtered():
+    buffer = ChatBuffer(size=3, filters=[exclude_commands()])
+    parser = IrcParser()
+    data = "".join(privmsg("don", f"message {i}", str(i)) for i in range(5)) + privmsg("don", "!uptime")
+    for msg in parser.feed(data):
+        buffer.add(ChatMessage.from_irc(msg))
+
+    assert ["message 2", "message 3", "message 4"] == [m.text for m in buffer.recent(10)]
+    assert 3 == buffer.unread
+
+    buffer.select(-1)
+    assert "message 3" == buffer.selected().text
+    buffer.mark_read()
+    assert 0 == buffer.unread
+    assert "message 4" == buffer.selected().text
+
+
+def test_unread_count_is_drawn_once_per_frame():
+    buffer = ChatBuffer(size=5000)
+    parser = IrcParser()
+    drawn = []
+
+    async def burst():
+        watcher = asyncio.create_task(watch_unread(buffer, drawn.append, fps=10))
+        for i in range(3000):
+            for msg in parser.feed(privmsg("viewer", f"hi {i}", str(i))):
+                buffer.add(ChatMessage.from_irc(msg))
+            if i % 100 == 0:
+                await asyncio.sleep(0.01)
+        await asyncio.sleep(0.15)
+        watcher.cancel()
+
+    asyncio.run(burst())
+
+    assert 3000 == drawn[-1]
+    assert len(drawn) < 10
+    assert drawn == sorted(set(drawn))
+
+
+def test_reader_against_local_server():
+    received = []
+    loop = asyncio.new_event_loop()
+
+    async def handler(ws):
+        async for line in ws:
+            received.append(line)
+            if line.startswith("JOIN"):
+                nick = received[-2].split()[1]
+                await ws.send(f":{nick}!{nick}@tmi JOIN #mrdonbrown\r\nPING :tmi.twitch.tv\r\n")
+                await ws.send("".join(privmsg("viewer", f"hi {i}", str(i)) for i in range(1000)))
+
+    async def start():
+        return await serve(handler, "127.0.0.1", 0)
+
+    server = loop.run_until_complete(start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = server.sockets[0].getsockname()[1]
+
+    reader = TwitchChatReader("mrdonbrown", ChatBuffer(size=50), url=f"ws://127.0.0.1:{port}")
+    reader.start()
+    assert reader.connected.wait(5)
+    for _ in range(500):
+        # The server only reads the PONG once it has finished sending the burst
+        if (reader.buffer.recent(1) and reader.buffer.recent(1)[0].text == "hi 999"
+                and "PONG :tmi.twitch.tv" in received):
+            break
+        threading.Event().wait(0.01)
+
+    assert "hi 999" == reader.buffer.recent(1)[0].text
+    assert "Viewer" == reader.buffer.recent(1)[0].display_name
+    assert 50 == reader.buffer.unread
+    assert "PONG :tmi.twitch.tv" in received
+    reader.stop()
+
+    async def close():
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(close(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def test_reader_reconnects_after_a_failed_handshake():
+    attempts = []
+    loop = asyncio.new_event_loop()
+
+    def process_request(connection, request):
+        attempts.append(request.path)
+        if len(attempts) == 1:
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "Down for maintenance\n")
+
+    async def handler(ws):
+        async for line in ws:
+            if line.startswith("NICK"):
+                nick = line.split()[1]
+                await ws.send(f":{nick}!{nick}@tmi JOIN #mrdonbrown\r\n")
+
+    async def start():
+        return await serve(handler, "127.0.0.1", 0, process_request=process_request)
+
+    server = loop.run_until_complete(start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = server.sockets[0].getsockname()[1]
+
+    reader = TwitchChatReader("mrdonbrown", url=f"ws://127.0.0.1:{port}", min_backoff=0.01)
+    reader.start()
+    assert reader.connected.wait(5)
+    assert 2 == len(attempts)
+    reader.stop()
+
+    async def close():
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(close(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
@@ -1,4 +1,7 @@
-from sleuthdeck.windows import _parse_window_output
+import pytest
+
+from sleuthdeck import windows
+from sleuthdeck.windows import _parse_window_output, By, Window, WindowChangeType, WindowIndex, WindowListParser
 
 
 def test_parse_window_output():
@@ -13,3 +16,123 @@ def test_parse_window_output():
         "Twitch - Google Chrome",
         "OBS 27.0.1+dfsg1-1 (linux) - Profile: Untitled - Scenes: Untitled",
     } == set(w.title for w in windows)
+
+
+def test_window_index_find():
+    index = WindowIndex()
+    index.put(Window("0", "obs.obs", "0x01", "OBS"))
+    index.put(Window("0", "Zoom.Zoom", "0x02", "Zoom Meeting"))
+
+    assert "0x02" == index.find(By.title("Zoom Meeting")).window_id
+    assert "0x01" == index.find(By.window_class("obs.obs")).window_id
+
+    index.put(Window("0", "Zoom.Zoom", "0x02", "Zoom"))
+    assert index.find(By.title("Zoom Meeting")) is None
+
+    index.remove("0x01")
+    assert index.find(By.window_class("obs.obs")) is None
+    assert ["0x02"] == [w.window_id for w in index.windows()]
+
+
+def test_window_index_wait_for():
+    index = WindowIndex()
+    future = index.wait_for(By.title("Zoom Meeting"), timeout=5)
+    assert not future.done()
+
+    index.put(Window("0", "Zoom.Zoom", "0x02", "Zoom Meeting"))
+    assert "0x02" == future.result(timeout=0).window_id
+
+    assert index.wait_for(By.title("Missing"), timeout=0.01).result(timeout=1) is None
+
+
+def test_window_index_subscribe():
+    index = WindowIndex()
+    index.put(Window("0", "Zoom.Zoom", "0x01", "Zoom Meeting"))
+    events = []
+    subscription = index.subscribe(
+        By.title("Zoom Meeting"),
+        on_opened=lambda w: events.append(("opened", w.window_id)),
+        on_closed=lambda w: events.append(("closed", w.window_id)),
+    )
+    index.put(Window("0", "Zoom.Zoom", "0x02", "Zoom Meeting"))
+    index.put(Window("0", "Zoom.Zoom", "0x02", "Zoom Meeting"))
+    index.put(Window("0", "Zoom.Zoom", "0x01", "Zoom"))
+    index.replace([])
+    subscription.close()
+    index.put(Window("0", "Zoom.Zoom", "0x03", "Zoom Meeting"))
+
+    assert [
+        ("opened", "0x01"),
+        ("opened", "0x02"),
+        ("closed", "0x01"),
+        ("closed", "0x02"),
+    ] == events
+
+
+def test_parse_window_output_class_with_spaces():
+    output = """
+0x08000003  0 google-chrome (/home/mrdon/.config/google-chrome).Google-chrome  N/A Twitch  -  Google Chrome
+0x06600006  0 obs.obs               N/A
+"""
+    windows = _parse_window_output(output)
+
+    assert [
+        ("google-chrome (/home/mrdon/.config/google-chrome).Google-chrome", "Twitch  -  Google Chrome"),
+        ("obs.obs", ""),
+    ] == [(w.window_class, w.title) for w in windows]
+
+
+def test_window_list_parser_diff():
+    parser = WindowListParser()
+    changes = parser.diff(
+        "0x01  0 obs.obs  mrdon-home OBS\n0x02  0 Zoom.Zoom  mrdon-home Zoom\n"
+    )
+    assert {("0x01", WindowChangeType.ADDED), ("0x02", WindowChangeType.ADDED)} == {
+        (c.window.window_id, c.type) for c in changes
+    }
+
+    changes = parser.diff(
+        "0x02  0 Zoom.Zoom  mrdon-home Zoom Meeting\n0x03  0 obs.obs  mrdon-home OBS\n"
+    )
+    assert {
+        ("0x01", WindowChangeType.REMOVED),
+        ("0x02", WindowChangeType.RENAMED),
+        ("0x03", WindowChangeType.ADDED),
+    } == {(c.window.window_id, c.type) for c in changes}
+    assert not parser.diff(
+        "0x02  0 Zoom.Zoom  mrdon-home Zoom Meeting\n0x03  0 obs.obs  mrdon-home OBS\n"
+    )
+
+
+def test_window_list_parser_skips_bad_lines():
+    parser = WindowListParser()
+    changes = parser.diff(
+        "0x01  0 obs.obs\n0x02\n0x03  0 Zoom.Zoom  mrdon-home Zoom\n"
+    )
+    assert [("0x03", "Zoom.Zoom", "Zoom")] == [
+        (c.window.window_id, c.window.window_class, c.window.title) for c in changes
+    ]
+
+    # A host guessed for one output isn't used on later ones
+    parser.parse("0x04  0 odd class.Odd  box Title\n")
+    windows = parser.parse("0x05  0 Zoom.Zoom  box class.Odd notes\n")
+    assert [("Zoom.Zoom", "class.Odd notes")] == [(w.window_class, w.title) for w in windows]
+
+
+def test_window_events_retry_a_failed_start(monkeypatch):
+    starts = []
+
+    def start(index):
+        starts.append(index)
+        if len(starts) == 1:
+            raise OSError("wmctrl went away")
+
+    monkeypatch.setattr(windows, "_get_registry", lambda: None)
+    monkeypatch.setattr(windows, "_polling_index", None)
+    monkeypatch.setattr(windows.PollingWindowIndex, "start", start)
+
+    with pytest.raises(OSError):
+        windows.get_window_events()
+    index = windows.get_window_events()
+    assert index is windows.get_window_events()
+    assert [index] == starts[1:]
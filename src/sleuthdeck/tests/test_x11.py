@@ -0,0 +1,27 @@
+from Xlib import XK
+
+from sleuthdeck.x11 import keysym
+from sleuthdeck.x11 import keysym_name
+from sleuthdeck.x11 import modifier
+
+
+def test_keysyms_from_pyautogui_names():
+    assert "Control_L" == keysym_name("ctrlleft")
+    assert XK.XK_Return == keysym("enter")
+    assert XK.XK_Next == keysym("PageDown")
+    assert XK.XK_a == keysym("a")
+    assert XK.XK_F5 == keysym("f5")
+    assert XK.XK_Shift_R == keysym("Shift_R")
+    assert 0 == keysym("nope")
+
+
+def test_modifiers_by_any_name():
+    assert "ctrl" == modifier("ctrl")
+    assert "ctrl" == modifier("ctrlright")
+    assert "shift" == modifier("shiftleft")
+    assert "shift" == modifier("Shift_R")
+    assert "alt" == modifier("altright")
+    assert "super" == modifier("win")
+    assert "super" == modifier("winright")
+    assert modifier("a") is None
+    assert modifier("enter") is None
@@ -1,10 +1,12 @@
-import cv2
 from PIL import Image
 from PIL import ImageOps
 from StreamDeck.ImageHelpers import PILHelper
 
 
 def show_video(deck, file):
+    # OpenCV is slow to import and only needed once a video plays
+    import cv2
+
     # Approximate number of (non-visible) pixels between each key, so we can
     # take those into account when cutting up the image to show on the keys.
     key_spacing = (36, 36)
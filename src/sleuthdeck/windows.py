@@ -1,17 +1,31 @@
 from __future__ import annotations
-import re
+import socket
+import threading
 import time
-from typing import List, Callable, Union
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import Future
+from dataclasses import dataclass
+from enum import auto
+from enum import Enum
+from typing import Dict, Iterable, List, Callable, Union, Tuple
 from typing import Optional
+from typing import TYPE_CHECKING
 
 from sleuthdeck import shell
 
+if TYPE_CHECKING:
+    from sleuthdeck.x11 import WindowRegistry
+
 
 class By:
 
-    def __init__(self, selector: Callable[[Window], bool], repr: str):
+    def __init__(self, selector: Callable[[Window], bool], repr: str, kind: Optional[str] = None, value: Optional[str] = None):
         self._selector = selector
         self._repr = repr
+        # Lets a WindowIndex answer the selector from its indexes instead of scanning every window
+        self.kind = kind
+        self.value = value
 
     def __call__(self, window: Window):
         return self._selector(window)
@@ -21,11 +35,11 @@ class By:
 
     @classmethod
     def title(cls, title: str):
-        return By(lambda w: w.title == title, f"by.title='{title}'")
+        return By(lambda w: w.title == title, f"by.title='{title}'", kind="title", value=title)
 
     @classmethod
     def window_class(cls, name: str):
-        return By(lambda w: w.window_class == name, f"by.window_class='{name}'")
+        return By(lambda w: w.window_class == name, f"by.window_class='{name}'", kind="window_class", value=name)
 
 
 class Window:
@@ -36,22 +50,44 @@ class Window:
         self.title = title
 
     def maximize(self):
+        registry = _get_registry()
+        if registry:
+            registry.maximize(self.window_id)
+            return
         shell.run(
             "wmctrl", "-ir", self.window_id, "-b", "add,maximized_vert,maximized_horz"
         )
 
     def unmaximize(self):
+        registry = _get_registry()
+        if registry:
+            registry.unmaximize(self.window_id)
+            return
         shell.run(
             "wmctrl", "-ir", self.window_id, "-b", "remove,maximized_vert"
         )
 
     def close(self):
+        registry = _get_registry()
+        if registry:
+            registry.close(self.window_id)
+            return
         shell.run("wmctrl", "-ic", self.window_id)
 
     def move(self, x: int, y: int, width: int, height: int):
+        registry = _get_registry()
+        if registry:
+            registry.move(self.window_id, x, y, width, height)
+            return
         shell.run("wmctrl", "-ir", self.window_id, "-e", f"0,{x},{y},{width},{height}")
 
     def focus(self):
+        registry = _get_registry()
+        if registry:
+            if not registry.activate(self.window_id):
+                print("Unable to focus window")
+            return
+
         shell.run("wmctrl", "-ia", self.window_id)
         for _ in range(10):
             focused = get_focused_window()
@@ -64,36 +100,366 @@ class Window:
         return f"Window (id='{self.window_id}', class='{self.window_class}', title='{self.title}')"
 
 
+WindowCallback = Callable[[Window], None]
+
+
+class WindowSubscription:
+    def __init__(
+        self,
+        index: WindowIndex,
+        selector: By,
+        on_opened: Optional[WindowCallback],
+        on_closed: Optional[WindowCallback],
+        on_renamed: Optional[WindowCallback],
+    ):
+        self._index = index
+        self.selector = selector
+        self.on_opened = on_opened
+        self.on_closed = on_closed
+        self.on_renamed = on_renamed
+
+    def close(self):
+        self._index.unsubscribe(self)
+
+
+class WindowIndex:
+    """The set of open windows, indexed by title and class.
+
+    Something else keeps it current (see :class:`sleuthdeck.x11.WindowRegistry`), so
+    lookups are dictionary hits and waiters are woken as soon as a matching window is put.
+    Subscribers are told when windows matching their selector open, close or are renamed,
+    on the thread that updated the index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[str, Window] = {}
+        self._by_title: Dict[str, Dict[str, Window]] = defaultdict(dict)
+        self._by_class: Dict[str, Dict[str, Window]] = defaultdict(dict)
+        self._waiters: List[Tuple[By, Future]] = []
+        self._subscriptions: List[WindowSubscription] = []
+
+    def subscribe(
+        self,
+        selector: By,
+        on_opened: Optional[WindowCallback] = None,
+        on_closed: Optional[WindowCallback] = None,
+        on_renamed: Optional[WindowCallback] = None,
+    ) -> WindowSubscription:
+        """Registers for changes to matching windows, starting with an open event for each one already open"""
+        subscription = WindowSubscription(self, selector, on_opened, on_closed, on_renamed)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            existing = [w for w in self._windows.values() if selector(w)]
+        if on_opened:
+            for window in existing:
+                on_opened(window)
+        return subscription
+
+    def unsubscribe(self, subscription: WindowSubscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def windows(self) -> List[Window]:
+        with self._lock:
+            return list(self._windows.values())
+
+    def find(self, selector: By) -> Optional[Window]:
+        with self._lock:
+            return self._find(selector)
+
+    def find_by_id(self, window_id: str) -> Optional[Window]:
+        with self._lock:
+            return self._windows.get(window_id)
+
+    def wait_for(self, selector: By, timeout: float) -> Future:
+        """Returns a future resolving to the first window matching the selector, or None on timeout"""
+        future = Future()
+        with self._lock:
+            window = self._find(selector)
+            if window or timeout <= 0:
+                future.set_result(window)
+                return future
+            waiter = (selector, future)
+            self._waiters.append(waiter)
+
+        timer = threading.Timer(timeout, self._expire, args=(waiter,))
+        timer.daemon = True
+        timer.start()
+        future.add_done_callback(lambda _: timer.cancel())
+        return future
+
+    def put(self, window: Window):
+        """Adds a window, or replaces the one with the same id"""
+        with self._lock:
+            old = self._unindex(window.window_id)
+            self._windows[window.window_id] = window
+            self._by_title[window.title][window.window_id] = window
+            self._by_class[window.window_class][window.window_id] = window
+            if old and repr(old) == repr(window) and old.desktop_id == window.desktop_id:
+                return
+            woken = [w for w in self._waiters if w[0](window)]
+            for waiter in woken:
+                self._waiters.remove(waiter)
+            events = self._events(old, window)
+        for _, future in woken:
+            future.set_result(window)
+        self._publish(events)
+
+    def remove(self, window_id: str):
+        with self._lock:
+            old = self._unindex(window_id)
+            events = self._events(old, None)
+        self._publish(events)
+
+    def replace(self, windows: List[Window]):
+        """Makes the given windows the complete set, raising events for what changed"""
+        current = {w.window_id for w in windows}
+        for window_id in {w.window_id for w in self.windows()} - current:
+            self.remove(window_id)
+        for window in windows:
+            self.put(window)
+
+    def _events(self, old: Optional[Window], new: Optional[Window]) -> List[Tuple[WindowCallback, Window]]:
+        events = []
+        for sub in self._subscriptions:
+            was = old is not None and sub.selector(old)
+            now = new is not None and sub.selector(new)
+            if now and not was:
+                events.append((sub.on_opened, new))
+            elif was and not now:
+                events.append((sub.on_closed, old))
+            elif was and now and old.title != new.title:
+                events.append((sub.on_renamed, new))
+        return [(callback, window) for callback, window in events if callback]
+
+    @staticmethod
+    def _publish(events: List[Tuple[WindowCallback, Window]]):
+        for callback, window in events:
+            try:
+                callback(window)
+            except Exception as e:
+                print(f"Error handling window event for {window}: {e}")
+
+    def _find(self, selector: By) -> Optional[Window]:
+        if selector.kind == "title":
+            candidates = self._by_title.get(selector.value, {}).values()
+        elif selector.kind == "window_class":
+            candidates = self._by_class.get(selector.value, {}).values()
+        else:
+            candidates = self._windows.values()
+        return next((w for w in candidates if selector(w)), None)
+
+    def _unindex(self, window_id: str) -> Optional[Window]:
+        old = self._windows.pop(window_id, None)
+        if old:
+            self._discard(self._by_title, old.title, window_id)
+            self._discard(self._by_class, old.window_class, window_id)
+        return old
+
+    @staticmethod
+    def _discard(index: Dict[str, Dict[str, Window]], key: str, window_id: str):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(window_id, None)
+            if not bucket:
+                del index[key]
+
+    def _expire(self, waiter: Tuple[By, Future]):
+        with self._lock:
+            if waiter not in self._waiters:
+                return
+            self._waiters.remove(waiter)
+        waiter[1].set_result(None)
+
+
+class PollingWindowIndex(WindowIndex):
+    """A window index refreshed by polling wmctrl, for when X events aren't available"""
+
+    def __init__(self, interval: float = 0.25):
+        super().__init__()
+        self._interval = interval
+        self._parser = WindowListParser()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+
+    def start(self):
+        self._refresh()
+        self._thread.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self._interval)
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"Error polling windows: {e}")
+
+    def _refresh(self):
+        for change in self._parser.diff(shell.run("wmctrl", "-lx")):
+            if change.type == WindowChangeType.REMOVED:
+                self.remove(change.window.window_id)
+            else:
+                self.put(change.window)
+
+
+_polling_index: Optional[PollingWindowIndex] = None
+_polling_lock = threading.Lock()
+
+
+def get_window_events() -> WindowIndex:
+    """Returns the shared index to subscribe to for window open/close/rename events"""
+    global _polling_index
+    registry = _get_registry()
+    if registry:
+        return registry
+    with _polling_lock:
+        if _polling_index is None:
+            index = PollingWindowIndex()
+            # Only shared once it has started, so a failed start is retried by the next caller
+            index.start()
+            _polling_index = index
+        return _polling_index
+
+
+def _get_registry() -> Optional[WindowRegistry]:
+    from sleuthdeck.x11 import get_registry
+
+    return get_registry()
+
+
 def get_windows() -> List[Window]:
+    registry = _get_registry()
+    if registry:
+        return registry.windows()
+
     output = shell.run("wmctrl", "-lx")
     return _parse_window_output(output)
 
 
-def _parse_window_output(output):
-    result: List[Window] = []
-    guessed_host = None
-    for line in (l for l in output.split("\n") if l):
-        if guessed_host is None:
-            window_id, desktop_id, window_class, host, *title = re.split(r"[ ]+", line)
-            guessed_host = host
+class WindowChangeType(Enum):
+    ADDED = auto()
+    REMOVED = auto()
+    RENAMED = auto()
+
+
+@dataclass
+class WindowChange:
+    type: WindowChangeType
+    window: Window
+    previous: Optional[Window] = None
+
+
+class WindowListParser:
+    """Parses ``wmctrl -lx`` output, reusing the windows parsed from unchanged lines.
+
+    wmctrl pads the class and host columns, and classes can contain spaces, so the class is
+    taken to end at the first known host name: this machine's name, the ``N/A`` wmctrl prints
+    for unknown hosts, or one of ``hosts``. On other hosts the class is assumed to have no
+    spaces, and the host that gives is tried on the rest of the same output, but never kept
+    for later calls. Lines that can't be parsed are skipped.
+    """
+
+    def __init__(self, hosts: Iterable[str] = ()):
+        self._hosts = [socket.gethostname(), "N/A", *hosts]
+        self._lines: Dict[str, Optional[Window]] = {}
+        self._snapshot: Dict[str, Window] = {}
+
+    def parse(self, output: str) -> List[Window]:
+        lines = {}
+        result = []
+        hosts = list(self._hosts)
+        for line in output.splitlines():
+            if not line:
+                continue
+            if line in lines:
+                window = lines[line]
+            elif line in self._lines:
+                window = self._lines[line]
+            else:
+                window = self._parse_line(line, hosts)
+                if window is None:
+                    print(f"Skipping unexpected wmctrl line: {line!r}")
+            # Bad lines are remembered too, so they are only reported once
+            lines[line] = window
+            if window is not None:
+                result.append(window)
+        self._lines = lines
+        return result
+
+    def diff(self, output: str) -> List[WindowChange]:
+        """Parses the output and returns what changed since the last call, keyed by window id"""
+        snapshot = {w.window_id: w for w in self.parse(output)}
+        changes = diff_windows(self._snapshot, snapshot)
+        self._snapshot = snapshot
+        return changes
+
+    def _parse_line(self, line: str, hosts: List[str]) -> Optional[Window]:
+        fields = line.split(None, 2)
+        if len(fields) < 3:
+            return None
+        window_id, desktop_id, rest = fields
+        rest = rest + " "
+        host_start = -1
+        host = None
+        for candidate in hosts:
+            idx = rest.find(f" {candidate} ")
+            if idx != -1 and (host_start == -1 or idx < host_start):
+                host_start, host = idx, candidate
+
+        if host is None:
+            # Unknown host, so assume the class has no spaces
+            fields = rest.split(None, 2)
+            if len(fields) < 2:
+                return None
+            window_class, host, title = (fields + [""])[:3]
+            hosts.append(host)
         else:
-            idx = line.index(guessed_host)
-            window_id, desktop_id, *window_class = re.split(r"[ ]+", line[:idx])
-            window_class = " ".join(window_class)
-            host, *title = re.split(r"[ ]+", line[idx:])
-        title = " ".join(title)
-        result.append(
-            Window(
-                window_id=window_id,
-                title=title.strip(),
-                window_class=window_class.strip(),
-                desktop_id=desktop_id,
-            )
+            window_class = rest[:host_start]
+            title = rest[host_start + len(host) + 2:]
+
+        return Window(
+            window_id=window_id,
+            title=title.strip(),
+            window_class=window_class.strip(),
+            desktop_id=desktop_id,
         )
-    return result
+
+
+def diff_windows(old: Dict[str, Window], new: Dict[str, Window]) -> List[WindowChange]:
+    changes = []
+    for window_id, window in new.items():
+        previous = old.get(window_id)
+        if previous is None:
+            changes.append(WindowChange(WindowChangeType.ADDED, window))
+        elif previous.title != window.title:
+            changes.append(WindowChange(WindowChangeType.RENAMED, window, previous))
+    for window_id, window in old.items():
+        if window_id not in new:
+            changes.append(WindowChange(WindowChangeType.REMOVED, window))
+    return changes
+
+
+def _parse_window_output(output) -> List[Window]:
+    return WindowListParser().parse(output)
+
+
+@contextmanager
+def batch():
+    """Sends the window operations made inside the block together, when supported"""
+    registry = _get_registry()
+    if registry:
+        with registry.batch():
+            yield
+    else:
+        yield
 
 
 def get_focused_window() -> Window:
+    registry = _get_registry()
+    if registry:
+        return registry.active_window()
+
     window_name = shell.run("xdotool", "getwindowfocus", "getwindowname").strip()
     return get_window(By.title(window_name), attempts=1)
 
@@ -104,6 +470,14 @@ def get_window(selector: Union[str, By], attempts: int = 2) -> Optional[Window]:
         actual_selector = By.title(selector)
     else:
         actual_selector = selector
+
+    registry = _get_registry()
+    if registry:
+        window = registry.wait_for(actual_selector, timeout=(attempts - 1) * 0.1).result()
+        if not window:
+            print(f"No windows found for {actual_selector}")
+        return window
+
     for attempt in range(attempts):
         print(f"attempt {attempt}")
         windows = get_windows()
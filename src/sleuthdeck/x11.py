@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from sleuthdeck.windows import Window
+from sleuthdeck.windows import WindowIndex
+
+
+# pyautogui key names that don't match their X keysym names
+KEYSYM_NAMES = {
+    "alt": "Alt_L",
+    "altleft": "Alt_L",
+    "altright": "Alt_R",
+    "backspace": "BackSpace",
+    "ctrl": "Control_L",
+    "ctrlleft": "Control_L",
+    "ctrlright": "Control_R",
+    "del": "Delete",
+    "delete": "Delete",
+    "down": "Down",
+    "end": "End",
+    "enter": "Return",
+    "esc": "Escape",
+    "escape": "Escape",
+    "home": "Home",
+    "left": "Left",
+    "pagedown": "Next",
+    "pageup": "Prior",
+    "return": "Return",
+    "right": "Right",
+    "shift": "Shift_L",
+    "shiftleft": "Shift_L",
+    "shiftright": "Shift_R",
+    "space": "space",
+    "super": "Super_L",
+    "tab": "Tab",
+    "up": "Up",
+    "win": "Super_L",
+    "winleft": "Super_L",
+    "winright": "Super_R",
+}
+
+# Keysyms that are held down as modifiers, and the modifier each one holds
+MODIFIER_KEYSYMS = {
+    "Alt_L": "alt",
+    "Alt_R": "alt",
+    "Control_L": "ctrl",
+    "Control_R": "ctrl",
+    "Shift_L": "shift",
+    "Shift_R": "shift",
+    "Super_L": "super",
+    "Super_R": "super",
+}
+
+
+def keysym_name(key: str) -> str:
+    """The X keysym name for a pyautogui key name, e.g. Control_L for ctrlleft"""
+    return KEYSYM_NAMES.get(key.lower(), key)
+
+
+def keysym(key: str) -> int:
+    """The keysym for a pyautogui key name or X keysym name, or 0 if there is none"""
+    from Xlib import XK
+
+    name = keysym_name(key)
+    return XK.string_to_keysym(name) or XK.string_to_keysym(name.capitalize())
+
+
+def modifier(key: str) -> Optional[str]:
+    """The modifier the key holds, like ctrl for ctrlright or Control_R, or None if it isn't one"""
+    return MODIFIER_KEYSYMS.get(keysym_name(key))
+
+_registry: Union[WindowRegistry, bool, None] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> Optional[WindowRegistry]:
+    """Returns the shared window registry, or None when there is no usable X display"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            try:
+                registry = WindowRegistry()
+                registry.start()
+                _registry = registry
+            except Exception as e:
+                print(f"X11 window registry unavailable, falling back to wmctrl: {e}")
+                _registry = False
+        return _registry or None
+
+
+class WindowRegistry(WindowIndex):
+    """A window index kept current from X11 events on one persistent connection.
+
+    Listens for ``_NET_CLIENT_LIST`` changes on the root window to learn about opened and
+    closed windows, and for name changes on each client window to track retitles.
+
+    Window operations are sent as EWMH client messages over the same connection rather
+    than forking wmctrl, and can be grouped with :meth:`batch` to go out in one flush.
+    """
+
+    def __init__(self, display_name: Optional[str] = None):
+        super().__init__()
+        # Must be imported before the display is opened so the connection can be shared
+        # between the event thread and callers
+        import Xlib.threaded  # noqa: F401
+        from Xlib import display
+
+        self._display = display.Display(display_name)
+        self._root = self._display.screen().root
+        self._client_list = self._display.intern_atom("_NET_CLIENT_LIST")
+        self._net_wm_name = self._display.intern_atom("_NET_WM_NAME")
+        self._net_wm_desktop = self._display.intern_atom("_NET_WM_DESKTOP")
+        self._utf8_string = self._display.intern_atom("UTF8_STRING")
+        self._wm_name = self._display.intern_atom("WM_NAME")
+        self._active_window = self._display.intern_atom("_NET_ACTIVE_WINDOW")
+        self._xids: Dict[int, str] = {}
+        self._active_xid: Optional[int] = None
+        self._active_changed = threading.Condition()
+        self._batching = threading.local()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        from Xlib import X
+
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        self._sync_client_list()
+        self._sync_active_window()
+        self._thread.start()
+
+    @contextmanager
+    def batch(self):
+        """Holds back the flush of window operations until the block exits"""
+        depth = getattr(self._batching, "depth", 0)
+        self._batching.depth = depth + 1
+        try:
+            yield self
+        finally:
+            self._batching.depth = depth
+            if not depth:
+                self._display.flush()
+
+    def maximize(self, window_id: str):
+        self._set_state(window_id, 1, "_NET_WM_STATE_MAXIMIZED_VERT", "_NET_WM_STATE_MAXIMIZED_HORZ")
+
+    def unmaximize(self, window_id: str):
+        self._set_state(window_id, 0, "_NET_WM_STATE_MAXIMIZED_VERT")
+
+    def move(self, window_id: str, x: int, y: int, width: int, height: int):
+        # Gravity from the window, x/y/width/height all present, sent as a pager
+        flags = (1 << 8) | (1 << 9) | (1 << 10) | (1 << 11) | (2 << 12)
+        self._send(window_id, "_NET_MOVERESIZE_WINDOW", [flags, int(x), int(y), int(width), int(height)])
+
+    def close(self, window_id: str):
+        self._send(window_id, "_NET_CLOSE_WINDOW", [0, 2])
+
+    def activate(self, window_id: str, timeout: float = 1.0) -> bool:
+        """Switches to the window's desktop and activates it, waiting until the WM confirms"""
+        from Xlib import X
+
+        xid = int(window_id, 16)
+        window = self.find_by_id(window_id)
+        with self.batch():
+            if window and int(window.desktop_id) >= 0:
+                self._send(self._root.id, "_NET_CURRENT_DESKTOP", [int(window.desktop_id), X.CurrentTime])
+            self._send(window_id, "_NET_ACTIVE_WINDOW", [2, X.CurrentTime, 0])
+        with self._active_changed:
+            return self._active_changed.wait_for(lambda: self._active_xid == xid, timeout=timeout)
+
+    def active_window(self) -> Optional[Window]:
+        with self._active_changed:
+            xid = self._active_xid
+        if xid is None or xid not in self._xids:
+            return None
+        return self.find_by_id(self._xids[xid])
+
+    def send_hotkey(self, keys: Sequence[str], window_id: Optional[str] = None, steal_focus: bool = True):
+        """Presses the keys in order, then releases them in reverse, using pyautogui key names.
+
+        With a window and ``steal_focus``, the window is activated, the keys are injected through
+        XTest, and the previously active window is restored. Without ``steal_focus`` the key events
+        are sent straight to the window, which leaves focus alone but is ignored by applications
+        that reject synthetic events.
+        """
+        keycodes = [self._keycode(key) for key in keys]
+        if window_id and not steal_focus:
+            self._send_keys(window_id, keys, keycodes)
+            return
+
+        previous = self.active_window() if window_id else None
+        if window_id and not self.activate(window_id):
+            print(f"Unable to focus window {window_id}")
+            return
+
+        from Xlib import X
+        from Xlib.ext import xtest
+
+        with self.batch():
+            for keycode in keycodes:
+                xtest.fake_input(self._display, X.KeyPress, keycode)
+            for keycode in reversed(keycodes):
+                xtest.fake_input(self._display, X.KeyRelease, keycode)
+
+        if previous and previous.window_id != window_id:
+            self.activate(previous.window_id)
+
+    def _send_keys(self, window_id: str, keys: Sequence[str], keycodes: List[int]):
+        from Xlib import X
+        from Xlib.protocol import event
+
+        masks = {
+            "alt": X.Mod1Mask,
+            "ctrl": X.ControlMask,
+            "shift": X.ShiftMask,
+            "super": X.Mod4Mask,
+        }
+        target = self._display.create_resource_object("window", int(window_id, 16))
+        state = 0
+        with self.batch():
+            for key, keycode in zip(keys, keycodes):
+                mask = masks.get(modifier(key), 0)
+                if mask:
+                    state |= mask
+                    continue
+                for event_type, event_mask in ((event.KeyPress, X.KeyPressMask),
+                                               (event.KeyRelease, X.KeyReleaseMask)):
+                    target.send_event(
+                        event_type(
+                            time=X.CurrentTime,
+                            root=self._root,
+                            window=target,
+                            same_screen=1,
+                            child=X.NONE,
+                            root_x=0,
+                            root_y=0,
+                            event_x=0,
+                            event_y=0,
+                            state=state,
+                            detail=keycode,
+                        ),
+                        propagate=True,
+                        event_mask=event_mask,
+                    )
+
+    def _keycode(self, key: str) -> int:
+        sym = keysym(key)
+        keycode = self._display.keysym_to_keycode(sym) if sym else 0
+        if not keycode:
+            raise ValueError(f"Unknown key {key}")
+        return keycode
+
+    def _set_state(self, window_id: str, action: int, *states: str):
+        first, second = ([self._display.intern_atom(state) for state in states] + [0])[:2]
+        # Sent as a pager, like wmctrl does
+        self._send(window_id, "_NET_WM_STATE", [action, first, second, 2])
+
+    def _send(self, window: Union[str, int], message: str, data: List[int]):
+        from Xlib import X
+        from Xlib.protocol import event
+
+        xid = int(window, 16) if isinstance(window, str) else window
+        ev = event.ClientMessage(
+            window=self._display.create_resource_object("window", xid),
+            client_type=self._display.intern_atom(message),
+            data=(32, (data + [0] * 5)[:5]),
+        )
+        self._root.send_event(
+            ev, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask
+        )
+        if not getattr(self._batching, "depth", 0):
+            self._display.flush()
+
+    def _run(self):
+        from Xlib import X
+
+        while True:
+            event = self._display.next_event()
+            if event.type != X.PropertyNotify:
+                continue
+            if event.window.id == self._root.id:
+                if event.atom == self._client_list:
+                    self._sync_client_list()
+                elif event.atom == self._active_window:
+                    self._sync_active_window()
+            elif event.atom in (self._net_wm_name, self._wm_name):
+                if event.window.id in self._xids:
+                    self._track(event.window.id)
+
+    def _sync_client_list(self):
+        from Xlib import X
+
+        prop = self._root.get_full_property(self._client_list, X.AnyPropertyType)
+        current = set(prop.value) if prop else set()
+        for xid in current - self._xids.keys():
+            self._track(xid, subscribe=True)
+        for xid in set(self._xids) - current:
+            self.remove(self._xids.pop(xid))
+
+    def _sync_active_window(self):
+        from Xlib import X
+
+        prop = self._root.get_full_property(self._active_window, X.AnyPropertyType)
+        with self._active_changed:
+            self._active_xid = prop.value[0] if prop and prop.value else None
+            self._active_changed.notify_all()
+
+    def _track(self, xid: int, subscribe: bool = False):
+        from Xlib import X
+        from Xlib.error import CatchError
+        from Xlib.error import XError
+
+        xwin = self._display.create_resource_object("window", xid)
+        try:
+            if subscribe:
+                xwin.change_attributes(
+                    event_mask=X.PropertyChangeMask, onerror=CatchError()
+                )
+            window = self._read_window(xwin)
+        except XError:
+            # The window went away between being listed and being read
+            return
+        self._xids[xid] = window.window_id
+        self.put(window)
+
+    def _read_window(self, xwin) -> Window:
+        from Xlib import X
+
+        name = xwin.get_full_property(self._net_wm_name, self._utf8_string)
+        if name:
+            title = name.value.decode("utf-8", "replace")
+        else:
+            title = xwin.get_wm_name() or ""
+        wm_class = xwin.get_wm_class()
+        desktop = xwin.get_full_property(self._net_wm_desktop, X.AnyPropertyType)
+        desktop_id = desktop.value[0] if desktop else 0
+        if desktop_id == 0xFFFFFFFF:
+            # Sticky windows, which wmctrl reports as -1
+            desktop_id = -1
+        return Window(
+            desktop_id=str(desktop_id),
+            window_class=".".join(wm_class) if wm_class else "N/A",
+            window_id=f"0x{xwin.id:08x}",
+            title=title.strip(),
+        )
@@ -4,7 +4,7 @@ from os.path import dirname
 
 from sleuthdeck.actions import MaximizeWindow, Toggle, UnMaximizeWindow, DeckBrightness, Sequential, ChangeScene, \
     PreviousScene, Wait
-from sleuthdeck.actions import MoveWindow
+from sleuthdeck.actions import MoveWindow, PlaceWindow
 from sleuthdeck.actions import SendHotkey, Command, CloseWindow, Pause
 from sleuthdeck.deck import Deck, KeyScene
 from sleuthdeck.hotkeys import Hotkeys
@@ -12,10 +12,10 @@ from sleuthdeck.keys import IconKey, FontAwesomeKey
 from sleuthdeck.plugins import sound
 from sleuthdeck.plugins import twitch
 from sleuthdeck.plugins import zoom
-from sleuthdeck.plugins.obs.actions import OBSKey, OBS, ObsAction, ZoomToMouse, EnableFilter, ChangeVerticalScene, Crop, \
+from sleuthdeck.plugins.obs import OBSKey, OBS, ObsAction, ZoomToMouse, EnableFilter, ChangeVerticalScene, Crop, \
     DisableFilter
 from sleuthdeck.plugins.presentation.actions import Presentation
-from sleuthdeck.plugins.twitch.actions import TwitchKey
+from sleuthdeck.plugins.twitch import TwitchKey
 from sleuthdeck.windows import By
 
 ASSETS_PATH = os.path.join(os.path.dirname(__file__), "assets")
@@ -39,6 +39,7 @@ def run(deck: Deck):
                           byline_scene_item="Byline",
                           title_scene="Me full (title)",
                           overlay_scene="[Scene] Lower-third (labels)")
+    deck.on_close(presso.close)
 
     build_webinar1_scene(obs, presso, scene1, webinar1_scene)
     build_webinar2_scene(obs, presso, scene1, webinar2_scene)
@@ -54,9 +55,7 @@ def run(deck: Deck):
                 Command("gtk-launch", "obs-zoom"),
                 zoom.StartMeeting("https://sleuth-io.zoom.us/j/82836110226"),
                 Pause(2),
-                UnMaximizeWindow("Zoom Meeting"),
-                MoveWindow("Zoom Meeting", "6000", 0, 100, 100),
-                MaximizeWindow("Zoom Meeting"),
+                PlaceWindow("Zoom Meeting", "6000", 0, 100, 100),
                 Pause(3),
                 SendHotkey("Zoom Meeting", "alt", "v"),
             ],
@@ -75,9 +74,7 @@ def run(deck: Deck):
             actions=[
                 obs.close(),
                 Command("gtk-launch", "obs-zoom"),
-                UnMaximizeWindow("Zoom Meeting"),
-                MoveWindow("Zoom Meeting", "6000", 0, 100, 100),
-                MaximizeWindow("Zoom Meeting"),
+                PlaceWindow("Zoom Meeting", "6000", 0, 100, 100),
                 Pause(3),
                 SendHotkey("Zoom Meeting", "alt", "v"),
             ],
@@ -141,7 +138,7 @@ def run(deck: Deck):
 
     scene1.add(
         (1, 4),
-        FontAwesomeKey("solid/camera", text="Section", actions=[Command("flameshot", "gui")]),
+        FontAwesomeKey("solid/camera", text="Section", actions=[Command("flameshot", "gui", timeout=None)]),
     )
 
     scene1.add(
@@ -237,7 +234,7 @@ def build_recording_scene(obs, scene1, record_scene):
         (2, 0),
         OBSKey(text="Zoom", actions=[ZoomToMouse(obs, "[scene] Screenshare", "Zoomed",
                                                  Crop(top=128, bottom=412, right=1, left=960))],
-               hotkeys=["5"]),
+               hotkeys=["mouse8"]),
     )
     record_scene.add(
         (2, 2),
@@ -312,8 +309,7 @@ def build_stream_scene(obs, scene1, stream_scene):
                       obs.close(),
                       Command("gtk-launch", "obs-twitch"),
                       twitch.OpenChat(channel="mrdonbrown", hide_header=True),
-                      MoveWindow("mrdondown - Chat - Twitch", "6000", 0, 100, 100),
-                      MaximizeWindow("mrdondown - Chat - Twitch"),
+                      PlaceWindow("mrdondown - Chat - Twitch", "6000", 0, 100, 100, unmaximize=False),
                       Pause(5),
                       SendHotkey(By.title("mrdondown - Chat - Twitch"), "f11"),
                       obs.change_scene("Coding - Webcam"),